@@ -1,9 +1,9 @@
 from typing import Any, Dict
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel, Field
 
-from app.services.chroma_service import ChromaService
+from app.services.chroma_service import ChromaService, get_chroma
 from app.services.comparison_service import ComparisonService
 
 
@@ -16,8 +16,9 @@ class CompareRequest(BaseModel):
 
 
 @router.post("")
-def compare_documents(payload: CompareRequest) -> Dict[str, Any]:
-    chroma = ChromaService()
+def compare_documents(
+    payload: CompareRequest, chroma: ChromaService = Depends(get_chroma)
+) -> Dict[str, Any]:
     service = ComparisonService(chroma_service=chroma)
     try:
         return service.compare_documents(payload.doc_a, payload.doc_b)
@@ -1,9 +1,11 @@
 from __future__ import annotations
 
+import asyncio
+
 from fastapi import APIRouter, File, HTTPException, UploadFile
 from pydantic import BaseModel, Field, HttpUrl
 
-from app.services.docling_service import DoclingService
+from app.services.docling_service import get_docling_service
 
 router = APIRouter(prefix="/docling", tags=["docling"])
 
@@ -28,7 +30,7 @@ class DoclingMetadataModel(BaseModel):
     images: list[ImageAssetModel] = Field(default_factory=list)
 
 
-_service = DoclingService()
+_service = get_docling_service()
 
 
 @router.post("/extract", response_model=DoclingMetadataModel)
@@ -37,7 +39,7 @@ async def extract_from_pdf(file: UploadFile = File(...)):
         raise HTTPException(status_code=400, detail="Only PDF files are supported")
     data = await file.read()
     try:
-        meta = _service.extract_from_bytes(data)
+        meta = await asyncio.to_thread(_service.extract_from_bytes, data)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Docling error: {e}")
     return DoclingMetadataModel(**meta.__dict__)
@@ -50,7 +52,7 @@ class UrlIn(BaseModel):
 @router.post("/extract_url", response_model=DoclingMetadataModel)
 async def extract_from_url(body: UrlIn):
     try:
-        meta = _service.extract_from_url(str(body.url))
+        meta = await asyncio.to_thread(_service.extract_from_url, str(body.url))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Docling error: {e}")
     return DoclingMetadataModel(**meta.__dict__)
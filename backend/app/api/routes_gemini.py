@@ -1,15 +1,14 @@
 from typing import Optional, Any
 import json
 
-from fastapi import APIRouter, HTTPException, Query, Body
+from fastapi import APIRouter, HTTPException, Query, Body, Depends
 from google import genai
 from google.genai import types
 from google.api_core.exceptions import ResourceExhausted
 from fastapi.responses import JSONResponse, StreamingResponse
 
 from app.core.config import settings
-from app.services.chroma_service import ChromaService
-from app.services.embedding_service import NomicEmbeddingService
+from app.services.embedding_service import NomicEmbeddingService, get_embedder
 from app.services.gemini_service import GeminiService
 from app.services.agent_service import create_document_agent
 
@@ -66,6 +65,7 @@ async def chat(
 @router.post("/chat_agent")
 async def chat_agent(
     body: dict = Body(...),
+    embedder: NomicEmbeddingService = Depends(get_embedder),
 ):
 
     prompt = body.get("prompt")
@@ -75,9 +75,9 @@ async def chat_agent(
     thread_id = body.get("thread_id", "default")
     temperature = float(body.get("temperature", 0.0))
     model_name = body.get("model") or settings.gemini_default_model
-
-    chroma = ChromaService()
-    embedder = NomicEmbeddingService()
+    # Optional per-request retrieval re-ranking (defaults come from settings)
+    mmr_lambda = body.get("mmr_lambda")
+    dedup_threshold = body.get("dedup_threshold")
 
     # Decide whether to activate GitHub mode
     github_mode = is_github_question(prompt)
@@ -85,14 +85,16 @@ async def chat_agent(
     # Track retrieved chunks for UI
     sources_tracker: dict[str, dict] = {}
 
-    # Create the RAG agent
+    # Create the RAG agent (its search tool borrows pooled Chroma handles
+    # per query, so none is held for the whole stream)
     agent = create_document_agent(
-        chroma_service=chroma,
         embedder=embedder,
         doc_ids=body.get("doc_ids", []),
         sources_tracker=sources_tracker,
         model_name=model_name,
         temperature=temperature,
+        mmr_lambda=float(mmr_lambda) if mmr_lambda is not None else None,
+        dedup_threshold=float(dedup_threshold) if dedup_threshold is not None else None,
     )
 
     # Attach extra runtime configuration
@@ -1,4 +1,7 @@
 from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from app.services.embedding_service import embedder_registry
 
 router = APIRouter()
 
@@ -6,3 +9,13 @@ router = APIRouter()
 @router.get("/health")
 def health():
     return {"status": "ok"}
+
+
+@router.get("/health/ready")
+def ready():
+    embedders = embedder_registry.status()
+    is_ready = all(e["ready"] for e in embedders.values())
+    return JSONResponse(
+        {"status": "ready" if is_ready else "loading", "embedders": embedders},
+        status_code=200 if is_ready else 503,
+    )
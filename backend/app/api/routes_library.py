@@ -2,28 +2,32 @@ from __future__ import annotations
 
 import logging
 from typing import Optional, List
-from dataclasses import asdict
-import json
 import base64
 
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import JSONResponse, Response
-import httpx
-from xml.etree import ElementTree as ET
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import FileResponse, JSONResponse, Response
 from pydantic import BaseModel, Field
 
-from app.services.embedding_service import ingest_pdf_bytes_into_chroma, PdfMetadata
-from app.services.embedding_service import ingest_repo_files_into_chroma
-from app.services.github_service import GitHubService, normalize_github_url
-from app.services.chroma_service import ChromaService
+from app.core.config import settings
+from app.services.embedding_service import NomicEmbeddingService, get_embedder
+from app.services.chroma_service import ChromaService, get_chroma
+from app.services.ingestion_jobs import QueueFullError, ingestion_jobs
+from app.services.ingestion_service import (
+    delete_document,
+    ingest_arxiv_batch,
+    ingest_arxiv_paper,
+)
+from app.services.embedding_cache import embedding_cache
+from app.services.image_store import image_store, image_url, is_image_hash
+from app.services.library_catalog import library_catalog
+from app.services.pdf_cache import pdf_cache
+from app.services.retrieval_cache import retrieval_cache
+from app.services.vector_cache import vector_cache
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/library", tags=["library"])
 
-ARXIV_API = "https://export.arxiv.org/api/query"
-UA = "CSE5914-Backend/0.1 (https://github.com/jeevanadella/CSE5914)"
-
 
 class AddArxivRequest(BaseModel):
     github_repos: List[str] = Field(
@@ -32,251 +36,246 @@ class AddArxivRequest(BaseModel):
     )
 
 
+class AddBatchRequest(BaseModel):
+    doc_ids: List[str] = Field(
+        ...,
+        min_length=1,
+        description="arXiv IDs to ingest in one pipelined batch.",
+    )
+
+
 @router.get("/debug/list_all")
-def debug_list_all():
-    chroma = ChromaService()
-    try:
-        data = chroma.collection.get(include=["metadatas"], limit=100)
-
-        doc_info = {}
-        for i, chunk_id in enumerate(data.get("ids", [])):
-            md = (data.get("metadatas") or [{}])[i] or {}
-            doc_id = md.get("doc_id", "unknown")
-
-            if doc_id not in doc_info:
-                images_json = md.get("images", "[]")
-                try:
-                    images = (
-                        json.loads(images_json) if isinstance(images_json, str) else []
-                    )
-                    doc_info[doc_id] = {
-                        "doc_id": doc_id,
-                        "chunk_count": 1,
-                        "image_count": len(images),
-                        "sample_chunk_id": chunk_id,
-                        "title": md.get("title"),
-                    }
-                except Exception:
-                    doc_info[doc_id] = {
-                        "doc_id": doc_id,
-                        "chunk_count": 1,
-                        "image_count": 0,
-                        "sample_chunk_id": chunk_id,
-                        "title": md.get("title"),
-                    }
-            else:
-                doc_info[doc_id]["chunk_count"] += 1
+def debug_list_all(limit: int = 100):
+    documents = [
+        {
+            "doc_id": doc["doc_id"],
+            "chunk_count": doc["chunk_count"],
+            "image_count": doc["image_count"],
+            "repo_file_count": doc["repo_file_count"],
+            "title": doc["title"],
+        }
+        for doc in library_catalog.list(limit=limit)
+    ]
+    return JSONResponse(
+        {"documents": documents, "total_docs": library_catalog.count()}
+    )
 
+
+@router.post("/check_batch")
+def check_batch_papers(
+    doc_ids: List[str], chroma: ChromaService = Depends(get_chroma)
+):
+    if library_catalog.ready:
+        return JSONResponse({"results": library_catalog.contains_many(doc_ids)})
+
+    # Catalog still backfilling: one indexed lookup per requested id
+    results = {}
+    for doc_id in doc_ids:
+        try:
+            data = chroma.collection.get(where={"doc_id": doc_id}, limit=1, include=[])
+            results[doc_id] = len(data.get("ids", [])) > 0
+        except Exception:
+            results[doc_id] = False
+    return JSONResponse({"results": results})
+
+
+@router.get("/status/{doc_id}")
+def document_status(doc_id: str):
+    """
+    Ingestion status of a paper: ``completed`` once it is in the library,
+    otherwise the status of its latest ingestion job, or ``not_found``.
+    """
+    doc = library_catalog.get(doc_id)
+    if doc is not None:
         return JSONResponse(
-            {"documents": list(doc_info.values()), "total_docs": len(doc_info)}
+            {
+                **doc,
+                "repos": library_catalog.repos(doc_id),
+                "in_chromadb": True,
+                "status": "completed",
+            }
         )
-    except Exception as e:
-        return JSONResponse({"error": str(e)}, status_code=500)
+    job = ingestion_jobs.latest(doc_id)
+    if job is None:
+        return JSONResponse(
+            {
+                "doc_id": doc_id,
+                "in_chromadb": False,
+                "status": "not_found",
+                "job_id": None,
+                "error": None,
+            }
+        )
+    status, error = job.status, job.error
+    # A batch job completes even when some of its papers failed
+    for paper in (job.result or {}).get("papers", []):
+        if paper.get("doc_id") == doc_id and paper.get("status") == "error":
+            status, error = "failed", paper.get("error")
+    return JSONResponse(
+        {
+            "doc_id": doc_id,
+            "in_chromadb": False,
+            "status": status,
+            "job_id": job.id,
+            "error": error,
+        }
+    )
+
 
+@router.post("/add/{doc_id}", status_code=202)
+async def add_arxiv(
+    doc_id: str,
+    request: Optional[AddArxivRequest] = None,
+    embedder: NomicEmbeddingService = Depends(get_embedder),
+):
+    if request is None:
+        request = AddArxivRequest()
+    github_repos = list(request.github_repos)
 
-def _fetch_arxiv_metadata(doc_id: str) -> dict:
     try:
-        r = httpx.get(
-            ARXIV_API,
-            params={"id_list": doc_id},
-            headers={"User-Agent": UA},
-            timeout=30.0,
+        job = ingestion_jobs.submit(
+            doc_id,
+            lambda report: ingest_arxiv_paper(
+                doc_id, github_repos, embedder=embedder, report=report
+            ),
         )
-    except httpx.HTTPError:
-        return {}
-    if r.status_code != 200:
-        return {}
-    try:
-        root = ET.fromstring(r.text)
-    except ET.ParseError:
-        return {}
-    ns = {"atom": "http://www.w3.org/2005/Atom"}
-    entry = root.find("atom:entry", ns)
-    if entry is None:
-        return {}
-
-    def _t(tag: str) -> str:
-        el = entry.find(f"atom:{tag}", ns)
-        return (el.text or "").strip() if el is not None else ""
-
-    title = _t("title")
-    summary = _t("summary")
-    published = _t("published")
-    authors: List[str] = []
-    for a in entry.findall("atom:author", ns):
-        name_el = a.find("atom:name", ns)
-        if name_el is not None and name_el.text:
-            authors.append(name_el.text.strip())
-    return {
-        "title": title,
-        "summary": summary,
-        "published": published,
-        "authors": authors,
-    }
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e))
 
+    return JSONResponse(
+        {"status": "queued", "doc_id": doc_id, "job_id": job.id},
+        status_code=202,
+    )
 
-@router.post("/check_batch")
-def check_batch_papers(doc_ids: List[str]):
-    chroma = ChromaService()
-    results = {}
 
-    doc_id_list = [f"{aid}" for aid in doc_ids]
+@router.post("/add_batch", status_code=202)
+async def add_arxiv_batch(
+    request: AddBatchRequest,
+    embedder: NomicEmbeddingService = Depends(get_embedder),
+):
+    if len(request.doc_ids) > settings.batch_max_papers:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.batch_max_papers} papers per batch",
+        )
+    doc_ids = list(request.doc_ids)
 
     try:
-        data = chroma.collection.get(
-            include=["metadatas"],
-            limit=10000,
+        job = ingestion_jobs.submit(
+            ",".join(doc_ids),
+            lambda report: ingest_arxiv_batch(doc_ids, embedder=embedder, report=report),
+            doc_ids=doc_ids,
         )
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e))
 
-        existing_doc_ids = set()
-        for i, chunk_id in enumerate(data.get("ids", [])):
-            md = (data.get("metadatas") or [{}])[i] or {}
-            if md.get("doc_id"):
-                existing_doc_ids.add(md["doc_id"])
+    return JSONResponse(
+        {"status": "queued", "doc_ids": doc_ids, "job_id": job.id},
+        status_code=202,
+    )
 
-        for doc_id in doc_ids:
-            doc_id_str = f"{doc_id}"
-            results[doc_id] = doc_id_str in existing_doc_ids
 
-    except Exception as e:
-        for doc_id in doc_ids:
-            doc_id_str = f"{doc_id}"
-            try:
-                data = chroma.collection.get(
-                    where={"doc_id": doc_id_str}, limit=1, include=[]
-                )
-                results[doc_id] = len(data.get("ids", [])) > 0
-            except Exception:
-                results[doc_id] = False
+@router.get("/jobs/{job_id}")
+def get_ingestion_job(job_id: str):
+    job = ingestion_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return JSONResponse(job.to_dict())
 
-    return JSONResponse({"results": results})
 
-
-@router.post("/add/{doc_id}")
-async def add_arxiv(doc_id: str, request: Optional[AddArxivRequest] = None):
-    if request is None:
-        request = AddArxivRequest()
-    github_service = GitHubService()
-    pdf_url = f"https://arxiv.org/pdf/{doc_id}.pdf"
-    async with httpx.AsyncClient(
-        timeout=httpx.Timeout(60.0, connect=10.0),
-        headers={"User-Agent": UA},
-        follow_redirects=True,
-    ) as client:
-        r = await client.get(pdf_url)
-        if r.status_code != 200:
-            raise HTTPException(status_code=r.status_code, detail="Failed to fetch PDF")
-        pdf_bytes = r.content
-
-    meta = _fetch_arxiv_metadata(doc_id)
-    github_url = None
-    if request.github_repos:
-        github_url = normalize_github_url(request.github_repos[0])
-
-    pdf_meta = PdfMetadata(
-        doc_id=doc_id,
-        pdf_url=pdf_url,
-        title=meta.get("title", ""),
-        summary=meta.get("summary", ""),
-        published=meta.get("published", ""),
-        authors=meta.get("authors", []),
-        github_url=github_url, 
+@router.get("/cache/stats")
+def pdf_cache_stats():
+    return JSONResponse(
+        {
+            **pdf_cache.stats(),
+            "embeddings": embedding_cache.stats(),
+            "vectors": vector_cache.stats(),
+            "retrieval": retrieval_cache.stats(),
+        }
     )
 
-    stats = ingest_pdf_bytes_into_chroma(pdf_bytes, extra_metadata=pdf_meta)
-    # If GitHub repo exists, fetch files & ingest to Chroma
-    repo_url = pdf_meta.github_url
-    if repo_url:
-        repo_files = await github_service.fetch_repo_files(repo_url)
-        if repo_files:
-            ingest_repo_files_into_chroma(
-                repo_url=repo_url,
-                arxiv_id=doc_id,
-                repo_files=repo_files,
-                base_metadata={
-                    "doc_id": doc_id,
-                    "source": "github",
-                },
-            )
-    response_data = {
-        "status": "ok",
-        "doc_id": doc_id,
-        "metadata": asdict(pdf_meta),
-        "ingestion": stats,
-        "repos": [],
-    }
-
-    if request.github_repos:
-        github_service = GitHubService()
-        base_metadata = asdict(pdf_meta)
-
-        for repo_url in request.github_repos:
-            try:
-                normalized_url = normalize_github_url(repo_url)
-                logger.info(f"Fetching files from {normalized_url}")
-                repo_files = await github_service.fetch_repo_files(normalized_url)
-
-                if not repo_files:
-                    logger.warning(f"No files fetched from {normalized_url}")
-                    response_data["repos"].append(
-                        {
-                            "url": normalized_url,
-                            "status": "warning",
-                            "files_ingested": 0,
-                            "reason": "No files fetched",
-                        }
-                    )
-                    continue
-
-                files_ingested = ingest_repo_files_into_chroma(
-                    repo_url=normalized_url,
-                    arxiv_id=doc_id,
-                    repo_files=repo_files,
-                    base_metadata=base_metadata,
-                )
-
-                response_data["repos"].append(
-                    {
-                        "url": normalized_url,
-                        "status": "ok",
-                        "files_ingested": files_ingested,
-                    }
-                )
-                logger.info(
-                    f"Ingested {files_ingested} files from {normalized_url} for {doc_id}"
-                )
-            except Exception as e:
-                logger.error(f"Failed to ingest repo {repo_url}: {e}")
-                response_data["repos"].append(
-                    {
-                        "url": repo_url,
-                        "status": "error",
-                        "error": str(e),
-                    }
-                )
-
-    return JSONResponse(response_data)
 
-
-@router.get("/list")
-def list_library(limit: int = 500, offset: int = 0):
-    chroma = ChromaService()
-    data = chroma.collection.get(include=["metadatas"], limit=limit, offset=offset)
-    results = []
-    for i, _id in enumerate(data.get("ids", [])):
-        md = (data.get("metadatas") or [{}])[i] or {}
-        results.append(
+@router.get("/images/{doc_id}")
+def list_images(doc_id: str, chroma: ChromaService = Depends(get_chroma)):
+    data = chroma.images.collection.get(where={"doc_id": doc_id}, include=["metadatas"])
+    images = []
+    for md in data.get("metadatas") or []:
+        md = md or {}
+        image_hash = md.get("image_hash")
+        if not image_hash:
+            continue
+        images.append(
             {
-                "id": _id,
-                "metadata": md,
+                "filename": f"figure-{md.get('picture_number')}.png",
+                "page": md.get("page"),
+                "caption": md.get("caption"),
+                "width": md.get("width"),
+                "height": md.get("height"),
+                "image_hash": image_hash,
+                "url": image_url(image_hash),
             }
         )
-    return JSONResponse({"results": results, "count": len(results)})
+    if not images:
+        raise HTTPException(status_code=404, detail="No images for this paper")
+    images.sort(key=lambda img: (img["page"] or 0, img["filename"]))
+    return JSONResponse({"doc_id": doc_id, "images": images})
+
+
+IMAGE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+@router.get("/image/{image_hash}")
+def get_image(
+    image_hash: str,
+    size: Optional[int] = None,
+    if_none_match: Optional[str] = Header(default=None),
+):
+    """
+    Serve a stored figure by content hash. Images never change for a given
+    hash, so responses are cacheable forever and revalidate with the ETag.
+    """
+    if not is_image_hash(image_hash):
+        raise HTTPException(status_code=400, detail="Invalid image hash")
+    if size is not None and size not in settings.image_thumbnail_sizes:
+        raise HTTPException(
+            status_code=400,
+            detail=f"size must be one of {settings.image_thumbnail_sizes}",
+        )
+
+    etag = f'"{image_hash}-{size}"' if size else f'"{image_hash}"'
+    headers = {"ETag": etag, "Cache-Control": IMAGE_CACHE_CONTROL}
+    if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+        if image_store.exists(image_hash):
+            return Response(status_code=304, headers=headers)
+
+    path = (
+        image_store.thumbnail(image_hash, size)
+        if size
+        else (image_store.path(image_hash) if image_store.exists(image_hash) else None)
+    )
+    if path is None:
+        raise HTTPException(status_code=404, detail="Image not found")
+    return FileResponse(path, media_type="image/png", headers=headers)
+
+
+@router.get("/list")
+def list_library(limit: int = 500, offset: int = 0):
+    results = [
+        {"id": doc["doc_id"], "metadata": doc}
+        for doc in library_catalog.list(limit=limit, offset=offset)
+    ]
+    return JSONResponse(
+        {"results": results, "count": len(results), "total": library_catalog.count()}
+    )
 
 
 @router.get("/chunks/{doc_id}")
-def list_chunks(doc_id: str, limit: int = 200, offset: int = 0):
-    chroma = ChromaService()
+def list_chunks(
+    doc_id: str,
+    limit: int = 200,
+    offset: int = 0,
+    chroma: ChromaService = Depends(get_chroma),
+):
     try:
         data = chroma.collection.get(
             where={"kind": "chunk", "root_id": doc_id},
@@ -304,27 +303,9 @@ def list_chunks(doc_id: str, limit: int = 200, offset: int = 0):
 
 
 @router.delete("/delete/{doc_id}")
-def delete_item(doc_id: str):
-    chroma = ChromaService()
-
+def delete_item(doc_id: str, chroma: ChromaService = Depends(get_chroma)):
     try:
-        to_delete = []
-
-        data = chroma.collection.get(include=["metadatas", "documents"])
-        for i, _id in enumerate(data.get("ids", [])):
-            md = (data.get("metadatas") or [{}])[i] or {}
-            if (
-                md.get("doc_id") == doc_id
-                or str(_id).startswith(f"{doc_id}::chunk::")
-                or str(_id) == doc_id
-            ):
-                to_delete.append(_id)
-
-        if not to_delete:
-            chroma.delete([doc_id])
-            return JSONResponse({"status": "deleted", "id": doc_id})
-
-        chroma.delete(to_delete)
-        return JSONResponse({"status": "deleted", "deleted_count": len(to_delete)})
+        result = delete_document(doc_id, chroma)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    return JSONResponse({"status": "deleted", "id": doc_id, **result})
@@ -13,9 +13,92 @@ class Settings(BaseSettings):
     github_raw_url: str = "https://raw.githubusercontent.com"
 
     nomic_api_key: str | None = None
+    # Local embedding models (loaded once per process, see EmbedderRegistry)
+    embedding_model: str = "nomic-embed-text-v1.5"
+    embedding_vision_model: str = "nomic-embed-vision-v1.5"
+    # Text embedding backend: "nomic" (gpt4all via langchain_nomic) or "onnx"
+    embedding_backend: str = "nomic"
+    onnx_model_repo: str = "nomic-ai/nomic-embed-text-v1.5"
+    onnx_model_path: str = ""  # local .onnx file instead of downloading from the repo
+    onnx_quantized: bool = False  # use the repo's int8 export
+    onnx_intra_op_threads: int = 0  # 0 lets ONNX Runtime use every core
+    onnx_max_length: int = 2048  # tokens per text, as with the gpt4all backend
+    embedder_warmup: bool = True  # load models during app startup
+    index_images: bool = True  # embed figures into the image collection
+    image_embed_batch_size: int = 16
+    # Text embedding batches: padded tokens (texts x longest) and texts per call
+    embed_batch_max_tokens: int = 16384
+    embed_batch_max_texts: int = 64
+    # Persistent cache of document embeddings (see EmbeddingCache)
+    embedding_cache_enabled: bool = True
+    embedding_cache_path: str = "./cache/embeddings.sqlite3"
+    embedding_cache_max_entries: int = 500_000
+    # Concurrent embed_query/embed_texts calls coalesced into one model call
+    embed_dispatch_enabled: bool = True
+    embed_dispatch_max_batch: int = 32  # texts per coalesced call
+    embed_dispatch_max_wait_ms: float = 5.0  # how long a batch waits for company
+    # In-memory LRU of recent query embeddings
+    query_embedding_cache_size: int = 1024
+    query_embedding_cache_ttl: float = 3600.0  # seconds
+    # Search results per (queries, papers, top_k, options); dropped when a paper changes
+    retrieval_cache_size: int = 512
+    retrieval_cache_ttl: float = 600.0  # seconds
+    chunk_tokenizer_model: str = "nomic-ai/nomic-embed-text-v1.5"
+    # Docling conversion worker processes (0 converts inside the API process)
+    docling_workers: int = 2
+    docling_max_tasks_per_child: int = 50  # PDFs before a worker is recycled
+    docling_window_pages: int = 10  # pages per window for long papers (0 = off)
+    docling_window_min_pages: int = 40  # shorter papers convert in one pass
     # ChromaDB configuration
     chroma_persist_path: str = "./chroma"  # relative to backend working dir
     chroma_collection_name: str = "documents"
+    chroma_image_collection_name: str = "document_images"
+    chroma_pool_size: int = 4  # concurrent handles onto the persistent store
+    chroma_pool_timeout: float = 30.0  # seconds to wait for a free handle
+    delete_batch_size: int = 500  # entries fetched and deleted per round trip
+    # Agent text retrieval: "dense" or "hybrid" (dense + BM25, fused by RRF)
+    search_mode: str = "hybrid"
+    hybrid_candidates: int = 30  # ids each ranking contributes to the fusion
+    rrf_k: int = 60  # reciprocal rank fusion constant
+    lexical_index_max_docs: int = 256  # papers whose BM25 postings stay in memory
+    # Text results are re-ranked by MMR over retrieved embeddings: 1.0 keeps
+    # retrieval order, lower values trade relevance for diversity
+    mmr_lambda: float = 0.7
+    mmr_fetch_factor: int = 3  # candidates fetched per requested result for re-ranking
+    dedup_threshold: float = (
+        0.95  # cosine above which chunks count as duplicates (1.0 keeps all)
+    )
+    # Scopes of up to this many papers are searched exactly in memory (0 disables)
+    exact_search_max_docs: int = 8
+    vector_cache_max_mb: int = 256  # budget for the per-paper vectors of exact search
+    # Stored text vectors: Matryoshka dimension (0 = model's native 768)
+    embedding_dimension: int = 0
+    # Quantized copy of each collection for first-stage search ("", "int8", "float16")
+    vector_sidecar: str = ""
+    vector_sidecar_dir: str = "./data/sidecar"  # relative to backend working dir
+    vector_sidecar_oversample: int = (
+        4  # candidates per result rescored in full precision
+    )
+    # Background ingestion (/library/add)
+    ingest_workers: int = 2
+    ingest_queue_size: int = 100  # queued + running jobs before rejecting
+    ingest_job_retention: float = 3600.0  # seconds finished jobs stay queryable
+    # Content-addressed PDF / DoclingDocument cache
+    pdf_cache_enabled: bool = True
+    pdf_cache_dir: str = "./cache/pdf"  # relative to backend working dir
+    pdf_cache_max_bytes: int = 2 * 1024**3
+    pdf_cache_unversioned_ttl: float = 86400.0  # seconds for ids without vN
+    pdf_max_bytes: int = 100 * 1024**2  # larger arXiv downloads are rejected
+    # Catalog of ingested documents served by /library/list, check_batch, status
+    library_catalog_path: str = "./data/library.sqlite3"
+    # Extracted figures, stored once by content hash (see ImageStore)
+    image_store_dir: str = "./data/images"  # relative to backend working dir
+    image_thumbnail_sizes: list[int] = [128, 256, 512]  # allowed ?size= values
+    # Pipelined batch ingestion (/library/add_batch)
+    batch_max_papers: int = 200
+    batch_download_workers: int = 4
+    batch_convert_workers: int = 1
+    batch_queue_size: int = 2  # papers buffered between pipeline stages
     model_config = SettingsConfigDict(
         env_file=".env",
         env_file_encoding="utf-8",
@@ -1,3 +1,7 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -9,8 +13,50 @@ from app.api.routes_openalex import router as openalex_router
 from app.api.routes_docling import router as docling_router
 from app.api.routes_compare import router as compare_router
 from app.core.config import settings
+from app.services.chroma_service import chroma_pool
+from app.services.docling_pool import docling_pool
+from app.services.embedding_cache import embedding_cache
+from app.services.embedding_service import embedder_registry
+from app.services.ingestion_jobs import ingestion_jobs
+from app.services.library_catalog import library_catalog
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load the local embedding models in the background so the server can
+    # answer health probes while they warm up (see /health/ready).
+    warmup = None
+    if settings.embedder_warmup:
+        warmup = asyncio.create_task(asyncio.to_thread(embedder_registry.warm_up))
+    chroma_pool.open(embedding_fn=embedder_registry.get().embedder)
+    # Libraries ingested before the catalog existed are indexed once
+    library_catalog.ready = False
+    backfill = asyncio.create_task(asyncio.to_thread(_backfill_catalog))
+    yield
+    if warmup is not None:
+        # The warm-up thread cannot be cancelled, so shutdown waits for the
+        # model load in progress before stopping the embedders it uses
+        await warmup
+    # Likewise the backfill still reads Chroma and writes the catalog
+    await backfill
+    ingestion_jobs.shutdown()
+    embedder_registry.shutdown()
+    docling_pool.shutdown()
+    chroma_pool.close()
+    embedding_cache.close()
+    library_catalog.close()
+
+
+def _backfill_catalog() -> None:
+    try:
+        with chroma_pool.acquire() as chroma:
+            library_catalog.backfill(chroma)
+    except Exception as e:
+        # check_batch keeps answering from Chroma while ``ready`` is False
+        logging.getLogger(__name__).error(f"Library catalog backfill failed: {e}")
+
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # Configure CORS
 app.add_middleware(
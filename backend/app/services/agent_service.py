@@ -7,15 +7,18 @@ This version fully supports:
 - Conditional behavior via github_mode from routes_gemini.py
 """
 
-from typing import List, Annotated, Any, Tuple, cast
+from typing import Dict, List, Annotated, Any, Optional, Tuple
 from langchain_core.tools import tool, BaseTool
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langgraph.prebuilt import create_react_agent
 from langgraph.checkpoint.memory import MemorySaver
 
 from app.core.config import settings
-from app.services.chroma_service import ChromaService
+from app.services.chroma_service import ChromaService, borrow_chroma, merge_results
 from app.services.embedding_service import NomicEmbeddingService
+from app.services.image_store import image_url
+from app.services.rerank import diversify_results
+from app.services.retrieval_cache import retrieval_cache
 
 
 SYSTEM_PROMPT = """
@@ -105,19 +108,29 @@ Be accurate and non-hallucinatory.
 # Search Tool (RAG)
 
 def create_search_tools(
-    chroma_service: ChromaService,
     embedder: NomicEmbeddingService,
     doc_ids: List[str],
     sources_tracker: dict[str, dict],
+    chroma_service: Optional[ChromaService] = None,
+    mmr_lambda: Optional[float] = None,
+    dedup_threshold: Optional[float] = None,
 ) -> BaseTool:
 
     next_citation_number = 1
+    mmr_lambda = settings.mmr_lambda if mmr_lambda is None else mmr_lambda
+    dedup_threshold = settings.dedup_threshold if dedup_threshold is None else dedup_threshold
+    # Re-ranking needs a larger candidate pool and the candidates' vectors
+    rerank = mmr_lambda < 1.0 or dedup_threshold < 1.0
     
     @tool
     def search_documents(
         query: Annotated[str, "The search query for document intelligence"],
         top_k_text: Annotated[int, "Max text results"] = 8,
         top_k_image: Annotated[int, "Max image results"] = 4,
+        related_queries: Annotated[
+            Optional[List[str]],
+            "Optional rephrasings or sub-questions searched together with the query",
+        ] = None,
     ) -> str:
         """
         Unified text + image search for RAG.
@@ -126,6 +139,8 @@ def create_search_tools(
             query: The search query or question.
             top_k_text: Maximum number of text results to return.
             top_k_image: Maximum number of image results to return.
+            related_queries: Extra phrasings of the question; they are
+                searched in the same round trip and their results merged.
 
         Returns:
             A formatted multiline string containing:
@@ -154,21 +169,80 @@ def create_search_tools(
             }
             return citation_number
 
+        queries = list(dict.fromkeys([query, *(q for q in related_queries or [] if q.strip())]))
+
+        # Repeated questions over the same papers skip embedding and Chroma
+        cache_key = retrieval_cache.key(
+            queries,
+            doc_ids,
+            (top_k_text, top_k_image),
+            mode=settings.search_mode,
+            mmr_lambda=mmr_lambda,
+            dedup_threshold=dedup_threshold,
+        )
+        results: Dict[str, Any] = retrieval_cache.get(cache_key) or {}
+        if not results:
+            version = retrieval_cache.version()
+
+            # One embedding per query serves both the text and the image search
+            try:
+                qvecs = embedder.embed_queries(queries)
+            except Exception as e:
+                return f"## SEARCH ERROR\n{e}"
+
+            # Both sources are searched on one borrowed handle, each with a
+            # single batched query over all phrasings
+            fetch_k = top_k_text * max(1, settings.mmr_fetch_factor) if rerank else top_k_text
+            try:
+                with borrow_chroma(chroma_service) as chroma:
+                    try:
+                        if settings.search_mode == "hybrid":
+                            res = chroma.hybrid_search(
+                                queries, qvecs, fetch_k, doc_ids, include_embeddings=rerank
+                            )
+                        else:
+                            res = merge_results(
+                                chroma.search_many(
+                                    qvecs, fetch_k, doc_ids, include_embeddings=rerank
+                                ),
+                                fetch_k,
+                            )
+                        if rerank:
+                            # Drop near-duplicate chunks and diversify before
+                            # they reach the prompt
+                            res = diversify_results(
+                                res, qvecs, top_k_text, mmr_lambda, dedup_threshold
+                            )
+                        results["text"] = res
+                    except Exception as e:
+                        results["text"] = e
+                    try:
+                        # Figures live in their own collection, embedded with the
+                        # vision model; Nomic's text query embeddings share its
+                        # space, so the text query retrieves images directly.
+                        results["image"] = merge_results(
+                            chroma.images.search_many(
+                                qvecs, n_results=top_k_image, doc_ids=doc_ids
+                            ),
+                            top_k_image,
+                        )
+                    except Exception as e:
+                        results["image"] = e
+            except Exception as e:
+                results = {"text": e, "image": e}
+
+            if not any(isinstance(r, Exception) for r in results.values()):
+                retrieval_cache.put(cache_key, results, version)
+
         # -----------------------------
         # TEXT SEARCH
         # -----------------------------
         try:
-            print(f"[TEXT SEARCH] query={query}, doc_ids={doc_ids}, top_k={top_k_text}")
-
-            text_where = {"doc_id": {"$in": doc_ids}}
-            qvec = embedder.embed_query(query)
+            print(f"[TEXT SEARCH] queries={queries}, doc_ids={doc_ids}, top_k={top_k_text}")
 
-            res = chroma_service.collection.query(
-                query_embeddings=[qvec],
-                n_results=top_k_text,
-                include=["documents", "metadatas", "distances"],
-                where=cast(Any, text_where),
-            )
+            res = results["text"]
+            if isinstance(res, Exception):
+                raise res
 
             docs = (res.get("documents") or [[]])[0]
             metas = (res.get("metadatas") or [[]])[0]
@@ -238,23 +312,11 @@ def create_search_tools(
         # IMAGE SEARCH
         # -----------------------------
         try:
-            print(f"[IMAGE SEARCH] query={query}, doc_ids={doc_ids}, top_k={top_k_image}")
-
-            image_where = {
-                "$and": [
-                    {"doc_id": {"$in": doc_ids}},
-                    {"type": "image"},
-                ]
-            }
+            print(f"[IMAGE SEARCH] queries={queries}, doc_ids={doc_ids}, top_k={top_k_image}")
 
-            qvec = embedder.embed_query(query)
-
-            res = chroma_service.collection.query(
-                query_embeddings=[qvec],
-                n_results=top_k_image,
-                include=["documents", "metadatas", "distances"],
-                where=cast(Any, image_where),
-            )
+            res = results["image"]
+            if isinstance(res, Exception):
+                raise res
 
             docs = (res.get("documents") or [[]])[0]
             metas = (res.get("metadatas") or [[]])[0]
@@ -272,15 +334,11 @@ def create_search_tools(
                     title = md.get("title") or filename or doc_id
 
                     caption = md.get("caption")
-                    image_b64 = md.get("image_b64")
+                    image_hash = md.get("image_hash")
                     page = md.get("page") or 0
                     picture_number = md.get("picture_number") or i
 
-                    img_uri = (
-                        f"data:image/png;base64,{image_b64}"
-                        if image_b64
-                        else None
-                    )
+                    img_uri = image_url(image_hash) if image_hash else None
 
                     unique_id = f"image:{doc_id}:p{page}:pic{picture_number}"
 
@@ -312,7 +370,8 @@ def create_search_tools(
                             "page": page,
                             "picture_number": picture_number,
                             "content": caption,
-                            "image_data": image_b64,
+                            "image_hash": image_hash,
+                            "image_url": img_uri,
                             "bbox": bbox_dict,
                         },
                     )
@@ -335,12 +394,14 @@ def create_search_tools(
 # Create RAG Agent
 
 def create_document_agent(
-    chroma_service: ChromaService,
     embedder: NomicEmbeddingService,
     doc_ids: List[str],
     sources_tracker: dict[str, dict],
     model_name: str | None = None,
     temperature: float = 0.0,
+    chroma_service: Optional[ChromaService] = None,
+    mmr_lambda: Optional[float] = None,
+    dedup_threshold: Optional[float] = None,
 ) -> Any:
 
     if model_name is None:
@@ -352,7 +413,14 @@ def create_document_agent(
         google_api_key=settings.gemini_api_key,
     )
 
-    search_tool = create_search_tools(chroma_service, embedder, doc_ids, sources_tracker)
+    search_tool = create_search_tools(
+        embedder,
+        doc_ids,
+        sources_tracker,
+        chroma_service=chroma_service,
+        mmr_lambda=mmr_lambda,
+        dedup_threshold=dedup_threshold,
+    )
 
     memory = MemorySaver()
 
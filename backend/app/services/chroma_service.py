@@ -1,28 +1,142 @@
-from typing import List, Sequence, Iterable, Dict, Any, cast, Optional
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    cast,
+)
+from contextlib import contextmanager
 from io import BytesIO
 import base64
+import hashlib
+import logging
+import queue
+import threading
 from uuid import uuid4
+import numpy as np
 from PIL import Image
 
 from langchain_core.documents import Document
 from langchain_chroma import Chroma
 
 from app.core.config import settings
+from app.services.lexical_index import (
+    LexicalIndex,
+    get_lexical_index,
+    reciprocal_rank_fusion,
+)
+from app.services.retrieval_cache import retrieval_cache
+from app.services.vector_cache import vector_cache
+from app.services.vector_sidecar import VectorSidecar, get_sidecar
+
+logger = logging.getLogger(__name__)
+
+
+def content_hash(text: str) -> str:
+    """Hash of a chunk's text, stored as ``content_hash`` metadata."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def truncate_embeddings(
+    embeddings: Sequence[Sequence[float]], dimension: int
+) -> List[List[float]]:
+    """
+    Shrink vectors to ``dimension`` components with Nomic's Matryoshka
+    recipe: layer-norm the full vector, keep its first ``dimension``
+    components, then L2-normalize.
+
+    Layer norm is invariant to the vector's scale, so applying it to the
+    stored unit-length vectors gives what the model would return for the
+    smaller dimensionality.
+    """
+    if not embeddings or not dimension or len(embeddings[0]) <= dimension:
+        return [list(e) for e in embeddings]
+    matrix = np.asarray(embeddings, dtype=np.float32)
+    matrix = (matrix - matrix.mean(axis=1, keepdims=True)) / np.sqrt(
+        matrix.var(axis=1, keepdims=True) + 1e-5
+    )
+    matrix = matrix[:, :dimension]
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (matrix / norms).tolist()
+
+
+def merge_results(result: Dict[str, Any], n_results: int) -> Dict[str, Any]:
+    """
+    Collapse the rows of a batched query result into one row of at most
+    ``n_results`` unique ids, keeping each id's smallest distance.
+    """
+    best: Dict[str, Any] = {}
+    ids_rows = result.get("ids") or []
+    embedding_rows = result.get("embeddings")
+    if embedding_rows is None:
+        embedding_rows = [[None] * len(ids) for ids in ids_rows]
+    for ids, documents, metadatas, distances, embeddings in zip(
+        ids_rows,
+        result.get("documents") or [],
+        result.get("metadatas") or [],
+        result.get("distances") or [],
+        embedding_rows,
+    ):
+        for _id, doc, md, dist, emb in zip(
+            ids, documents, metadatas, distances, embeddings
+        ):
+            if _id not in best or dist < best[_id][2]:
+                best[_id] = (doc, md, dist, emb)
+    ranked = sorted(best, key=lambda _id: best[_id][2])[:n_results]
+    merged = {
+        "ids": [ranked],
+        "documents": [[best[_id][0] for _id in ranked]],
+        "metadatas": [[best[_id][1] for _id in ranked]],
+        "distances": [[best[_id][2] for _id in ranked]],
+    }
+    if result.get("embeddings") is not None:
+        merged["embeddings"] = [[best[_id][3] for _id in ranked]]
+    return merged
 
 
 class ChromaService:
-    def __init__(self, embedding_fn=None):
+    def __init__(
+        self,
+        embedding_fn=None,
+        collection_name: Optional[str] = None,
+        collection_metadata: Optional[Dict[str, Any]] = None,
+        dimension: Optional[int] = None,
+        lexical: bool = True,
+    ):
         """
         Creates (or loads) a persistent Chroma vector store.
 
+        Prefer ``chroma_pool.acquire()`` (or the ``get_chroma`` dependency)
+        over constructing this directly: opening the persistent client is
+        far more expensive than the queries routes actually run.
+
         Args:
             embedding_fn: An embedding function such as NomicEmbeddings() or similar.
-            settings: An object with chroma_persist_path and chroma_collection_name.
+            collection_name: Defaults to settings.chroma_collection_name.
+            collection_metadata: Passed to Chroma when the collection is created.
+            dimension: Matryoshka dimension vectors are truncated to before
+                they are stored or queried. Defaults to settings.embedding_dimension.
+            lexical: Keep a BM25 index of the entries for ``hybrid_search``.
         """
         self.settings = settings
 
         self.persist_path = settings.chroma_persist_path
-        self.collection_name = settings.chroma_collection_name
+        self.collection_name = collection_name or settings.chroma_collection_name
+        self.dimension = (
+            settings.embedding_dimension if dimension is None else dimension
+        )
+        self.sidecar: Optional[VectorSidecar] = get_sidecar(self.collection_name)
+        # Names this collection in process-wide in-memory indexes
+        self.cache_key = f"{self.persist_path}::{self.collection_name}"
+        self.lexical: Optional[LexicalIndex] = (
+            get_lexical_index(self.cache_key) if lexical else None
+        )
+        self._images: Optional["ChromaService"] = None
         print(
             f"[ChromaService] Using persist path: {self.persist_path}, collection: {self.collection_name}"
         )
@@ -31,6 +145,7 @@ class ChromaService:
             collection_name=self.collection_name,
             persist_directory=self.persist_path,
             embedding_function=embedding_fn,
+            collection_metadata=collection_metadata,
         )
 
     @property
@@ -38,6 +153,25 @@ class ChromaService:
         """Return the underlying Chroma Collection object."""
         return self.vectorstore._collection  # Chroma stores it internally
 
+    @property
+    def images(self) -> "ChromaService":
+        """
+        Handle on the separate figure collection.
+
+        Figures are embedded with the vision model, so they live apart from
+        text chunks; text queries stay fast and the image index can use its
+        own dimensionality and cosine space. The vision model is not
+        Matryoshka-trained, so figures are always stored at full size.
+        """
+        if self._images is None:
+            self._images = ChromaService(
+                collection_name=settings.chroma_image_collection_name,
+                collection_metadata={"hnsw:space": "cosine"},
+                dimension=0,
+                lexical=False,
+            )
+        return self._images
+
     def similarity_search(self, query: str, embedding_fn, k: int = 5):
         """
         Run a similarity search on text queries.
@@ -50,8 +184,557 @@ class ChromaService:
         """
         return self.vectorstore.similarity_search_by_vector(vector, k)
 
+    def add_documents(
+        self,
+        documents: Sequence[Document],
+        embeddings: Sequence[Sequence[float]],
+        ids: Optional[Sequence[str]] = None,
+    ) -> List[str]:
+        """
+        Write documents whose embeddings were computed by the caller.
+        """
+        if not documents:
+            return []
+        doc_ids = list(ids) if ids else [str(uuid4()) for _ in documents]
+        vectors = truncate_embeddings(embeddings, self.dimension)
+        self.collection.upsert(
+            ids=doc_ids,
+            embeddings=cast(Any, vectors),
+            documents=[d.page_content for d in documents],
+            metadatas=cast(Any, [d.metadata for d in documents]),
+        )
+        owners = [str(d.metadata.get("doc_id", "")) for d in documents]
+        vector_cache.invalidate(self.cache_key, owners)
+        retrieval_cache.invalidate(owners)
+        if self.sidecar is not None:
+            self.sidecar.upsert(doc_ids, owners, vectors)
+        if self.lexical is not None:
+            self.lexical.add(doc_ids, owners, [d.page_content for d in documents])
+        return doc_ids
+
+    def search(
+        self,
+        query_embedding: Sequence[float],
+        n_results: int,
+        doc_ids: Optional[Sequence[str]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Nearest entries to ``query_embedding``, optionally within ``doc_ids``.
+
+        Returns Chroma's query result shape (one row of ids, documents,
+        metadatas and distances). See ``search_many``.
+        """
+        return self.search_many([query_embedding], n_results, doc_ids)
+
+    def search_many(
+        self,
+        query_embeddings: Sequence[Sequence[float]],
+        n_results: int,
+        doc_ids: Optional[Sequence[str]] = None,
+        include_embeddings: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        ``search`` for several queries in one round trip, one result row per
+        query (use ``merge_results`` to combine them). ``include_embeddings``
+        adds the stored vectors of the hits, as Chroma's ``include`` does.
+
+        Scopes of at most ``settings.exact_search_max_docs`` papers are
+        scored exactly over their vectors held in ``vector_cache``.
+        Otherwise, with a sidecar configured, candidates are ranked on the
+        quantized vectors first and only the best
+        ``n_results * vector_sidecar_oversample`` per query are rescored
+        against the full-precision vectors stored in Chroma; without one, a
+        single batched HNSW query is issued.
+        """
+        queries = truncate_embeddings(query_embeddings, self.dimension)
+        keys = ["ids", "documents", "metadatas", "distances"]
+        if include_embeddings:
+            keys.append("embeddings")
+        if not queries:
+            return {key: [] for key in keys}
+        if doc_ids is not None and 0 < len(doc_ids) <= settings.exact_search_max_docs:
+            return self._exact_search(queries, n_results, doc_ids, include_embeddings)
+        where = {"doc_id": {"$in": list(doc_ids)}} if doc_ids is not None else None
+        if self.sidecar is None:
+            return cast(
+                Dict[str, Any],
+                self.collection.query(
+                    query_embeddings=cast(Any, queries),
+                    n_results=n_results,
+                    include=cast(Any, keys[1:]),
+                    where=cast(Any, where),
+                ),
+            )
+
+        self._sync_sidecar()
+        oversample = n_results * max(1, settings.vector_sidecar_oversample)
+        candidates = [self.sidecar.search(q, oversample, doc_ids) for q in queries]
+        union = list(dict.fromkeys(_id for ids in candidates for _id in ids))
+        data: Dict[str, Any] = {}
+        if union:
+            data = cast(
+                Dict[str, Any],
+                self.collection.get(
+                    ids=union, include=["embeddings", "documents", "metadatas"]
+                ),
+            )
+        found = list(data.get("ids") or [])
+        rows = {_id: n for n, _id in enumerate(found)}
+        matrix = np.asarray(data["embeddings"], dtype=np.float32) if found else None
+        documents = data.get("documents") or [None] * len(found)
+        metadatas = data.get("metadatas") or [None] * len(found)
+        result: Dict[str, Any] = {key: [] for key in keys}
+        for query, ids in zip(queries, candidates):
+            picked = np.array([rows[_id] for _id in ids if _id in rows], dtype=int)
+            if matrix is None or not len(picked):
+                order: List[int] = []
+                distances = np.zeros(0, dtype=np.float32)
+            else:
+                distances = self._distances(
+                    matrix[picked], np.asarray(query, dtype=np.float32)
+                )
+                order = list(np.argsort(distances)[:n_results])
+            result["ids"].append([found[picked[i]] for i in order])
+            result["documents"].append([documents[picked[i]] for i in order])
+            result["metadatas"].append([metadatas[picked[i]] for i in order])
+            result["distances"].append([float(distances[i]) for i in order])
+            if include_embeddings:
+                result["embeddings"].append([matrix[picked[i]] for i in order])
+        return result
+
+    def _exact_search(
+        self,
+        queries: Sequence[Sequence[float]],
+        n_results: int,
+        doc_ids: Sequence[str],
+        include_embeddings: bool = False,
+    ) -> Dict[str, Any]:
+        """Brute-force ``search_many`` over the cached vectors of a few papers."""
+        papers = []
+        for doc_id in dict.fromkeys(doc_ids):
+            paper = vector_cache.get(self.cache_key, doc_id)
+            if paper is None:
+                version = vector_cache.version()
+                data = self.collection.get(
+                    where={"doc_id": doc_id},
+                    include=["embeddings", "documents", "metadatas"],
+                )
+                ids = list(data.get("ids") or [])
+                paper = vector_cache.put(
+                    self.cache_key,
+                    doc_id,
+                    ids,
+                    data["embeddings"] if ids else [],
+                    data.get("documents") or [None] * len(ids),
+                    data.get("metadatas") or [None] * len(ids),
+                    version=version,
+                )
+            if paper.ids:
+                papers.append(paper)
+        keys = ["ids", "documents", "metadatas", "distances"]
+        if include_embeddings:
+            keys.append("embeddings")
+        result: Dict[str, Any] = {key: [] for key in keys}
+        if not papers:
+            for key in result:
+                result[key] = [[] for _ in queries]
+            return result
+
+        matrix = (
+            papers[0].matrix
+            if len(papers) == 1
+            else np.vstack([p.matrix for p in papers])
+        )
+        # One (queries x chunks) product scores every query at once
+        distances = self._distances(matrix, np.asarray(queries, dtype=np.float32))
+        rows = [(p, i) for p in papers for i in range(len(p.ids))]
+        n = min(n_results, len(rows))
+        for row in distances:
+            top = np.argpartition(row, n - 1)[:n] if 0 < n < len(row) else np.arange(n)
+            order = top[np.argsort(row[top], kind="stable")]
+            result["ids"].append([rows[i][0].ids[rows[i][1]] for i in order])
+            result["documents"].append(
+                [rows[i][0].documents[rows[i][1]] for i in order]
+            )
+            result["metadatas"].append(
+                [rows[i][0].metadatas[rows[i][1]] for i in order]
+            )
+            result["distances"].append([float(row[i]) for i in order])
+            if include_embeddings:
+                result["embeddings"].append(
+                    [rows[i][0].matrix[rows[i][1]] for i in order]
+                )
+        return result
+
+    def hybrid_search(
+        self,
+        queries: Sequence[str],
+        query_embeddings: Sequence[Sequence[float]],
+        n_results: int,
+        doc_ids: Sequence[str],
+        include_embeddings: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        ``search_many`` fused with BM25 over the same papers by reciprocal rank.
+
+        Every query contributes a dense and a lexical ranking of
+        ``settings.hybrid_candidates`` ids, so exact terms (model, dataset
+        or function names) the embedding misses can still reach the top
+        results, and chunks found by several queries rank higher.
+        Lexical-only hits carry a distance of None. Returns one merged
+        result row; without a lexical index the dense rows are merged by
+        distance instead.
+        """
+        if self.lexical is None:
+            return merge_results(
+                self.search_many(
+                    query_embeddings, n_results, doc_ids, include_embeddings
+                ),
+                n_results,
+            )
+        candidates = max(n_results, settings.hybrid_candidates)
+        dense = self.search_many(
+            query_embeddings, candidates, doc_ids, include_embeddings
+        )
+        self._load_lexical(doc_ids)
+        rankings: List[Sequence[str]] = list(dense["ids"])
+        for query in queries:
+            rankings.append(
+                [_id for _id, _ in self.lexical.search(query, candidates, doc_ids)]
+            )
+
+        fused = reciprocal_rank_fusion(rankings)[:n_results]
+        rows: Dict[str, Any] = {}
+        merged = merge_results(dense, sum(len(ids) for ids in dense["ids"]))
+        merged_embeddings = merged.get("embeddings", [[None] * len(merged["ids"][0])])[
+            0
+        ]
+        for _id, doc, md, dist, emb in zip(
+            merged["ids"][0],
+            merged["documents"][0],
+            merged["metadatas"][0],
+            merged["distances"][0],
+            merged_embeddings,
+        ):
+            rows[_id] = (doc, md, dist, emb)
+        missing = [_id for _id in fused if _id not in rows]
+        if missing:
+            include = ["documents", "metadatas"] + (
+                ["embeddings"] if include_embeddings else []
+            )
+            data = self.collection.get(ids=missing, include=cast(Any, include))
+            found = list(data.get("ids") or [])
+            embeddings = data.get("embeddings") if include_embeddings else None
+            if embeddings is None:
+                embeddings = [None] * len(found)
+            for _id, doc, md, emb in zip(
+                found,
+                data.get("documents") or [],
+                data.get("metadatas") or [],
+                embeddings,
+            ):
+                rows[_id] = (doc, md, None, emb)
+        fused = [_id for _id in fused if _id in rows]
+        result = {
+            "ids": [fused],
+            "documents": [[rows[_id][0] for _id in fused]],
+            "metadatas": [[rows[_id][1] for _id in fused]],
+            "distances": [[rows[_id][2] for _id in fused]],
+        }
+        if include_embeddings:
+            result["embeddings"] = [[rows[_id][3] for _id in fused]]
+        return result
+
+    def _load_lexical(self, doc_ids: Sequence[str]) -> None:
+        """Read the chunk texts of papers the lexical index has not seen yet."""
+        assert self.lexical is not None
+        for doc_id in doc_ids:
+            if self.lexical.loaded(doc_id):
+                continue
+            data = self.collection.get(where={"doc_id": doc_id}, include=["documents"])
+            self.lexical.load(
+                doc_id, list(data.get("ids") or []), list(data.get("documents") or [])
+            )
+
+    def _distances(self, matrix: np.ndarray, query: np.ndarray) -> np.ndarray:
+        """
+        Distances as Chroma reports them for this collection's space: a row
+        per chunk for one query vector, or (queries x chunks) for a matrix.
+        """
+        space = (self.collection.metadata or {}).get("hnsw:space", "l2")
+        products = query @ matrix.T
+        if space == "cosine":
+            norms = np.outer(
+                np.linalg.norm(np.atleast_2d(query), axis=1),
+                np.linalg.norm(matrix, axis=1),
+            ).reshape(products.shape)
+            norms[norms == 0] = 1.0
+            return 1.0 - products / norms
+        if space == "ip":
+            return 1.0 - products
+        query_sq = (np.atleast_2d(query) ** 2).sum(axis=1)[:, None]
+        squared = (
+            query_sq + (matrix**2).sum(axis=1)[None, :] - 2 * np.atleast_2d(products)
+        )
+        return np.maximum(squared, 0.0).reshape(products.shape)
+
+    def _sync_sidecar(self) -> None:
+        """Rebuild the sidecar from Chroma once per process if it drifted."""
+        sidecar = self.sidecar
+        if sidecar is None or sidecar.verified:
+            return
+        if sidecar.count() != self.collection.count():
+            logger.info(f"Rebuilding {sidecar.dtype} sidecar of {self.collection_name}")
+            sidecar.clear(save=False)
+            for page in self.iter_embeddings():
+                sidecar.upsert(
+                    page["ids"],
+                    [str((md or {}).get("doc_id", "")) for md in page["metadatas"]],
+                    page["embeddings"],
+                    save=False,
+                )
+            sidecar.save()
+        sidecar.verified = True
+
+    def iter_embeddings(self, page_size: int = 1000) -> Iterator[Dict[str, Any]]:
+        """Page through every stored entry with its embedding."""
+        offset = 0
+        while True:
+            data = self.collection.get(
+                include=["embeddings", "documents", "metadatas"],
+                limit=page_size,
+                offset=offset,
+            )
+            ids = list(data.get("ids") or [])
+            if not ids:
+                return
+            yield {
+                "ids": ids,
+                "embeddings": [list(e) for e in data["embeddings"]],
+                "documents": list(data.get("documents") or []),
+                "metadatas": list(data.get("metadatas") or []),
+            }
+            offset += len(ids)
+
+    def upsert_changed(
+        self,
+        documents: Sequence[Document],
+        ids: Sequence[str],
+        embed: Callable[[List[str]], List[List[float]]],
+        stale_where: Optional[Dict[str, Any]] = None,
+        hashes: Optional[Sequence[str]] = None,
+    ) -> Dict[str, int]:
+        """
+        Idempotently write documents under deterministic ``ids``.
+
+        Only documents whose text changed since the last write are embedded.
+        Unchanged ones just get their metadata refreshed, and with
+        ``stale_where`` any previously stored ids matching it that are no
+        longer produced (e.g. a paper that now yields fewer chunks) are
+        deleted.
+        """
+        plan = self.plan_upsert(documents, ids, hashes)
+        changed = plan["changed"]
+        embeddings = (
+            embed([documents[i].page_content for i in changed]) if changed else []
+        )
+        return self.apply_upsert(documents, ids, plan, embeddings, stale_where)
+
+    def plan_upsert(
+        self,
+        documents: Sequence[Document],
+        ids: Sequence[str],
+        hashes: Optional[Sequence[str]] = None,
+    ) -> Dict[str, List[int]]:
+        """
+        Split documents into changed (needs embedding) and metadata-only.
+
+        ``hashes`` overrides the text hash when the embedded content is not
+        the document text (e.g. figure pixels).
+        """
+        for i, doc in enumerate(documents):
+            doc.metadata["content_hash"] = (
+                hashes[i] if hashes is not None else content_hash(doc.page_content)
+            )
+        existing = (
+            self.collection.get(ids=list(ids), include=["metadatas"]) if ids else {}
+        )
+        known = {
+            _id: md or {}
+            for _id, md in zip(
+                existing.get("ids") or [], existing.get("metadatas") or []
+            )
+        }
+
+        changed: List[int] = []
+        refresh: List[int] = []
+        for i, (doc, _id) in enumerate(zip(documents, ids)):
+            old = known.get(_id)
+            if old is None or old.get("content_hash") != doc.metadata["content_hash"]:
+                changed.append(i)
+            elif old != doc.metadata:
+                refresh.append(i)
+        return {"changed": changed, "refresh": refresh}
+
+    def apply_upsert(
+        self,
+        documents: Sequence[Document],
+        ids: Sequence[str],
+        plan: Dict[str, List[int]],
+        embeddings: Sequence[Sequence[float]],
+        stale_where: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, int]:
+        changed, refresh = plan["changed"], plan["refresh"]
+        if changed:
+            self.add_documents(
+                [documents[i] for i in changed], embeddings, [ids[i] for i in changed]
+            )
+        if refresh:
+            self.collection.update(
+                ids=[ids[i] for i in refresh],
+                metadatas=cast(Any, [documents[i].metadata for i in refresh]),
+            )
+            owners = [str(documents[i].metadata.get("doc_id", "")) for i in refresh]
+            vector_cache.invalidate(self.cache_key, owners)
+            retrieval_cache.invalidate(owners)
+
+        deleted = 0
+        if stale_where is not None:
+            keep = set(ids)
+            stale = [_id for _id in self.ids_where(stale_where) if _id not in keep]
+            if stale:
+                self.delete(stale)
+            deleted = len(stale)
+
+        return {
+            "written": len(changed),
+            "updated": len(refresh),
+            "skipped": len(ids) - len(changed) - len(refresh),
+            "deleted": deleted,
+        }
+
+    def ids_where(
+        self, where: Dict[str, Any], limit: Optional[int] = None
+    ) -> List[str]:
+        """Return the ids of all (or the first ``limit``) entries matching a filter."""
+        data = self.collection.get(where=cast(Any, where), include=[], limit=limit)
+        return list(data.get("ids") or [])
+
+    def delete_where(
+        self,
+        where: Dict[str, Any],
+        include: Sequence[str] = (),
+        on_batch: Optional[Callable[[Dict[str, Any]], None]] = None,
+        batch_size: Optional[int] = None,
+    ) -> int:
+        """
+        Delete every entry matching a metadata filter, at most
+        ``batch_size`` at a time so memory stays bounded however large the
+        match. ``on_batch`` sees each batch (with the ``include`` fields)
+        before it is deleted. Returns the number of entries deleted.
+        """
+        batch_size = max(1, batch_size or settings.delete_batch_size)
+        deleted = 0
+        while True:
+            data = self.collection.get(
+                where=cast(Any, where),
+                include=cast(Any, list(include)),
+                limit=batch_size,
+            )
+            ids = list(data.get("ids") or [])
+            if not ids:
+                return deleted
+            if on_batch is not None:
+                on_batch(cast(Dict[str, Any], data))
+            self.delete(ids)
+            deleted += len(ids)
+
     def delete(self, ids: Iterable[str]):
         """
         Delete entries from the Chroma collection using their IDs.
         """
-        self.vectorstore._collection.delete(ids=list(ids))
+        ids = list(ids)
+        self.vectorstore._collection.delete(ids=ids)
+        vector_cache.invalidate_ids(self.cache_key, ids)
+        # Entry ids are "{doc_id}::..." (or the bare doc_id for legacy entries)
+        retrieval_cache.invalidate({_id.split("::", 1)[0] for _id in ids})
+        if self.sidecar is not None:
+            self.sidecar.remove(ids)
+        if self.lexical is not None:
+            self.lexical.remove(ids)
+
+
+class ChromaPool:
+    """
+    Application-scoped pool of ChromaService handles.
+
+    Handles are opened once (in the FastAPI lifespan) and lent out per
+    request, so a request only pays for its query. The pool size bounds how
+    many requests use the persistent store concurrently.
+    """
+
+    def __init__(self, size: Optional[int] = None):
+        self.size = max(1, size or settings.chroma_pool_size)
+        self._handles: "queue.Queue[ChromaService]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._opened = False
+
+    def open(self, embedding_fn=None) -> None:
+        with self._lock:
+            if self._opened:
+                return
+            for _ in range(self.size):
+                self._handles.put(ChromaService(embedding_fn=embedding_fn))
+            self._opened = True
+        logger.info(f"Opened Chroma pool with {self.size} handles")
+
+    def close(self) -> None:
+        with self._lock:
+            while True:
+                try:
+                    self._handles.get_nowait()
+                except queue.Empty:
+                    break
+            self._opened = False
+        try:
+            from chromadb.api.shared_system_client import SharedSystemClient
+
+            SharedSystemClient.clear_system_cache()
+        except Exception as e:
+            logger.warning(f"Failed to release Chroma clients: {e}")
+
+    @property
+    def is_open(self) -> bool:
+        return self._opened
+
+    @contextmanager
+    def acquire(self, timeout: Optional[float] = None) -> Iterator[ChromaService]:
+        """Borrow a handle, opening the pool lazily if the lifespan did not."""
+        if not self._opened:
+            self.open()
+        handle = self._handles.get(
+            timeout=timeout if timeout is not None else settings.chroma_pool_timeout
+        )
+        try:
+            yield handle
+        finally:
+            self._handles.put(handle)
+
+
+chroma_pool = ChromaPool()
+
+
+@contextmanager
+def borrow_chroma(chroma: Optional[ChromaService] = None) -> Iterator[ChromaService]:
+    """Use ``chroma`` if the caller already holds one, else borrow from the pool."""
+    if chroma is not None:
+        yield chroma
+        return
+    with chroma_pool.acquire() as pooled:
+        yield pooled
+
+
+def get_chroma() -> Iterator[ChromaService]:
+    """FastAPI dependency lending a pooled ChromaService for one request."""
+    with chroma_pool.acquire() as chroma:
+        yield chroma
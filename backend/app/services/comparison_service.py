@@ -9,6 +9,7 @@ from typing import Any, Dict, List, Optional, Tuple
 from fastapi import HTTPException
 
 from app.services.chroma_service import ChromaService
+from app.services.image_store import image_url
 from app.services.gemini_service import GeminiService
 from app.services.section_utils import (
     SECTION_KEYWORDS,
@@ -130,8 +131,8 @@ class ComparisonService:
         return grouped
 
     def _fetch_images(self, doc_id: str) -> List[Dict[str, Any]]:
-        result = self.chroma.collection.get(
-            where={"$and": [{"doc_id": {"$eq": doc_id}}, {"type": {"$eq": "image"}}]},
+        result = self.chroma.images.collection.get(
+            where={"doc_id": {"$eq": doc_id}},
             include=["metadatas"],
         )
         metadatas = result.get("metadatas") or []
@@ -235,7 +236,7 @@ class ComparisonService:
         section_names = list(section_tokens.keys())
 
         for image in all_images:
-            if not image.get("image_b64"):
+            if not image.get("image_hash"):
                 continue
             target_section = self._determine_section_for_image(
                 image, section_tokens, section_pages, section_names, page_to_sections
@@ -248,7 +249,8 @@ class ComparisonService:
                     "page": image.get("page"),
                     "caption": self._truncate_caption(image.get("caption")),
                     "picture_number": image.get("picture_number"),
-                    "image_b64": image.get("image_b64"),
+                    "image_hash": image.get("image_hash"),
+                    "image_url": image_url(image["image_hash"]),
                 }
             )
 
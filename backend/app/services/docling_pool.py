@@ -0,0 +1,154 @@
+"""Process pool running Docling PDF conversion outside the API process."""
+
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Optional, Tuple
+
+from docling.datamodel.base_models import InputFormat
+from docling.datamodel.pipeline_options import PdfPipelineOptions
+from docling_core.types.doc import DoclingDocument
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class DoclingWorkerError(RuntimeError):
+    """A conversion worker died (e.g. out of memory) while converting a PDF."""
+
+
+# Worker side. These run in the child processes, which import this module
+# fresh under the spawn start method.
+
+
+def _init_worker(options_json: str) -> None:
+    from app.services.docling_service import get_converter
+
+    # Load the layout/table models once per worker instead of per PDF
+    converter = get_converter(PdfPipelineOptions.model_validate_json(options_json))
+    converter.initialize_pipeline(InputFormat.PDF)
+
+
+def _convert_in_worker(
+    path: str, options_json: str, page_range: Optional[Tuple[int, int]] = None
+) -> Dict[str, Any]:
+    from app.services.docling_service import get_converter
+
+    converter = get_converter(PdfPipelineOptions.model_validate_json(options_json))
+    kwargs = {"page_range": page_range} if page_range else {}
+    return converter.convert(path, **kwargs).document.export_to_dict()
+
+
+# API side
+
+
+class DoclingProcessPool:
+    """
+    Converts PDFs by path in ``workers`` spawned processes, each loading the
+    Docling models once.
+
+    Workers are recycled after ``max_tasks_per_child`` conversions to cap
+    memory growth. If a worker crashes the pool is rebuilt on the next
+    submit, and the caller whose PDF was in flight gets a
+    ``DoclingWorkerError``. The executor is created lazily, so importing the
+    app (or running tests) never spawns processes.
+    """
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        max_tasks_per_child: Optional[int] = None,
+    ):
+        self.workers = workers if workers is not None else settings.docling_workers
+        self.max_tasks_per_child = (
+            max_tasks_per_child
+            if max_tasks_per_child is not None
+            else settings.docling_max_tasks_per_child
+        )
+        self._lock = threading.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.workers > 0
+
+    def submit(
+        self,
+        path: str,
+        pipeline_options: PdfPipelineOptions,
+        page_range: Optional[Tuple[int, int]] = None,
+    ) -> Future:
+        """
+        Queue ``path`` (optionally only the 1-based inclusive ``page_range``)
+        for conversion; the future yields a DoclingDocument.
+        """
+        options_json = pipeline_options.model_dump_json()
+        executor = self._get_executor(options_json)
+        try:
+            raw = executor.submit(_convert_in_worker, path, options_json, page_range)
+        except BrokenProcessPool:
+            executor = self._reset(executor, options_json)
+            raw = executor.submit(_convert_in_worker, path, options_json, page_range)
+
+        result: Future = Future()
+
+        def _done(f: Future) -> None:
+            try:
+                result.set_result(DoclingDocument.model_validate(f.result()))
+            except BrokenProcessPool as e:
+                self._reset(executor, options_json)
+                result.set_exception(
+                    DoclingWorkerError(f"Docling worker crashed converting {path}: {e}")
+                )
+            except Exception as e:
+                result.set_exception(e)
+
+        raw.add_done_callback(_done)
+        return result
+
+    def convert(
+        self,
+        path: str,
+        pipeline_options: PdfPipelineOptions,
+        page_range: Optional[Tuple[int, int]] = None,
+    ) -> DoclingDocument:
+        return self.submit(path, pipeline_options, page_range).result()
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _get_executor(self, options_json: str) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = self._create(options_json)
+            return self._executor
+
+    def _reset(
+        self, broken: ProcessPoolExecutor, options_json: str
+    ) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is broken or self._executor is None:
+                logger.warning("Docling process pool broke; starting new workers")
+                broken.shutdown(wait=False, cancel_futures=True)
+                self._executor = self._create(options_json)
+            return self._executor
+
+    def _create(self, options_json: str) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(options_json,),
+            max_tasks_per_child=self.max_tasks_per_child or None,
+        )
+
+
+docling_pool = DoclingProcessPool()
@@ -1,20 +1,27 @@
 from __future__ import annotations
 
-import base64
-import os, io
+import os
 import tempfile
-from uuid import uuid4
-from dataclasses import dataclass, asdict
-from typing import List, Dict, Any, Optional
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Iterator, List, Dict, Any, Optional, Tuple
 
 
+import pypdfium2 as pdfium
 from docling.document_converter import DocumentConverter, PdfFormatOption
 from docling.datamodel.base_models import InputFormat
 from docling.datamodel.pipeline_options import PdfPipelineOptions
 from docling_core.transforms.chunker.hybrid_chunker import HybridChunker
+from docling_core.types.doc import DoclingDocument
 from docling_core.transforms.chunker.tokenizer.huggingface import HuggingFaceTokenizer
 from transformers import AutoTokenizer
 
+from app.core.config import settings
+from app.services.docling_pool import docling_pool
+from app.services.image_store import encode_png
+from app.services.pdf_cache import pdf_cache, sha256_bytes, sha256_file
+
 
 @dataclass
 class ImageAsset:
@@ -38,38 +45,125 @@ class DoclingMetadata:
     images: List[ImageAsset] | None = None
 
 
+@dataclass
+class DocumentWindow:
+    """Pages ``start``..``end`` (1-based, inclusive) of a longer PDF."""
+
+    start: int
+    end: int
+    total_pages: int
+    document: DoclingDocument
+
+
+def pdf_page_count(path: str) -> int:
+    pdf = pdfium.PdfDocument(path)
+    try:
+        return len(pdf)
+    finally:
+        pdf.close()
+
+
+# Converters, tokenizers and chunkers load ML models when built, so they are
+# cached for the whole process and shared by every DoclingService.
+_cache_lock = threading.RLock()  # get_docling_service -> get_converter nests
+_converters: Dict[str, DocumentConverter] = {}
+_chunkers: Dict[str, HybridChunker] = {}
+_tokenizers: Dict[str, Any] = {}
+_default_service: Optional["DoclingService"] = None
+
+
+def default_pipeline_options() -> PdfPipelineOptions:
+    pipeline_options = PdfPipelineOptions()
+    pipeline_options.do_ocr = False
+    pipeline_options.do_table_structure = True
+    pipeline_options.generate_picture_images = True
+    pipeline_options.images_scale = 2.0
+    return pipeline_options
+
+
+def get_converter(
+    pipeline_options: Optional[PdfPipelineOptions] = None,
+) -> DocumentConverter:
+    """Return the shared DocumentConverter for these pipeline options."""
+    options = pipeline_options or default_pipeline_options()
+    key = options.model_dump_json()
+    converter = _converters.get(key)
+    if converter is not None:
+        return converter
+    with _cache_lock:
+        converter = _converters.get(key)
+        if converter is None:
+            converter = DocumentConverter(
+                format_options={
+                    InputFormat.PDF: PdfFormatOption(pipeline_options=options)
+                }
+            )
+            _converters[key] = converter
+    return converter
+
+
+def get_tokenizer(tokenizer_model: Optional[str] = None) -> Any:
+    """Return the shared Hugging Face tokenizer for ``tokenizer_model``."""
+    name = tokenizer_model or settings.chunk_tokenizer_model
+    tokenizer = _tokenizers.get(name)
+    if tokenizer is not None:
+        return tokenizer
+    with _cache_lock:
+        tokenizer = _tokenizers.get(name)
+        if tokenizer is None:
+            tokenizer = AutoTokenizer.from_pretrained(name)
+            _tokenizers[name] = tokenizer
+    return tokenizer
+
+
+def get_chunker(tokenizer_model: Optional[str] = None) -> HybridChunker:
+    """Return the shared HybridChunker built on ``tokenizer_model``'s tokenizer."""
+    name = tokenizer_model or settings.chunk_tokenizer_model
+    chunker = _chunkers.get(name)
+    if chunker is not None:
+        return chunker
+    with _cache_lock:
+        chunker = _chunkers.get(name)
+        if chunker is None:
+            tokenizer = HuggingFaceTokenizer(tokenizer=get_tokenizer(name))
+            chunker = HybridChunker(tokenizer=tokenizer)
+            _chunkers[name] = chunker
+    return chunker
+
+
+def get_docling_service() -> "DoclingService":
+    """Return the process-wide DoclingService using the default pipeline."""
+    global _default_service
+    if _default_service is None:
+        with _cache_lock:
+            if _default_service is None:
+                _default_service = DoclingService()
+    return _default_service
+
+
 class DoclingService:
     """
     Service wrapper around Docling to convert documents and derive metadata.
 
     Usage:
-        svc = DoclingService()
+        svc = get_docling_service()  # or DoclingService(pipeline_options)
         meta = svc.extract_from_bytes(pdf_bytes)
         # or
         meta = svc.extract_from_url(url)
     """
 
-    def __init__(self) -> None:
-        pipeline_options = PdfPipelineOptions()
-        pipeline_options.do_ocr = False
-        pipeline_options.do_table_structure = True
-        pipeline_options.generate_picture_images = True
-        pipeline_options.images_scale = 2.0
-        self._converter = DocumentConverter(
-            format_options={
-                InputFormat.PDF: PdfFormatOption(pipeline_options=pipeline_options)
-            }
-        )
+    def __init__(self, pipeline_options: Optional[PdfPipelineOptions] = None) -> None:
+        options = pipeline_options or default_pipeline_options()
+        self._options = options
+        self._converter = get_converter(options)
+        self._options_key = sha256_bytes(options.model_dump_json().encode("utf-8"))[:16]
 
     def extract_chunks(self, doc) -> List[Dict[str, Any]]:
         """
         Extract text chunks + Docling structural metadata using HybridChunker.
         Normalizes bbox coordinates to 0-1 range.
         """
-        tokenizer = HuggingFaceTokenizer(
-            tokenizer=AutoTokenizer.from_pretrained("nomic-ai/nomic-embed-text-v1.5"),
-        )
-        chunker = HybridChunker(tokenizer=tokenizer)
+        chunker = get_chunker()
         results = []
 
         for chunk in chunker.chunk(doc):
@@ -141,20 +235,19 @@ class DoclingService:
 
     def extract_images(self, doc: Any) -> Dict[str, Any]:
         """
-        Extract images from a Docling document and include
-        the actual image data inside metadata as base64.
+        Extract images from a Docling document as PNG bytes (``pngs``) with
+        metadata carrying only the image hash and dimensions. Nothing is
+        written here; ingestion stores the PNGs in the image store.
         Normalizes bbox coordinates to 0-1 range relative to page dimensions.
         """
 
-        uris: List[str] = []
+        pngs: List[bytes] = []
         metadatas: List[dict] = []
         ids: List[str] = []
 
         pictures = getattr(doc, "pictures", None)
         if not pictures:
-            return {"uris": uris, "metadatas": metadatas, "ids": ids, "tmp_dir": None}
-
-        tmp_dir = tempfile.mkdtemp(prefix="doc_images_")
+            return {"pngs": pngs, "metadatas": metadatas, "ids": ids, "tmp_dir": None}
 
         page_sizes = {}
 
@@ -168,16 +261,8 @@ class DoclingService:
             if img is None:
                 continue
 
-            img_id = str(uuid4())
-            img_path = os.path.join(tmp_dir, f"{img_id}.png")
-
-            # Save PNG file for compatibility with LangChain API behavior
-            img.save(img_path, format="PNG")
-
-            # Convert image to PNG bytes → base64 string
-            buf = io.BytesIO()
-            img.save(buf, format="PNG")
-            b64_data = base64.b64encode(buf.getvalue()).decode("utf-8")
+            png = encode_png(img)
+            image_hash = sha256_bytes(png)
 
             bbox = getattr(prov[0], "bbox", None)
 
@@ -212,21 +297,100 @@ class DoclingService:
                 "bbox_top": bbox_top,
                 "bbox_right": bbox_right,
                 "bbox_bottom": bbox_bottom,
-                "image_b64": b64_data,
+                "image_hash": image_hash,
+                "width": img.width,
+                "height": img.height,
             }
 
-            uris.append(img_path)
+            pngs.append(png)
             metadatas.append(metadata)
-            ids.append(img_id)
+            ids.append(image_hash)
 
         return {
-            "uris": uris,
+            "pngs": pngs,
             "metadatas": metadatas,
             "ids": ids,
-            "tmp_dir": tmp_dir,
+            "tmp_dir": None,
         }
 
-    def extract_from_bytes(self, pdf_bytes: bytes) -> dict[str, Any]:
+    def convert_document(self, pdf_bytes: bytes) -> DoclingDocument:
+        """
+        Convert a PDF to a DoclingDocument, reusing the on-disk cache when
+        the same bytes were already converted with these pipeline options.
+        """
+        sha = sha256_bytes(pdf_bytes)
+        return self._cached_convert(sha, lambda: self._convert(pdf_bytes))
+
+    def convert_document_path(
+        self, path: str, sha: Optional[str] = None
+    ) -> DoclingDocument:
+        """Like ``convert_document`` for a PDF already on disk, without reading it into memory."""
+        sha = sha or sha256_file(path)
+        return self._cached_convert(sha, lambda: self._convert_path(path))
+
+    def iter_document_windows(
+        self,
+        path: str,
+        sha: Optional[str] = None,
+        window_pages: Optional[int] = None,
+    ) -> Iterator[DocumentWindow]:
+        """
+        Convert a PDF ``window_pages`` pages at a time, yielding each window
+        as soon as it is converted.
+
+        The next window converts in the background while the caller
+        processes the current one, so at most two windows are in memory.
+        Windows are cached individually, like whole documents.
+        """
+        sha = sha or sha256_file(path)
+        total = pdf_page_count(path)
+        size = max(1, window_pages or settings.docling_window_pages or total)
+        ranges = [
+            (start, min(start + size - 1, total)) for start in range(1, total + 1, size)
+        ]
+        if not ranges:
+            return
+
+        with ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="docling-window"
+        ) as prefetch:
+            future = prefetch.submit(self._convert_window, path, sha, ranges[0])
+            for i, (start, end) in enumerate(ranges):
+                doc = future.result()
+                if i + 1 < len(ranges):
+                    future = prefetch.submit(
+                        self._convert_window, path, sha, ranges[i + 1]
+                    )
+                yield DocumentWindow(
+                    start=start, end=end, total_pages=total, document=doc
+                )
+
+    def _convert_window(
+        self, path: str, sha: str, page_range: Tuple[int, int]
+    ) -> DoclingDocument:
+        start, end = page_range
+        return self._cached_convert(
+            sha,
+            lambda: self._convert_path(path, page_range),
+            key=f"{self._options_key}-p{start}-{end}",
+        )
+
+    def _cached_convert(
+        self,
+        sha: str,
+        convert: Callable[[], DoclingDocument],
+        key: Optional[str] = None,
+    ) -> DoclingDocument:
+        key = key or self._options_key
+        doc = pdf_cache.get_document(sha, key, DoclingDocument.load_from_json)
+        if doc is not None:
+            return doc
+
+        doc = convert()
+        pdf_cache.put_document(sha, key, doc.save_as_json)
+        return doc
+
+    def _convert(self, pdf_bytes: bytes) -> DoclingDocument:
         # Docling accepts file paths or URLs. On Windows, libraries cannot
         # reopen a NamedTemporaryFile while it's still open. Use a temp
         # directory so the file is closed before conversion.
@@ -235,15 +399,22 @@ class DoclingService:
             with open(tmp_path, "wb") as f:
                 f.write(pdf_bytes)
 
-            result = self._converter.convert(tmp_path)
+            return self._convert_path(tmp_path)
 
-            return self._extract_metadata(result)
+    def _convert_path(
+        self, path: str, page_range: Optional[Tuple[int, int]] = None
+    ) -> DoclingDocument:
+        # Conversion is CPU-bound and holds the GIL, so by default it runs in
+        # the Docling worker processes rather than in the API process.
+        if docling_pool.enabled:
+            return docling_pool.convert(path, self._options, page_range)
+        kwargs = {"page_range": page_range} if page_range else {}
+        return self._converter.convert(path, **kwargs).document
 
-    def _extract_metadata(
-        self,
-        convert_result: Any,
-    ) -> dict[str, Any]:
-        doc = convert_result.document
+    def extract_from_bytes(self, pdf_bytes: bytes) -> dict[str, Any]:
+        return self.extract_from_document(self.convert_document(pdf_bytes))
+
+    def extract_from_document(self, doc: Any) -> dict[str, Any]:
         images = self.extract_images(doc)
         chunks = self.extract_chunks(doc)
 
@@ -251,3 +422,9 @@ class DoclingService:
             "images": images,
             "chunks": chunks,
         }
+
+    def _extract_metadata(
+        self,
+        convert_result: Any,
+    ) -> dict[str, Any]:
+        return self.extract_from_document(convert_result.document)
@@ -0,0 +1,171 @@
+"""Persistent SQLite cache of text embeddings keyed by model and text hash."""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from typing import Any, Dict, List, Optional, Sequence
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def text_key(task: str, text: str) -> str:
+    """Cache key of ``text`` embedded for ``task`` (search_document, ...)."""
+    return hashlib.sha256(f"{task}\n{text}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Stores float32 vectors in SQLite under (model, dimension, text hash).
+
+    The dimension is part of the key so Matryoshka-truncated vectors never
+    mix with full-size ones (0 means the model's native size). Entries are
+    evicted least-recently-used once there are more than ``max_entries``.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        max_entries: Optional[int] = None,
+        enabled: Optional[bool] = None,
+    ):
+        self.path = path or settings.embedding_cache_path
+        self.max_entries = (
+            max_entries
+            if max_entries is not None
+            else settings.embedding_cache_max_entries
+        )
+        self.enabled = settings.embedding_cache_enabled if enabled is None else enabled
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._stats: Dict[str, int] = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def get_many(
+        self, model: str, dim: int, keys: Sequence[str]
+    ) -> Dict[str, List[float]]:
+        """Return the cached vectors for whichever of ``keys`` are present."""
+        if not self.enabled or not keys:
+            return {}
+        found: Dict[str, List[float]] = {}
+        with self._lock:
+            conn = self._connect()
+            unique = list(dict.fromkeys(keys))
+            # Stay under SQLite's bound-parameter limit
+            for start in range(0, len(unique), 500):
+                part = unique[start : start + 500]
+                marks = ",".join("?" * len(part))
+                rows = conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE model = ? AND dim = ? "
+                    f"AND key IN ({marks})",
+                    [model, dim, *part],
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = array("f", blob).tolist()
+            if found:
+                now = time.time()
+                conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE model = ? AND dim = ? AND key = ?",
+                    [(now, model, dim, key) for key in found],
+                )
+                conn.commit()
+            self._stats["hits"] += sum(1 for key in keys if key in found)
+            self._stats["misses"] += sum(1 for key in keys if key not in found)
+        return found
+
+    def put_many(
+        self,
+        model: str,
+        dim: int,
+        keys: Sequence[str],
+        vectors: Sequence[Sequence[float]],
+    ) -> None:
+        if not self.enabled or not keys:
+            return
+        now = time.time()
+        rows = [
+            (model, dim, key, array("f", vector).tobytes(), now)
+            for key, vector in zip(keys, vectors)
+        ]
+        with self._lock:
+            conn = self._connect()
+            conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, dim, key, vector, last_used) "
+                "VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            conn.commit()
+            self._evict(conn)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats: Dict[str, Any] = dict(self._stats)
+            entries = 0
+            if self.enabled and os.path.exists(self.path):
+                entries = (
+                    self._connect()
+                    .execute("SELECT COUNT(*) FROM embeddings")
+                    .fetchone()[0]
+                )
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        stats["entries"] = entries
+        stats["max_entries"] = self.max_entries
+        stats["size_bytes"] = (
+            os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        )
+        return stats
+
+    def clear(self) -> None:
+        with self._lock:
+            if self.enabled and os.path.exists(self.path):
+                conn = self._connect()
+                conn.execute("DELETE FROM embeddings")
+                conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                " model TEXT NOT NULL, dim INTEGER NOT NULL, key TEXT NOT NULL,"
+                " vector BLOB NOT NULL, last_used REAL NOT NULL,"
+                " PRIMARY KEY (model, dim, key))"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)"
+            )
+            self._conn = conn
+        return self._conn
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        count = conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        excess = count - self.max_entries
+        if excess <= 0:
+            return
+        # Trim an extra 10% so eviction does not run on every write
+        excess += self.max_entries // 10
+        cur = conn.execute(
+            "DELETE FROM embeddings WHERE rowid IN ("
+            " SELECT rowid FROM embeddings ORDER BY last_used LIMIT ?)",
+            (excess,),
+        )
+        conn.commit()
+        self._stats["evictions"] += cur.rowcount
+
+
+embedding_cache = EmbeddingCache()
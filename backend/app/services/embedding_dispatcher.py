@@ -0,0 +1,135 @@
+"""Micro-batching dispatcher that coalesces concurrent embedding calls."""
+
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# (task, text, future); task is "search_query" or "search_document"
+_Item = Tuple[str, str, "Future[List[float]]"]
+RunBatch = Callable[[str, List[str]], List[List[float]]]
+
+
+class EmbeddingDispatcher:
+    """
+    Collects embedding requests from concurrent callers for up to
+    ``max_wait_ms`` (or until ``max_batch`` texts are waiting) and runs them
+    as one model call per task type, resolving each caller's future with its
+    own vector.
+
+    A single worker thread owns the model calls, so callers on request
+    threads and tool executor threads all share batches. Identical texts in a batch are embedded once.
+    """
+
+    def __init__(
+        self,
+        run_batch: RunBatch,
+        max_batch: Optional[int] = None,
+        max_wait_ms: Optional[float] = None,
+    ):
+        self.run_batch = run_batch
+        self.max_batch = max(1, max_batch or settings.embed_dispatch_max_batch)
+        self.max_wait = (
+            max_wait_ms
+            if max_wait_ms is not None
+            else settings.embed_dispatch_max_wait_ms
+        ) / 1000.0
+        self._queue: "queue.Queue[Optional[_Item]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stats: Dict[str, int] = {"requests": 0, "batches": 0, "texts": 0}
+
+    def submit(self, task: str, text: str) -> "Future[List[float]]":
+        future: "Future[List[float]]" = Future()
+        self._ensure_worker()
+        self._queue.put((task, text, future))
+        return future
+
+    def embed(self, task: str, texts: List[str]) -> List[List[float]]:
+        """Embed ``texts`` as part of whatever batch is being collected."""
+        futures = [self.submit(task, text) for text in texts]
+        return [f.result() for f in futures]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats: Dict[str, Any] = dict(self._stats)
+        stats["mean_batch"] = (
+            stats["texts"] / stats["batches"] if stats["batches"] else 0.0
+        )
+        stats["max_batch"] = self.max_batch
+        stats["max_wait_ms"] = self.max_wait * 1000.0
+        return stats
+
+    def shutdown(self) -> None:
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join(timeout=5)
+
+    def _ensure_worker(self) -> None:
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._work, name="embed-dispatch", daemon=True
+                )
+                self._thread.start()
+
+    def _work(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch = [first]
+            deadline = time.monotonic() + self.max_wait
+            stop = False
+            while len(batch) < self.max_batch:
+                timeout = deadline - time.monotonic()
+                try:
+                    # Past the deadline, still take whatever is already queued
+                    item = (
+                        self._queue.get(timeout=timeout)
+                        if timeout > 0
+                        else self._queue.get_nowait()
+                    )
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+            self._run(batch)
+            if stop:
+                return
+
+    def _run(self, batch: List[_Item]) -> None:
+        by_task: Dict[str, List[_Item]] = {}
+        for item in batch:
+            by_task.setdefault(item[0], []).append(item)
+        for task, items in by_task.items():
+            texts = list(dict.fromkeys(text for _, text, _ in items))
+            try:
+                vectors = dict(zip(texts, self.run_batch(task, texts)))
+            except Exception as e:
+                logger.warning(
+                    f"Embedding batch of {len(texts)} {task} texts failed: {e}"
+                )
+                for _, _, future in items:
+                    future.set_exception(e)
+                continue
+            for _, text, future in items:
+                future.set_result(vectors[text])
+            with self._lock:
+                self._stats["requests"] += len(items)
+                self._stats["batches"] += 1
+                self._stats["texts"] += len(texts)
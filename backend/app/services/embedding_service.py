@@ -1,21 +1,34 @@
 from __future__ import annotations
 
-from typing import List, Optional, Union, Dict, Any
-from dataclasses import dataclass, asdict
+from typing import Callable, List, Optional, Union, Dict, Any, Sequence
+from dataclasses import dataclass, asdict, field
 import base64
+import hashlib
 from io import BytesIO
 from PIL import Image
+import logging
 import shutil
+import threading
+import time
 import re
 
 from langchain_nomic import NomicEmbeddings
 from langchain_community.vectorstores.utils import filter_complex_metadata
 from langchain_core.documents import Document
 
-from app.services.docling_service import DoclingService
-from app.services.chroma_service import ChromaService
+from app.services.docling_service import get_docling_service, get_tokenizer, pdf_page_count
+from app.services.chroma_service import ChromaService, borrow_chroma
+from app.services.embedding_cache import EmbeddingCache, embedding_cache, text_key
+from app.services.embedding_dispatcher import EmbeddingDispatcher
+from app.services.image_store import image_store
+from app.services.ingestion_jobs import STAGES, StageReporter
+from app.services.library_catalog import library_catalog
+from app.services.onnx_embedder import OnnxNomicEmbeddings
+from app.services.ttl_cache import TtlLruCache
 from app.core.config import settings
 
+logger = logging.getLogger(__name__)
+
 # Metadata classes
 
 @dataclass
@@ -41,42 +54,242 @@ class RepoMetadata:
     filename: str
 
 
+# Token-aware batching
+
+_tokenizer_failed = False
+
+
+def count_tokens(texts: List[str]) -> List[int]:
+    """
+    Token counts from the chunking tokenizer (the Nomic text model's own),
+    or a four-characters-per-token estimate if it cannot be loaded.
+    """
+    global _tokenizer_failed
+    if not _tokenizer_failed:
+        try:
+            encoded = get_tokenizer()(texts, add_special_tokens=True, verbose=False)
+            return [len(ids) for ids in encoded["input_ids"]]
+        except Exception as e:
+            logger.warning(f"Tokenizer unavailable, estimating token counts: {e}")
+            _tokenizer_failed = True
+    return [max(1, len(text) // 4) for text in texts]
+
+
+def plan_token_batches(
+    lengths: List[int], max_tokens: int, max_texts: int
+) -> List[List[int]]:
+    """
+    Group text indices into batches, longest first, so that each batch's
+    padded size (number of texts x longest text) stays within ``max_tokens``
+    and no batch holds more than ``max_texts`` texts. A text longer than
+    ``max_tokens`` gets a batch of its own.
+    """
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i], reverse=True)
+    batches: List[List[int]] = []
+    current: List[int] = []
+    width = 0
+    for i in order:
+        if current and (
+            len(current) >= max_texts or (len(current) + 1) * width > max_tokens
+        ):
+            batches.append(current)
+            current = []
+        if not current:
+            width = max(1, lengths[i])  # longest first: the batch's padded length
+        current.append(i)
+    if current:
+        batches.append(current)
+    return batches
+
+
 # Embedding Service Wrapper
 class NomicEmbeddingService:
-    """Service for local Nomic embeddings with multimodal support."""
+    """Service for local Nomic embeddings with multimodal support.
+
+    Instances are expensive (the local models are loaded on first use), so
+    request handlers should obtain the shared one from ``embedder_registry``
+    instead of constructing their own.
+    """
 
-    def __init__(self):
+    def __init__(
+        self,
+        model: Optional[str] = None,
+        vision_model: Optional[str] = None,
+        cache: Optional[EmbeddingCache] = None,
+    ):
+        self.model = model or settings.embedding_model
+        self.vision_model = vision_model or settings.embedding_vision_model
         self.embedder = NomicEmbeddings(  # type: ignore[call-arg]
-            model="nomic-embed-text-v1.5",
+            model=self.model,
             inference_mode="local",
-            vision_model="nomic-embed-vision-v1.5",
+            vision_model=self.vision_model,
+        )
+        # Figures always go through NomicEmbeddings; text may use ONNX Runtime
+        self.backend = settings.embedding_backend
+        if self.backend == "onnx":
+            self.text_embedder: Any = OnnxNomicEmbeddings()
+            # Keep its vectors apart from gpt4all's in the embedding cache
+            suffix = "-int8" if self.text_embedder.quantized else ""
+            self.cache_model = f"{self.model}@onnx{suffix}"
+        elif self.backend == "nomic":
+            self.text_embedder = self.embedder
+            self.cache_model = self.model
+        else:
+            raise ValueError(f"Unknown EMBEDDING_BACKEND {self.backend!r} (expected nomic or onnx)")
+        self.cache = cache if cache is not None else embedding_cache
+        # The local inference backend is not safe for concurrent calls
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats: Dict[str, float] = {"texts": 0, "tokens": 0, "seconds": 0.0}
+        self._query_cache: TtlLruCache[List[float]] = TtlLruCache(
+            settings.query_embedding_cache_size, settings.query_embedding_cache_ttl
+        )
+        self.dispatcher: Optional[EmbeddingDispatcher] = (
+            EmbeddingDispatcher(self._embed_batch) if settings.embed_dispatch_enabled else None
         )
 
     def embed_texts(self, texts: List[str]) -> List[List[float]]:
-        return self.embedder.embed_documents(texts)
+        """
+        Embed documents, reusing cached vectors and running the model in
+        token-aware batches for the rest.
+
+        Texts are grouped longest-first so each model call pads to a similar
+        length, and a batch's padded size (texts x longest) stays under
+        ``settings.embed_batch_max_tokens``. The lock is taken per batch, so
+        queries can run between the batches of a large ingest.
+        """
+        if not texts:
+            return []
+        dim = self.text_embedder.dimensionality or 0
+        keys = [text_key("search_document", text) for text in texts]
+        cached = self.cache.get_many(self.cache_model, dim, keys)
+        vectors: List[List[float]] = [cached.get(key, []) for key in keys]
+        missing = [i for i, key in enumerate(keys) if key not in cached]
+        if not missing:
+            return vectors
+
+        lengths = count_tokens([texts[i] for i in missing])
+        start = time.perf_counter()
+        if self.dispatcher is not None and len(missing) <= self.dispatcher.max_batch:
+            # Small calls (e.g. README chunks) share a model call with others
+            embedded = self.dispatcher.embed("search_document", [texts[i] for i in missing])
+            for i, vector in zip(missing, embedded):
+                vectors[i] = vector
+            self.cache.put_many(self.cache_model, dim, [keys[i] for i in missing], embedded)
+            self._record_throughput(len(missing), sum(lengths), time.perf_counter() - start)
+            return vectors
+        for batch in plan_token_batches(
+            lengths, settings.embed_batch_max_tokens, settings.embed_batch_max_texts
+        ):
+            with self._lock:
+                embedded = self.text_embedder.embed_documents(
+                    [texts[missing[j]] for j in batch]
+                )
+            for j, vector in zip(batch, embedded):
+                vectors[missing[j]] = vector
+            self.cache.put_many(
+                self.cache_model, dim, [keys[missing[j]] for j in batch], embedded
+            )
+        self._record_throughput(len(missing), sum(lengths), time.perf_counter() - start)
+        return vectors
+
+    def throughput(self) -> Dict[str, float]:
+        """Totals over every ``embed_texts`` call so far."""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["tokens_per_sec"] = (
+            stats["tokens"] / stats["seconds"] if stats["seconds"] else 0.0
+        )
+        stats["query_cache"] = self._query_cache.stats()
+        stats["dispatch"] = self.dispatcher.stats() if self.dispatcher is not None else None
+        return stats
+
+    def _record_throughput(self, texts: int, tokens: int, seconds: float) -> None:
+        with self._stats_lock:
+            self._stats["texts"] += texts
+            self._stats["tokens"] += tokens
+            self._stats["seconds"] += seconds
+        rate = tokens / seconds if seconds else 0.0
+        logger.info(f"Embedded {texts} texts ({tokens} tokens) in {seconds:.2f}s, {rate:.0f} tokens/s")
 
     def embed_query(self, text: str) -> List[float]:
         """
         Embed a single text query.
         Queries should be prefixed with 'search_query:' for optimal retrieval.
+
+        Recent queries are served from an in-memory LRU, since the same
+        questions come up across chat turns and users.
         """
+        text = " ".join(text.split())
         # Add search_query prefix if not already present
-        normalized = text if text.strip().startswith("search_query:") else f"search_query: {text}"
-        return self.embedder.embed_query(normalized)
+        normalized = text if text.startswith("search_query:") else f"search_query: {text}"
+        vector = self._query_cache.get(normalized)
+        if vector is not None:
+            return vector
+        if self.dispatcher is not None:
+            vector = self.dispatcher.submit("search_query", normalized).result()
+        else:
+            vector = self._embed_batch("search_query", [normalized])[0]
+        self._query_cache.put(normalized, vector)
+        return vector
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """``embed_query`` for several queries; the uncached ones share a model call."""
+        normalized = []
+        for text in texts:
+            text = " ".join(text.split())
+            normalized.append(text if text.startswith("search_query:") else f"search_query: {text}")
+        vectors: Dict[str, List[float]] = {}
+        misses = []
+        for q in dict.fromkeys(normalized):
+            vector = self._query_cache.get(q)
+            if vector is None:
+                misses.append(q)
+            else:
+                vectors[q] = vector
+        if misses:
+            if self.dispatcher is not None:
+                fresh = self.dispatcher.embed("search_query", misses)
+            else:
+                fresh = self._embed_batch("search_query", misses)
+            for q, vector in zip(misses, fresh):
+                self._query_cache.put(q, vector)
+                vectors[q] = vector
+        return [vectors[q] for q in normalized]
+
+    def _embed_batch(self, task: str, texts: List[str]) -> List[List[float]]:
+        """One model call over ``texts``; also run by the dispatcher's worker."""
+        with self._lock:
+            if task == "search_document":
+                return self.text_embedder.embed_documents(texts)
+            if len(texts) == 1:
+                return [self.text_embedder.embed_query(texts[0])]
+            return self.text_embedder.embed(texts, task_type=task)
 
-    # (Vision embedding disabled for simplicity — can re-enable easily)
     def embed_images(
-        self, images: List[Union[Image.Image, bytes, str]]
+        self,
+        images: List[Union[Image.Image, bytes, str]],
+        batch_size: Optional[int] = None,
     ) -> List[List[float]]:
         """
         Embed images using nomic-embed-vision-v1.5.
 
         Args:
             images: List of PIL Images, raw bytes, or base64 strings
+            batch_size: Images per model call (settings.image_embed_batch_size)
 
         Returns:
             List of embedding vectors
         """
+        batch_size = max(1, batch_size or settings.image_embed_batch_size)
+        embeddings: List[List[float]] = []
+        for start in range(0, len(images), batch_size):
+            embeddings.extend(self._embed_image_batch(images[start : start + batch_size]))
+        return embeddings
+
+    def _embed_image_batch(
+        self, images: List[Union[Image.Image, bytes, str]]
+    ) -> List[List[float]]:
         # Convert all images to PIL Images for Nomic vision model
         # The nomic.embed.image() function accepts PIL Images and converts them internally
         pil_images = []
@@ -92,14 +305,101 @@ class NomicEmbeddingService:
             else:
                 raise ValueError(f"Unsupported image type: {type(img)}")
 
-        embeddings = self.embedder.embed_image(pil_images)
-        dim = len(embeddings[0]) if embeddings else 0
-        print(f"DEBUG: Nomic returned {len(embeddings)} image embeddings, dim={dim}")
-        if embeddings:
-            print(f"DEBUG: First 5 dims of first image embedding: {embeddings[0][:5]}")
+        with self._lock:
+            embeddings = self.embedder.embed_image(pil_images)
         return embeddings
 
 
+class EmbedderRegistry:
+    """Process-wide registry of loaded embedding services.
+
+    Each model is constructed once and shared by every request. ``warm_up``
+    is called from the FastAPI lifespan so the model weights are loaded
+    before the first chat or ingestion request needs them.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._embedders: Dict[str, NomicEmbeddingService] = {}
+        self._ready: Dict[str, bool] = {}
+        self._errors: Dict[str, str] = {}
+
+    def get(self, model: Optional[str] = None) -> NomicEmbeddingService:
+        """Return the shared embedding service for ``model``, creating it once."""
+        name = model or settings.embedding_model
+        embedder = self._embedders.get(name)
+        if embedder is not None:
+            return embedder
+        with self._lock:
+            embedder = self._embedders.get(name)
+            if embedder is None:
+                embedder = NomicEmbeddingService(model=name)
+                self._embedders[name] = embedder
+                self._ready.setdefault(name, False)
+        return embedder
+
+    def warm_up(self, model: Optional[str] = None) -> bool:
+        """
+        Force the model weights to load by embedding a throwaway query and,
+        when figures are indexed, a 1x1 image for the vision model.
+        """
+        name = model or settings.embedding_model
+        try:
+            service = self.get(name)
+            service.embed_query("warm up")
+        except Exception as e:
+            logger.error(f"Embedder warm-up failed for {name}: {e}")
+            self._errors[name] = str(e)
+            return False
+        if settings.index_images:
+            # Text search does not need the vision model, so a failure here
+            # is logged without holding back readiness
+            try:
+                service.embed_images([Image.new("RGB", (1, 1))])
+            except Exception as e:
+                logger.error(f"Vision embedder warm-up failed for {name}: {e}")
+        self._ready[name] = True
+        self._errors.pop(name, None)
+        logger.info(f"Embedder {name} loaded")
+        return True
+
+    def is_ready(self, model: Optional[str] = None) -> bool:
+        return self._ready.get(model or settings.embedding_model, False)
+
+    def status(self) -> Dict[str, Any]:
+        names = set(self._ready) | set(self._errors) | {settings.embedding_model}
+        status = {}
+        for name in sorted(names):
+            embedder = self._embedders.get(name)
+            status[name] = {
+                "ready": self._ready.get(name, False),
+                "error": self._errors.get(name),
+                "throughput": embedder.throughput() if embedder is not None else None,
+            }
+        return status
+
+    def shutdown(self) -> None:
+        """Stop the embedders' dispatcher threads (FastAPI lifespan exit)."""
+        with self._lock:
+            for embedder in self._embedders.values():
+                if embedder.dispatcher is not None:
+                    embedder.dispatcher.shutdown()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._embedders.clear()
+            self._ready.clear()
+            self._errors.clear()
+
+
+embedder_registry = EmbedderRegistry()
+
+
+def get_embedder() -> NomicEmbeddingService:
+    """FastAPI dependency returning the process-wide text/vision embedder."""
+    return embedder_registry.get()
+
+
 # Utility: extract GitHub URL from PDF text
 
 def extract_github_url(text: str) -> Optional[str]:
@@ -113,25 +413,65 @@ def extract_github_url(text: str) -> Optional[str]:
     return match.group(0) if match else None
 
 
-def ingest_pdf_bytes_into_chroma(pdf_bytes: bytes, extra_metadata: PdfMetadata):
-    """
-    Extract text & images using Docling, embed them using Nomic,
-    store into Chroma vector DB.
-    """
+# Deterministic Chroma ids, so re-ingesting a paper overwrites its entries
 
-    docling = DoclingService()
-    docs = docling.extract_from_bytes(pdf_bytes)
+def chunk_id(doc_id: str, n: int) -> str:
+    return f"{doc_id}::chunk::{n}"
 
+
+def image_id(doc_id: str, n: int) -> str:
+    return f"{doc_id}::image::{n}"
+
+
+def repo_chunk_id(doc_id: str, repo_url: str, path: str) -> str:
+    # Repos of one paper often share paths (README.md), so the id names the repo
+    repo = hashlib.sha256(repo_url.encode("utf-8")).hexdigest()[:12]
+    return f"{doc_id}::repo::{repo}::{path}"
+
+
+@dataclass
+class PreparedPdf:
+    """Chroma-ready documents built from one converted PDF."""
+
+    metadata: PdfMetadata
+    text_docs: List[Document]
+    text_ids: List[str]
+    image_metadatas: List[dict]
+    image_docs: List[Document] = field(default_factory=list)
+    image_ids: List[str] = field(default_factory=list)
+    image_hashes: List[str] = field(default_factory=list)
+    # Filled by embed_prepared_pdf: which entries changed, and their vectors
+    plan: Optional[Dict[str, List[int]]] = None
+    embeddings: Optional[List[List[float]]] = None
+    image_plan: Optional[Dict[str, List[int]]] = None
+    image_embeddings: Optional[List[List[float]]] = None
+    # SHA-256 of the source PDF, recorded in the library catalog
+    content_hash: Optional[str] = None
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "text_chunks": len(self.text_docs),
+            "image_chunks": len(self.image_metadatas),
+        }
+
+
+def prepare_pdf_documents(
+    docs: Dict[str, Any], extra_metadata: PdfMetadata, chunk_offset: int = 0
+) -> PreparedPdf:
+    """
+    Attach paper metadata to Docling's chunks and images.
+
+    Also records the first GitHub URL found in the text on ``extra_metadata``.
+    ``chunk_offset`` numbers the chunks of a later page window after those
+    of the windows before it.
+    """
     image_info = docs["images"]
     chunk_info = docs["chunks"]
 
-    embedder = NomicEmbeddingService()
-    chroma = ChromaService(embedding_fn=embedder.embedder)
-
     chroma_text_docs = []
     detected_repo_url = None
 
-    for chunk in chunk_info:
+    for n, chunk in enumerate(chunk_info, chunk_offset):
         text = chunk["text"]
 
         # Try detecting GitHub repo URL once
@@ -143,6 +483,7 @@ def ingest_pdf_bytes_into_chroma(pdf_bytes: bytes, extra_metadata: PdfMetadata):
             "doc_id": extra_metadata.doc_id,
             "title": extra_metadata.title,
             "type": "text",
+            "chunk_index": n,
         }
 
         chroma_text_docs.append(
@@ -156,9 +497,6 @@ def ingest_pdf_bytes_into_chroma(pdf_bytes: bytes, extra_metadata: PdfMetadata):
     if detected_repo_url:
         extra_metadata.github_url = detected_repo_url
 
-    # Store text chunks
-    chroma.vectorstore.add_documents(chroma_text_docs, embedding_fn=embedder.embedder)
-
     for meta in image_info["metadatas"]:
         meta.update(
             {
@@ -171,26 +509,330 @@ def ingest_pdf_bytes_into_chroma(pdf_bytes: bytes, extra_metadata: PdfMetadata):
     if image_info["tmp_dir"]:
         shutil.rmtree(image_info["tmp_dir"], ignore_errors=True)
 
+    # Extraction only hashes the figures; they are stored once a paper is ingested
+    for png in image_info.get("pngs") or []:
+        image_store.put(png)
+
+    image_docs = []
+    image_ids = []
+    image_hashes = []
+    for meta in image_info["metadatas"]:
+        image_docs.append(
+            Document(
+                page_content=meta.get("caption") or "",
+                metadata={k: v for k, v in meta.items() if v is not None},
+            )
+        )
+        image_ids.append(image_id(extra_metadata.doc_id, meta["picture_number"]))
+        image_hashes.append(meta.get("image_hash") or "")
+
+    return PreparedPdf(
+        metadata=extra_metadata,
+        text_docs=chroma_text_docs,
+        text_ids=[
+            chunk_id(extra_metadata.doc_id, n)
+            for n in range(chunk_offset, chunk_offset + len(chroma_text_docs))
+        ],
+        image_metadatas=image_info["metadatas"],
+        image_docs=image_docs,
+        image_ids=image_ids,
+        image_hashes=image_hashes,
+    )
+
+
+def embed_prepared_pdf(
+    prepared: PreparedPdf,
+    embedder: Optional[NomicEmbeddingService] = None,
+    chroma: Optional[ChromaService] = None,
+) -> PreparedPdf:
+    """Embed only the chunks whose text differs from what Chroma holds."""
+    embedder = embedder or embedder_registry.get()
+    with borrow_chroma(chroma) as handle:
+        prepared.plan = handle.plan_upsert(prepared.text_docs, prepared.text_ids)
+        image_plan = (
+            handle.images.plan_upsert(
+                prepared.image_docs, prepared.image_ids, prepared.image_hashes
+            )
+            if settings.index_images
+            else {"changed": [], "refresh": []}
+        )
+    changed = prepared.plan["changed"]
+    prepared.embeddings = (
+        embedder.embed_texts([prepared.text_docs[i].page_content for i in changed])
+        if changed
+        else []
+    )
+
+    # Figures are embedded in batches with the vision model. A failure here
+    # leaves the paper's text searchable rather than failing the ingest.
+    changed_images = image_plan["changed"]
+    try:
+        prepared.image_embeddings = (
+            embedder.embed_images(
+                [
+                    _load_image(prepared.image_docs[i].metadata["image_hash"])
+                    for i in changed_images
+                ]
+            )
+            if changed_images
+            else []
+        )
+    except Exception as e:
+        logger.error(f"Image embedding failed for {prepared.metadata.doc_id}: {e}")
+        image_plan = {"changed": [], "refresh": image_plan["refresh"]}
+        prepared.image_embeddings = []
+    prepared.image_plan = image_plan
+    return prepared
+
+
+def _load_image(image_hash: str) -> bytes:
+    data = image_store.get(image_hash)
+    if data is None:
+        raise FileNotFoundError(f"Image {image_hash} is missing from the image store")
+    return data
+
+
+def _text_where(doc_id: str) -> Dict[str, Any]:
+    return {"$and": [{"doc_id": doc_id}, {"type": "text"}]}
+
+
+def write_prepared_pdf(
+    prepared: PreparedPdf,
+    chroma: Optional[ChromaService] = None,
+    delete_stale: bool = True,
+) -> Dict[str, int]:
+    if prepared.plan is None or prepared.embeddings is None:
+        raise ValueError("PreparedPdf must be embedded before it is written")
+
+    # Store text chunks, dropping chunks left over from a previous ingest
+    doc_id = prepared.metadata.doc_id
+    with borrow_chroma(chroma) as handle:
+        writes = handle.apply_upsert(
+            prepared.text_docs,
+            prepared.text_ids,
+            prepared.plan,
+            prepared.embeddings,
+            stale_where=_text_where(doc_id) if delete_stale else None,
+        )
+        images_indexed = 0
+        if prepared.image_plan is not None and settings.index_images:
+            image_writes = handle.images.apply_upsert(
+                prepared.image_docs,
+                prepared.image_ids,
+                prepared.image_plan,
+                prepared.image_embeddings or [],
+                stale_where={"doc_id": doc_id} if delete_stale else None,
+            )
+            images_indexed = image_writes["written"]
+
+    stats = {**prepared.stats(), **writes, "images_indexed": images_indexed}
+    if delete_stale:
+        _record_pdf(
+            prepared.metadata, stats, prepared.content_hash, prepared.image_hashes
+        )
     print(
-        f"INGESTED PDF: {len(chunk_info)} text chunks, {len(image_info['uris'])} image chunks"
+        f"INGESTED PDF: {stats['text_chunks']} text chunks, {stats['image_chunks']} image chunks"
+    )
+    return stats
+
+
+def _record_pdf(
+    meta: PdfMetadata,
+    stats: Dict[str, int],
+    content_hash: Optional[str],
+    image_hashes: Sequence[str] = (),
+) -> None:
+    """Catalog a paper once all of its chunks are in Chroma."""
+    library_catalog.record_document(
+        meta.doc_id,
+        chunk_count=stats.get("text_chunks", 0),
+        image_count=stats.get("image_chunks", 0),
+        title=meta.title,
+        authors=meta.authors,
+        published=meta.published,
+        pdf_url=meta.pdf_url,
+        github_url=meta.github_url,
+        content_hash=content_hash,
+        image_hashes=image_hashes,
     )
 
-    return {
-        "text_chunks": len(chunk_info),
-        "image_chunks": len(image_info["uris"]),
-    }
 
-def ingest_repo_files_into_chroma(
+def ingest_pdf_bytes_into_chroma(
+    pdf_bytes: bytes,
+    extra_metadata: PdfMetadata,
+    embedder: Optional[NomicEmbeddingService] = None,
+    chroma: Optional[ChromaService] = None,
+    report: Optional[StageReporter] = None,
+):
+    """
+    Extract text & images using Docling, embed them using Nomic,
+    store into Chroma vector DB.
+
+    ``report`` is called with each stage name (convert, chunk, embed, write)
+    as the ingestion reaches it.
+    """
+    return _ingest_pdf(
+        lambda docling: docling.convert_document(pdf_bytes),
+        extra_metadata,
+        embedder,
+        chroma,
+        report,
+    )
+
+
+def ingest_pdf_file_into_chroma(
+    pdf_path: str,
+    extra_metadata: PdfMetadata,
+    sha: Optional[str] = None,
+    embedder: Optional[NomicEmbeddingService] = None,
+    chroma: Optional[ChromaService] = None,
+    report: Optional[StageReporter] = None,
+):
+    """
+    Same as ``ingest_pdf_bytes_into_chroma`` for a PDF on disk; the file is
+    handed to Docling by path and never read into memory here.
+
+    Papers of at least ``settings.docling_window_min_pages`` pages are
+    ingested window by window (see ``ingest_pdf_windows_into_chroma``).
+    """
+    window = settings.docling_window_pages
+    if window > 0 and pdf_page_count(pdf_path) >= settings.docling_window_min_pages:
+        return ingest_pdf_windows_into_chroma(
+            pdf_path, extra_metadata, sha, window, embedder, chroma, report
+        )
+    return _ingest_pdf(
+        lambda docling: docling.convert_document_path(pdf_path, sha),
+        extra_metadata,
+        embedder,
+        chroma,
+        report,
+        sha,
+    )
+
+
+def ingest_pdf_windows_into_chroma(
+    pdf_path: str,
+    extra_metadata: PdfMetadata,
+    sha: Optional[str] = None,
+    window_pages: Optional[int] = None,
+    embedder: Optional[NomicEmbeddingService] = None,
+    chroma: Optional[ChromaService] = None,
+    report: Optional[StageReporter] = None,
+    on_window: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> Dict[str, int]:
+    """
+    Convert a long PDF in page windows and embed + write each window's
+    chunks as soon as it is converted, while the next window converts.
+
+    Peak memory is bounded by the window size rather than the paper length.
+    Chunk and figure numbering continues across windows, so ids match a
+    whole-document ingest of the same chunks, and entries left over from a
+    previous ingest are removed once every window is written.
+    ``on_window`` receives the running stats after each window.
+    """
+    report = report or (lambda stage, progress=None: None)
+    docling = get_docling_service()
+    doc_id = extra_metadata.doc_id
+    github_url = extra_metadata.github_url
+
+    text_ids: List[str] = []
+    image_ids: List[str] = []
+    image_hashes: List[str] = []
+    picture_offset = 0
+    totals: Dict[str, int] = {}
+
+    report("convert")
+    for window in docling.iter_document_windows(pdf_path, sha, window_pages):
+        extracted = docling.extract_from_document(window.document)
+        metadatas = extracted["images"]["metadatas"]
+        for meta in metadatas:
+            meta["picture_number"] += picture_offset
+        picture_offset = max([picture_offset] + [m["picture_number"] for m in metadatas])
+
+        prepared = prepare_pdf_documents(extracted, extra_metadata, chunk_offset=len(text_ids))
+        # Keep the first repo link found in the paper, as a single pass would
+        github_url = github_url or extra_metadata.github_url
+        extra_metadata.github_url = github_url
+
+        embed_prepared_pdf(prepared, embedder, chroma)
+        stats = write_prepared_pdf(prepared, chroma, delete_stale=False)
+        text_ids.extend(prepared.text_ids)
+        image_ids.extend(prepared.image_ids)
+        image_hashes.extend(prepared.image_hashes)
+        for key, value in stats.items():
+            totals[key] = totals.get(key, 0) + value
+        totals["pages"] = window.end
+        if on_window is not None:
+            on_window(dict(totals))
+        done = window.end / window.total_pages
+        report("write", STAGES["convert"] + (STAGES["repos"] - STAGES["convert"]) * done)
+
+    with borrow_chroma(chroma) as handle:
+        keep = set(text_ids)
+        stale = [i for i in handle.ids_where(_text_where(doc_id)) if i not in keep]
+        if settings.index_images:
+            keep = set(image_ids)
+            stale_images = [i for i in handle.images.ids_where({"doc_id": doc_id}) if i not in keep]
+            if stale_images:
+                handle.images.delete(stale_images)
+        if stale:
+            handle.delete(stale)
+    totals["deleted"] = totals.get("deleted", 0) + len(stale)
+    _record_pdf(extra_metadata, totals, sha, image_hashes)
+    return totals
+
+
+def _ingest_pdf(
+    convert: Callable[[Any], Any],
+    extra_metadata: PdfMetadata,
+    embedder: Optional[NomicEmbeddingService],
+    chroma: Optional[ChromaService],
+    report: Optional[StageReporter],
+    sha: Optional[str] = None,
+):
+    report = report or (lambda stage: None)
+
+    docling = get_docling_service()
+    report("convert")
+    doc = convert(docling)
+    report("chunk")
+    prepared = prepare_pdf_documents(docling.extract_from_document(doc), extra_metadata)
+    prepared.content_hash = sha
+
+    report("embed")
+    embed_prepared_pdf(prepared, embedder, chroma)
+
+    report("write")
+    return write_prepared_pdf(prepared, chroma)
+
+@dataclass
+class PreparedRepo:
+    """Chroma-ready ``repo`` chunks of one repository of a paper."""
+
+    repo_url: str
+    doc_id: str
+    docs: List[Document]
+    ids: List[str]
+    # Filled by embed_prepared_repo: which entries changed, and their vectors
+    plan: Optional[Dict[str, List[int]]] = None
+    embeddings: Optional[List[List[float]]] = None
+
+
+def prepare_repo_documents(
     repo_url: str,
     arxiv_id: str,
     repo_files: List[Any],
     base_metadata: Dict[str, Any],
-) -> int:
-
-    embedder = NomicEmbeddingService()
-    chroma = ChromaService(embedding_fn=embedder.embedder)
+) -> PreparedRepo:
+    """
+    Build a repository's files as ``repo`` chunks of ``arxiv_id``.
 
+    Chunk ids are derived from the repo URL and file path, so re-ingesting
+    the same repo only re-embeds files whose content changed, and another
+    repo of the same paper never overwrites it.
+    """
     documents = []
+    ids = []
     readme_text = ""
 
     # Detect README
@@ -237,8 +879,71 @@ def ingest_repo_files_into_chroma(
                 metadata=merged_meta,
             )
         )
+        ids.append(repo_chunk_id(arxiv_id, repo_url, path))
+
+    return PreparedRepo(repo_url=repo_url, doc_id=arxiv_id, docs=documents, ids=ids)
+
+
+def embed_prepared_repo(
+    prepared: PreparedRepo,
+    embedder: Optional[NomicEmbeddingService] = None,
+    chroma: Optional[ChromaService] = None,
+) -> PreparedRepo:
+    """Embed only the repo files whose content differs from what Chroma holds."""
+    embedder = embedder or embedder_registry.get()
+    with borrow_chroma(chroma) as handle:
+        prepared.plan = handle.plan_upsert(prepared.docs, prepared.ids)
+    changed = prepared.plan["changed"]
+    prepared.embeddings = (
+        embedder.embed_texts([prepared.docs[i].page_content for i in changed])
+        if changed
+        else []
+    )
+    return prepared
+
+
+def write_prepared_repo(
+    prepared: PreparedRepo, chroma: Optional[ChromaService] = None
+) -> int:
+    """
+    Write an embedded repo and catalog it. Entries of the repo no longer
+    produced, including ones under older path-only ids, are removed.
+    """
+    if prepared.plan is None or prepared.embeddings is None:
+        raise ValueError("PreparedRepo must be embedded before it is written")
+    if not prepared.docs:
+        return 0
+    with borrow_chroma(chroma) as handle:
+        handle.apply_upsert(
+            prepared.docs,
+            prepared.ids,
+            prepared.plan,
+            prepared.embeddings,
+            stale_where={
+                "$and": [
+                    {"doc_id": prepared.doc_id},
+                    {"type": "repo"},
+                    {"repo_url": prepared.repo_url},
+                ]
+            },
+        )
+    library_catalog.record_repo(prepared.doc_id, prepared.repo_url, len(prepared.docs))
+    return len(prepared.docs)
 
-    if documents:
-        chroma.vectorstore.add_documents(documents, embedding_fn=embedder.embedder)
 
-    return len(documents)
+def ingest_repo_files_into_chroma(
+    repo_url: str,
+    arxiv_id: str,
+    repo_files: List[Any],
+    base_metadata: Dict[str, Any],
+    embedder: Optional[NomicEmbeddingService] = None,
+    chroma: Optional[ChromaService] = None,
+) -> int:
+    """
+    Store a repository's files as ``repo`` chunks of ``arxiv_id``; returns
+    the number of files stored (see ``prepare_repo_documents``).
+    """
+    prepared = prepare_repo_documents(repo_url, arxiv_id, repo_files, base_metadata)
+    if not prepared.docs:
+        return 0
+    return write_prepared_repo(embed_prepared_repo(prepared, embedder, chroma), chroma)
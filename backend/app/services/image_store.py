@@ -0,0 +1,136 @@
+"""Content-addressed on-disk store for extracted figure images."""
+
+from __future__ import annotations
+
+import logging
+import os
+import re
+import tempfile
+from io import BytesIO
+from typing import Optional, Tuple
+
+from PIL import Image
+
+from app.core.config import settings
+from app.services.pdf_cache import sha256_bytes
+
+logger = logging.getLogger(__name__)
+
+_HASH_RE = re.compile(r"^[0-9a-f]{64}$")
+
+
+def is_image_hash(value: str) -> bool:
+    return bool(_HASH_RE.match(value or ""))
+
+
+def encode_png(img: Image.Image) -> bytes:
+    buf = BytesIO()
+    img.save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def image_url(image_hash: str, size: Optional[int] = None) -> str:
+    """Path of the backend endpoint serving ``image_hash``."""
+    url = f"/library/image/{image_hash}"
+    return f"{url}?size={size}" if size else url
+
+
+class ImageStore:
+    """
+    Stores PNG figures once by the SHA-256 of their bytes, so Chroma metadata
+    and API responses only need to carry the hash.
+
+    Layout under ``root``::
+
+        <sha[:2]>/<sha>.png
+        thumb/<size>/<sha>.png
+
+    Images are referenced from Chroma, so unlike the PDF cache nothing here
+    is evicted automatically; thumbnails are derived and safe to delete.
+    """
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = root or settings.image_store_dir
+
+    def path(self, image_hash: str) -> str:
+        if not is_image_hash(image_hash):
+            raise ValueError(f"Invalid image hash: {image_hash!r}")
+        return os.path.join(self.root, image_hash[:2], f"{image_hash}.png")
+
+    def thumbnail_path(self, image_hash: str, size: int) -> str:
+        if not is_image_hash(image_hash):
+            raise ValueError(f"Invalid image hash: {image_hash!r}")
+        return os.path.join(self.root, "thumb", str(size), f"{image_hash}.png")
+
+    def put(self, png_bytes: bytes) -> str:
+        """Store PNG bytes and return their hash. Existing blobs are left as is."""
+        image_hash = sha256_bytes(png_bytes)
+        path = self.path(image_hash)
+        if not os.path.exists(path):
+            _write_atomic(path, png_bytes)
+        return image_hash
+
+    def put_image(self, img: Image.Image) -> Tuple[str, int, int]:
+        """Encode a PIL image as PNG, store it, and return (hash, width, height)."""
+        return self.put(encode_png(img)), img.width, img.height
+
+    def exists(self, image_hash: str) -> bool:
+        return is_image_hash(image_hash) and os.path.exists(self.path(image_hash))
+
+    def get(self, image_hash: str) -> Optional[bytes]:
+        if not is_image_hash(image_hash):
+            return None
+        try:
+            with open(self.path(image_hash), "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def thumbnail(self, image_hash: str, size: int) -> Optional[str]:
+        """
+        Return the path of a PNG no larger than ``size`` x ``size``, creating
+        it on first request. None if the original image is missing.
+        """
+        if not self.exists(image_hash):
+            return None
+        path = self.thumbnail_path(image_hash, size)
+        if os.path.exists(path):
+            return path
+        try:
+            with Image.open(self.path(image_hash)) as img:
+                img.thumbnail((size, size))
+                buf = BytesIO()
+                img.save(buf, format="PNG")
+        except Exception as e:
+            logger.warning(f"Failed to build {size}px thumbnail for {image_hash}: {e}")
+            return None
+        _write_atomic(path, buf.getvalue())
+        return path
+
+    def delete(self, image_hash: str) -> None:
+        if not is_image_hash(image_hash):
+            return
+        paths = [self.path(image_hash)]
+        thumb_root = os.path.join(self.root, "thumb")
+        if os.path.isdir(thumb_root):
+            paths.extend(
+                self.thumbnail_path(image_hash, int(size))
+                for size in os.listdir(thumb_root)
+                if size.isdigit()
+            )
+        for path in paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+image_store = ImageStore()
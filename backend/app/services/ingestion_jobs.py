@@ -0,0 +1,195 @@
+"""Bounded in-process worker pool for background library ingestion."""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence
+from uuid import uuid4
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Ingestion stages in pipeline order, with the overall progress reached
+# when each stage starts.
+STAGES: Dict[str, float] = {
+    "queued": 0.0,
+    "download": 0.05,
+    "convert": 0.15,
+    "chunk": 0.5,
+    "embed": 0.6,
+    "write": 0.85,
+    "repos": 0.9,
+    "done": 1.0,
+}
+
+# Called as report(stage) or report(stage, progress) by ingestion code
+StageReporter = Callable[..., None]
+
+
+class QueueFullError(RuntimeError):
+    """Raised when the ingestion queue is at capacity."""
+
+
+@dataclass
+class IngestionJob:
+    """Status of one background ingestion job."""
+
+    id: str
+    doc_id: str
+    doc_ids: List[str] = field(default_factory=list)  # papers the job ingests
+    status: str = "queued"  # queued | running | completed | failed | cancelled
+    stage: str = "queued"
+    progress: float = 0.0
+    error: Optional[str] = None
+    result: Optional[Dict[str, Any]] = None
+    created_at: float = field(default_factory=time.time)
+    updated_at: float = field(default_factory=time.time)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class IngestionJobQueue:
+    """
+    Runs ingestion callables on a fixed-size thread pool.
+
+    At most ``max_pending`` jobs may be queued or running at once; further
+    submissions raise ``QueueFullError``. Finished jobs are kept for
+    ``retention`` seconds so clients can poll their final status.
+    """
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        max_pending: Optional[int] = None,
+        retention: Optional[float] = None,
+    ):
+        self.workers = max(1, workers or settings.ingest_workers)
+        self.max_pending = max(1, max_pending or settings.ingest_queue_size)
+        self.retention = (
+            retention if retention is not None else settings.ingest_job_retention
+        )
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, IngestionJob] = {}
+        self._latest: Dict[str, IngestionJob] = {}  # doc_id -> newest job
+        self._pending = 0
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix="ingest"
+            )
+        return self._executor
+
+    def submit(
+        self,
+        doc_id: str,
+        fn: Callable[[StageReporter], Dict[str, Any]],
+        doc_ids: Optional[Sequence[str]] = None,
+    ) -> IngestionJob:
+        """
+        Queue ``fn(report)`` and return its job immediately. ``doc_ids``
+        lists the papers a batch job ingests (default ``[doc_id]``) so
+        ``latest`` finds the job for each of them.
+        """
+        with self._lock:
+            self._prune()
+            if self._pending >= self.max_pending:
+                raise QueueFullError(
+                    f"Ingestion queue is full ({self.max_pending} jobs pending)"
+                )
+            job = IngestionJob(
+                id=uuid4().hex,
+                doc_id=doc_id,
+                doc_ids=list(doc_ids) if doc_ids is not None else [doc_id],
+            )
+            self._jobs[job.id] = job
+            for paper in job.doc_ids:
+                self._latest[paper] = job
+            self._pending += 1
+            executor = self._get_executor()
+        future = executor.submit(self._run, job, fn)
+        future.add_done_callback(lambda f: self._settle_cancelled(job, f))
+        return job
+
+    def get(self, job_id: str) -> Optional[IngestionJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def latest(self, doc_id: str) -> Optional[IngestionJob]:
+        """The most recently submitted job still held that ingests ``doc_id``."""
+        with self._lock:
+            return self._latest.get(doc_id)
+
+    def shutdown(self, wait: bool = False) -> None:
+        """Stop the workers; jobs that had not started are marked cancelled."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+    def _settle_cancelled(self, job: IngestionJob, future: Future) -> None:
+        # Only futures that never started are cancelled; _run settles the rest
+        if not future.cancelled():
+            return
+        with self._lock:
+            job.status = "cancelled"
+            job.error = "Ingestion stopped before the job started"
+            job.updated_at = time.time()
+            self._pending -= 1
+
+    def _report(
+        self, job: IngestionJob, stage: str, progress: Optional[float] = None
+    ) -> None:
+        if progress is None:
+            progress = STAGES.get(stage, job.progress)
+        with self._lock:
+            job.stage = stage
+            job.progress = max(job.progress, min(1.0, progress))
+            job.updated_at = time.time()
+
+    def _run(
+        self, job: IngestionJob, fn: Callable[[StageReporter], Dict[str, Any]]
+    ) -> None:
+        with self._lock:
+            job.status = "running"
+            job.updated_at = time.time()
+        try:
+            result = fn(lambda stage, progress=None: self._report(job, stage, progress))
+        except Exception as e:
+            logger.error(f"Ingestion job {job.id} ({job.doc_id}) failed: {e}")
+            with self._lock:
+                job.status = "failed"
+                job.error = str(e)
+                job.updated_at = time.time()
+        else:
+            self._report(job, "done")
+            with self._lock:
+                job.status = "completed"
+                job.result = result
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def _prune(self) -> None:
+        cutoff = time.time() - self.retention
+        expired = [
+            job_id
+            for job_id, job in self._jobs.items()
+            if job.status in ("completed", "failed", "cancelled")
+            and job.updated_at < cutoff
+        ]
+        for job_id in expired:
+            job = self._jobs.pop(job_id)
+            for paper in job.doc_ids:
+                if self._latest.get(paper) is job:
+                    del self._latest[paper]
+
+
+ingestion_jobs = IngestionJobQueue()
@@ -0,0 +1,478 @@
+"""arXiv paper ingestion pipeline shared by the library routes and job queue."""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import os
+import tempfile
+from dataclasses import asdict, dataclass
+from typing import Any, BinaryIO, Dict, List, Optional, Tuple
+from xml.etree import ElementTree as ET
+
+import httpx
+
+from app.core.config import settings
+from app.services.chroma_service import ChromaService, borrow_chroma
+from app.services.docling_service import get_docling_service
+from app.services.embedding_service import (
+    NomicEmbeddingService,
+    PdfMetadata,
+    PreparedPdf,
+    PreparedRepo,
+    embed_prepared_pdf,
+    embed_prepared_repo,
+    ingest_pdf_file_into_chroma,
+    ingest_repo_files_into_chroma,
+    prepare_pdf_documents,
+    prepare_repo_documents,
+    write_prepared_pdf,
+    write_prepared_repo,
+)
+from app.services.github_service import GitHubService, normalize_github_url
+from app.services.image_store import image_store
+from app.services.ingestion_jobs import StageReporter
+from app.services.library_catalog import library_catalog
+from app.services.pdf_cache import pdf_cache
+from app.services.pipeline import PipelineItem, Stage, run_pipeline
+from app.services.retrieval_cache import retrieval_cache
+
+logger = logging.getLogger(__name__)
+
+ARXIV_API = "https://export.arxiv.org/api/query"
+UA = "CSE5914-Backend/0.1 (https://github.com/jeevanadella/CSE5914)"
+DOWNLOAD_CHUNK_SIZE = 256 * 1024
+
+
+class IngestionError(RuntimeError):
+    """Raised when a paper cannot be fetched for ingestion."""
+
+    def __init__(self, message: str, status_code: int = 500):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def arxiv_pdf_url(doc_id: str) -> str:
+    return f"https://arxiv.org/pdf/{doc_id}.pdf"
+
+
+@dataclass
+class DownloadedPdf:
+    """
+    A PDF on disk that its holder owns: the downloaded temp file or a
+    private link to the cached copy.
+    """
+
+    path: str
+    sha: str
+    size: int
+
+    def release(self) -> None:
+        """Delete the holder's file; the cached PDF is kept."""
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+def download_arxiv_pdf(doc_id: str) -> DownloadedPdf:
+    """
+    Fetch an arXiv PDF to disk, serving repeat requests from the PDF cache.
+
+    The response is streamed to a temp file (hashed on the way) and linked
+    into the cache, so the PDF is never held in memory. Downloads larger
+    than ``settings.pdf_max_bytes`` are rejected with a 413.
+
+    The returned file is always the caller's own (a link to a cached PDF or
+    the downloaded temp file), so concurrent cache eviction cannot remove
+    it before ``release()``.
+    """
+    cached = pdf_cache.get_pdf_path_for_arxiv(doc_id)
+    pinned = pdf_cache.pin_pdf(cached[1]) if cached is not None else None
+    if pinned is not None:
+        return DownloadedPdf(path=pinned, sha=cached[1], size=os.path.getsize(pinned))
+
+    fd, tmp_path = tempfile.mkstemp(
+        prefix="arxiv_", suffix=".pdf", dir=pdf_cache.scratch_dir()
+    )
+    try:
+        with os.fdopen(fd, "wb") as f:
+            sha, size = _stream_to_file(arxiv_pdf_url(doc_id), f)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+    pdf_cache.put_pdf_file(tmp_path, sha, arxiv_id=doc_id, keep_source=True)
+    return DownloadedPdf(path=tmp_path, sha=sha, size=size)
+
+
+def _stream_to_file(url: str, f: BinaryIO) -> Tuple[str, int]:
+    limit = settings.pdf_max_bytes
+    too_large = IngestionError(
+        f"PDF exceeds the {limit // (1024 * 1024)} MiB size limit", status_code=413
+    )
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with httpx.stream(
+            "GET",
+            url,
+            headers={"User-Agent": UA},
+            timeout=httpx.Timeout(60.0, connect=10.0),
+            follow_redirects=True,
+        ) as r:
+            if r.status_code != 200:
+                raise IngestionError(
+                    f"Failed to fetch PDF (HTTP {r.status_code})",
+                    status_code=r.status_code,
+                )
+            declared = r.headers.get("Content-Length")
+            if declared and declared.isdigit() and int(declared) > limit:
+                raise too_large
+            for block in r.iter_bytes(DOWNLOAD_CHUNK_SIZE):
+                size += len(block)
+                if size > limit:
+                    raise too_large
+                digest.update(block)
+                f.write(block)
+    except httpx.HTTPError as e:
+        raise IngestionError(f"Failed to fetch PDF: {e}", status_code=502)
+    return digest.hexdigest(), size
+
+
+def fetch_arxiv_metadata(doc_id: str) -> dict:
+    try:
+        r = httpx.get(
+            ARXIV_API,
+            params={"id_list": doc_id},
+            headers={"User-Agent": UA},
+            timeout=30.0,
+        )
+    except httpx.HTTPError:
+        return {}
+    if r.status_code != 200:
+        return {}
+    try:
+        root = ET.fromstring(r.text)
+    except ET.ParseError:
+        return {}
+    ns = {"atom": "http://www.w3.org/2005/Atom"}
+    entry = root.find("atom:entry", ns)
+    if entry is None:
+        return {}
+
+    def _t(tag: str) -> str:
+        el = entry.find(f"atom:{tag}", ns)
+        return (el.text or "").strip() if el is not None else ""
+
+    title = _t("title")
+    summary = _t("summary")
+    published = _t("published")
+    authors: List[str] = []
+    for a in entry.findall("atom:author", ns):
+        name_el = a.find("atom:name", ns)
+        if name_el is not None and name_el.text:
+            authors.append(name_el.text.strip())
+    return {
+        "title": title,
+        "summary": summary,
+        "published": published,
+        "authors": authors,
+    }
+
+
+def build_pdf_metadata(
+    doc_id: str, github_repos: Optional[List[str]] = None
+) -> PdfMetadata:
+    meta = fetch_arxiv_metadata(doc_id)
+    github_url = None
+    if github_repos:
+        github_url = normalize_github_url(github_repos[0])
+
+    return PdfMetadata(
+        doc_id=doc_id,
+        pdf_url=arxiv_pdf_url(doc_id),
+        title=meta.get("title", ""),
+        summary=meta.get("summary", ""),
+        published=meta.get("published", ""),
+        authors=meta.get("authors", []),
+        github_url=github_url,
+    )
+
+
+def fetch_detected_repo(pdf_meta: PdfMetadata) -> Optional[PreparedRepo]:
+    """Fetch the repository linked from the paper, ready to embed, if any."""
+    repo_url = pdf_meta.github_url
+    if not repo_url:
+        return None
+    repo_files = asyncio.run(GitHubService().fetch_repo_files(repo_url))
+    if not repo_files:
+        return None
+    return prepare_repo_documents(
+        repo_url,
+        pdf_meta.doc_id,
+        repo_files,
+        {"doc_id": pdf_meta.doc_id, "source": "github"},
+    )
+
+
+def ingest_repos(
+    doc_id: str,
+    pdf_meta: PdfMetadata,
+    github_repos: List[str],
+    embedder: Optional[NomicEmbeddingService] = None,
+) -> List[Dict[str, Any]]:
+    """Ingest the detected repository and any explicitly requested ones."""
+    github_service = GitHubService()
+
+    # If GitHub repo exists, fetch files & ingest to Chroma
+    detected = fetch_detected_repo(pdf_meta)
+    if detected is not None:
+        write_prepared_repo(embed_prepared_repo(detected, embedder))
+
+    repos: List[Dict[str, Any]] = []
+    base_metadata = asdict(pdf_meta)
+    for repo_url in github_repos:
+        try:
+            normalized_url = normalize_github_url(repo_url)
+            logger.info(f"Fetching files from {normalized_url}")
+            repo_files = asyncio.run(github_service.fetch_repo_files(normalized_url))
+
+            if not repo_files:
+                logger.warning(f"No files fetched from {normalized_url}")
+                repos.append(
+                    {
+                        "url": normalized_url,
+                        "status": "warning",
+                        "files_ingested": 0,
+                        "reason": "No files fetched",
+                    }
+                )
+                continue
+
+            files_ingested = ingest_repo_files_into_chroma(
+                repo_url=normalized_url,
+                arxiv_id=doc_id,
+                repo_files=repo_files,
+                base_metadata=base_metadata,
+                embedder=embedder,
+            )
+
+            repos.append(
+                {
+                    "url": normalized_url,
+                    "status": "ok",
+                    "files_ingested": files_ingested,
+                }
+            )
+            logger.info(
+                f"Ingested {files_ingested} files from {normalized_url} for {doc_id}"
+            )
+        except Exception as e:
+            logger.error(f"Failed to ingest repo {repo_url}: {e}")
+            repos.append(
+                {
+                    "url": repo_url,
+                    "status": "error",
+                    "error": str(e),
+                }
+            )
+    return repos
+
+
+def ingest_arxiv_paper(
+    doc_id: str,
+    github_repos: Optional[List[str]] = None,
+    embedder: Optional[NomicEmbeddingService] = None,
+    report: Optional[StageReporter] = None,
+) -> Dict[str, Any]:
+    """
+    Download an arXiv paper, ingest it (and its GitHub repos) into Chroma.
+
+    Runs synchronously; callers on the event loop should go through the
+    ingestion job queue instead of calling this directly.
+    """
+    report = report or (lambda stage: None)
+    github_repos = github_repos or []
+
+    report("download")
+    pdf = download_arxiv_pdf(doc_id)
+    try:
+        pdf_meta = build_pdf_metadata(doc_id, github_repos)
+        stats = ingest_pdf_file_into_chroma(
+            pdf.path,
+            extra_metadata=pdf_meta,
+            sha=pdf.sha,
+            embedder=embedder,
+            report=report,
+        )
+    finally:
+        pdf.release()
+
+    report("repos")
+    repos = ingest_repos(doc_id, pdf_meta, github_repos, embedder=embedder)
+
+    return {
+        "status": "ok",
+        "doc_id": doc_id,
+        "metadata": asdict(pdf_meta),
+        "ingestion": stats,
+        "repos": repos,
+    }
+
+
+def ingest_arxiv_batch(
+    doc_ids: List[str],
+    embedder: Optional[NomicEmbeddingService] = None,
+    report: Optional[StageReporter] = None,
+) -> Dict[str, Any]:
+    """
+    Ingest many arXiv papers with download, conversion, repository fetch,
+    embedding and Chroma writes running as overlapping pipeline stages.
+    Network and model work stay out of the single-worker write stage.
+
+    A failure only affects its own paper; the result lists the outcome of
+    every paper in request order.
+    """
+    report = report or (lambda stage, progress=None: None)
+    doc_ids = list(dict.fromkeys(doc_ids))
+    total = len(doc_ids)
+    completed = [0]
+
+    def download(doc_id: str) -> Dict[str, Any]:
+        pdf = download_arxiv_pdf(doc_id)
+        try:
+            metadata = build_pdf_metadata(doc_id)
+        except BaseException:
+            pdf.release()
+            raise
+        return {"pdf": pdf, "metadata": metadata}
+
+    def convert(downloaded: Dict[str, Any]) -> PreparedPdf:
+        docling = get_docling_service()
+        pdf = downloaded["pdf"]
+        try:
+            doc = docling.convert_document_path(pdf.path, pdf.sha)
+        finally:
+            pdf.release()
+        prepared = prepare_pdf_documents(
+            docling.extract_from_document(doc), downloaded["metadata"]
+        )
+        prepared.content_hash = pdf.sha
+        return prepared
+
+    def fetch_repo(prepared: PreparedPdf) -> Dict[str, Any]:
+        try:
+            repo = fetch_detected_repo(prepared.metadata)
+        except Exception as e:
+            # The paper is still worth ingesting without its repository
+            logger.error(f"Failed to fetch repo of {prepared.metadata.doc_id}: {e}")
+            repo = None
+        return {"pdf": prepared, "repo": repo}
+
+    def embed(fetched: Dict[str, Any]) -> Dict[str, Any]:
+        embed_prepared_pdf(fetched["pdf"], embedder)
+        if fetched["repo"] is not None:
+            embed_prepared_repo(fetched["repo"], embedder)
+        return fetched
+
+    def write(embedded: Dict[str, Any]) -> Dict[str, Any]:
+        prepared: PreparedPdf = embedded["pdf"]
+        stats = write_prepared_pdf(prepared)
+        if embedded["repo"] is not None:
+            write_prepared_repo(embedded["repo"])
+        return {"metadata": asdict(prepared.metadata), "ingestion": stats}
+
+    def on_item_done(item: PipelineItem) -> None:
+        completed[0] += 1
+        report("pipeline", completed[0] / total if total else 1.0)
+
+    report("pipeline", 0.0)
+    items = run_pipeline(
+        doc_ids,
+        [
+            Stage("download", download, workers=settings.batch_download_workers),
+            Stage("convert", convert, workers=settings.batch_convert_workers),
+            Stage("repos", fetch_repo, workers=settings.batch_download_workers),
+            Stage("embed", embed),
+            Stage("write", write),
+        ],
+        queue_size=settings.batch_queue_size,
+        on_item_done=on_item_done,
+    )
+
+    papers: List[Dict[str, Any]] = []
+    for item in items:
+        if item.error is None:
+            papers.append({"doc_id": item.key, "status": "ok", **item.value})
+        else:
+            papers.append(
+                {
+                    "doc_id": item.key,
+                    "status": "error",
+                    "stage": item.failed_stage,
+                    "error": item.error,
+                }
+            )
+
+    succeeded = sum(1 for p in papers if p["status"] == "ok")
+    return {
+        "status": "ok" if succeeded == total else "partial",
+        "succeeded": succeeded,
+        "failed": total - succeeded,
+        "papers": papers,
+    }
+
+
+def delete_document(
+    doc_id: str, chroma: Optional[ChromaService] = None
+) -> Dict[str, int]:
+    """
+    Remove a paper and everything derived from it: text and repo chunks,
+    figure entries, figure PNGs no other paper uses, its catalog row and its
+    cached search results. The PDF, Docling and embedding caches are keyed by
+    content rather than by paper, so their entries are left to age out; a
+    paper added again is then converted and embedded from cache.
+
+    Entries are found with indexed metadata filters and deleted in batches
+    of ``settings.delete_batch_size``; nothing else in the collection is read.
+    """
+    # Extracted figures are in the image store even when they were not indexed
+    image_hashes = library_catalog.image_hashes(doc_id)
+
+    def collect_images(batch: Dict[str, Any]) -> None:
+        for md in batch.get("metadatas") or []:
+            if md and md.get("image_hash"):
+                image_hashes.add(md["image_hash"])
+
+    with borrow_chroma(chroma) as handle:
+        chunks = handle.delete_where({"doc_id": doc_id})
+        # Repo chunks written before doc_id was set on them carry only root_id
+        chunks += handle.delete_where({"root_id": doc_id})
+        # Legacy entries stored under the bare doc_id
+        legacy = list(handle.collection.get(ids=[doc_id], include=[]).get("ids") or [])
+        if legacy:
+            handle.delete(legacy)
+            chunks += len(legacy)
+        images = handle.images.delete_where(
+            {"doc_id": doc_id}, ["metadatas"], collect_images
+        )
+        # Figures are content-addressed and may be shared with other papers
+        shared = library_catalog.images_in_use(image_hashes, excluding=doc_id)
+        shared |= {
+            h
+            for h in image_hashes - shared
+            if handle.images.ids_where({"image_hash": h}, limit=1)
+        }
+
+    for image_hash in image_hashes - shared:
+        image_store.delete(image_hash)
+    library_catalog.delete(doc_id)
+    retrieval_cache.invalidate([doc_id])
+
+    return {
+        "deleted_count": chunks,
+        "images_deleted": images,
+        "image_files_removed": len(image_hashes - shared),
+    }
@@ -0,0 +1,181 @@
+"""In-process BM25 index over text chunks, partitioned by paper."""
+
+from __future__ import annotations
+
+import math
+import re
+import threading
+from collections import Counter, OrderedDict
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from app.core.config import settings
+
+_TOKEN = re.compile(r"[a-z0-9_]+")
+# Only the commonest function words; technical terms are what lexical search is for
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has in is it its of on or that the this to was "
+    "were what which with how does do we our".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in _TOKEN.findall(text.lower()) if t not in _STOPWORDS]
+
+
+class _Paper:
+    """Postings of one paper: term -> {chunk id: term frequency}."""
+
+    __slots__ = ("lengths", "terms", "postings")
+
+    def __init__(self) -> None:
+        self.lengths: Dict[str, int] = {}
+        self.terms: Dict[str, List[str]] = {}
+        self.postings: Dict[str, Dict[str, int]] = {}
+
+    def add(self, chunk_id: str, text: str) -> None:
+        self.remove(chunk_id)
+        counts = Counter(tokenize(text))
+        self.lengths[chunk_id] = sum(counts.values())
+        self.terms[chunk_id] = list(counts)
+        for term, tf in counts.items():
+            self.postings.setdefault(term, {})[chunk_id] = tf
+
+    def remove(self, chunk_id: str) -> None:
+        if self.lengths.pop(chunk_id, None) is None:
+            return
+        for term in self.terms.pop(chunk_id, []):
+            postings = self.postings[term]
+            del postings[chunk_id]
+            if not postings:
+                del self.postings[term]
+
+
+class LexicalIndex:
+    """
+    BM25 over the chunks of the papers a search is scoped to.
+
+    Searches are always scoped by ``doc_ids``, so postings are kept per
+    paper and corpus statistics (document frequency, average length) are
+    computed over the scope at query time. A paper's postings are loaded
+    from Chroma the first time it is searched, kept current by
+    ``ChromaService`` writes and deletes afterwards, and the least recently
+    searched papers are dropped beyond ``max_docs``.
+    """
+
+    def __init__(
+        self, max_docs: Optional[int] = None, k1: float = 1.2, b: float = 0.75
+    ):
+        self.max_docs = max(1, max_docs or settings.lexical_index_max_docs)
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.Lock()
+        self._papers: "OrderedDict[str, _Paper]" = OrderedDict()
+        self._owner: Dict[str, str] = {}  # chunk id -> doc_id, for deletes
+
+    def loaded(self, doc_id: str) -> bool:
+        return doc_id in self._papers
+
+    def load(self, doc_id: str, ids: Sequence[str], texts: Sequence[str]) -> None:
+        """Replace a paper's postings with ``ids``/``texts`` read from Chroma."""
+        paper = _Paper()
+        for chunk_id, text in zip(ids, texts):
+            paper.add(chunk_id, text or "")
+        with self._lock:
+            self._drop(doc_id)
+            self._papers[doc_id] = paper
+            for chunk_id in ids:
+                self._owner[chunk_id] = doc_id
+            while len(self._papers) > self.max_docs:
+                self._drop(next(iter(self._papers)))
+
+    def add(
+        self, ids: Sequence[str], doc_ids: Sequence[str], texts: Sequence[str]
+    ) -> None:
+        """Index written chunks of papers that are loaded; others load lazily."""
+        with self._lock:
+            for chunk_id, doc_id, text in zip(ids, doc_ids, texts):
+                paper = self._papers.get(doc_id)
+                if paper is not None:
+                    paper.add(chunk_id, text or "")
+                    self._owner[chunk_id] = doc_id
+
+    def remove(self, ids: Iterable[str]) -> None:
+        with self._lock:
+            for chunk_id in ids:
+                doc_id = self._owner.pop(chunk_id, None)
+                paper = self._papers.get(doc_id) if doc_id else None
+                if paper is not None:
+                    paper.remove(chunk_id)
+
+    def search(
+        self, query: str, k: int, doc_ids: Sequence[str]
+    ) -> List[Tuple[str, float]]:
+        """Top ``k`` (chunk id, BM25 score) within the loaded ``doc_ids``."""
+        terms = list(dict.fromkeys(tokenize(query)))
+        with self._lock:
+            papers = []
+            for doc_id in doc_ids:
+                paper = self._papers.get(doc_id)
+                if paper is not None:
+                    self._papers.move_to_end(doc_id)
+                    papers.append(paper)
+            n = sum(len(p.lengths) for p in papers)
+            if not terms or not n:
+                return []
+            avgdl = sum(sum(p.lengths.values()) for p in papers) / n or 1.0
+            scores: Dict[str, float] = {}
+            for term in terms:
+                hits = [(p, p.postings.get(term)) for p in papers]
+                df = sum(len(h) for _, h in hits if h)
+                if not df:
+                    continue
+                idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+                for paper, postings in hits:
+                    for chunk_id, tf in (postings or {}).items():
+                        length = paper.lengths[chunk_id] / avgdl
+                        norm = self.k1 * (1 - self.b + self.b * length)
+                        score = idf * tf * (self.k1 + 1) / (tf + norm)
+                        scores[chunk_id] = scores.get(chunk_id, 0.0) + score
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._papers.clear()
+            self._owner.clear()
+
+    def _drop(self, doc_id: str) -> None:
+        paper = self._papers.pop(doc_id, None)
+        if paper is not None:
+            for chunk_id in paper.lengths:
+                self._owner.pop(chunk_id, None)
+
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[Sequence[str]], k: Optional[int] = None
+) -> List[str]:
+    """Merge ranked id lists by summed 1 / (k + rank)."""
+    k = settings.rrf_k if k is None else k
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, _id in enumerate(ranking, 1):
+            scores[_id] = scores.get(_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores, key=lambda _id: scores[_id], reverse=True)
+
+
+_indexes: Dict[str, LexicalIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_lexical_index(collection_name: str) -> LexicalIndex:
+    """The process-wide lexical index of ``collection_name``."""
+    with _indexes_lock:
+        index = _indexes.get(collection_name)
+        if index is None:
+            index = LexicalIndex()
+            _indexes[collection_name] = index
+    return index
+
+
+def reset_lexical_indexes() -> None:
+    with _indexes_lock:
+        _indexes.clear()
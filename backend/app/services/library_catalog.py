@@ -0,0 +1,324 @@
+"""SQLite catalog of ingested documents, written by the ingestion path."""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_COLUMNS = (
+    "doc_id",
+    "title",
+    "authors",
+    "published",
+    "pdf_url",
+    "github_url",
+    "chunk_count",
+    "image_count",
+    "repo_count",
+    "repo_file_count",
+    "content_hash",
+    "ingested_at",
+    "updated_at",
+)
+
+
+class LibraryCatalog:
+    """
+    One row per document in the library, keyed by ``doc_id``.
+
+    Rows are written in a single transaction once a document's chunks are
+    in Chroma, so the catalog never lists a paper that is only partly
+    written. Membership and listing queries hit the primary key instead of
+    scanning chunk metadata. ``ready`` is False until an existing library
+    has been backfilled from Chroma (see ``backfill``).
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or settings.library_catalog_path
+        self.ready = True
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def record_document(
+        self,
+        doc_id: str,
+        chunk_count: int,
+        image_count: int,
+        title: str = "",
+        authors: Sequence[str] = (),
+        published: str = "",
+        pdf_url: str = "",
+        github_url: Optional[str] = None,
+        content_hash: Optional[str] = None,
+        image_hashes: Iterable[str] = (),
+    ) -> None:
+        """
+        Insert or refresh a document after its chunks were written.
+        ``image_hashes`` are the image-store blobs extracted from it, kept
+        so they can be removed with the paper whether or not figures were
+        indexed.
+        """
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    "INSERT INTO documents (doc_id, title, authors, published, pdf_url,"
+                    " github_url, chunk_count, image_count, content_hash, ingested_at,"
+                    " updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+                    " ON CONFLICT(doc_id) DO UPDATE SET title = excluded.title,"
+                    " authors = excluded.authors, published = excluded.published,"
+                    " pdf_url = excluded.pdf_url,"
+                    " github_url = COALESCE(excluded.github_url, documents.github_url),"
+                    " chunk_count = excluded.chunk_count, image_count = excluded.image_count,"
+                    " content_hash = COALESCE(excluded.content_hash, documents.content_hash),"
+                    " updated_at = excluded.updated_at",
+                    (
+                        doc_id,
+                        title,
+                        json.dumps(list(authors)),
+                        published,
+                        pdf_url,
+                        github_url,
+                        chunk_count,
+                        image_count,
+                        content_hash,
+                        now,
+                        now,
+                    ),
+                )
+                conn.execute("DELETE FROM images WHERE doc_id = ?", (doc_id,))
+                conn.executemany(
+                    "INSERT OR IGNORE INTO images (doc_id, image_hash) VALUES (?, ?)",
+                    [(doc_id, h) for h in image_hashes if h],
+                )
+
+    def record_repo(self, doc_id: str, repo_url: str, file_count: int) -> None:
+        """Record a repository ingested alongside ``doc_id``."""
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO repos (doc_id, repo_url, file_count, ingested_at)"
+                    " VALUES (?, ?, ?, ?)",
+                    (doc_id, repo_url, file_count, now),
+                )
+                # A repo can arrive before its paper's row (or without one)
+                conn.execute(
+                    "INSERT OR IGNORE INTO documents (doc_id, ingested_at, updated_at)"
+                    " VALUES (?, ?, ?)",
+                    (doc_id, now, now),
+                )
+                conn.execute(
+                    "UPDATE documents SET"
+                    " repo_count = (SELECT COUNT(*) FROM repos WHERE doc_id = ?),"
+                    " repo_file_count = (SELECT COALESCE(SUM(file_count), 0) FROM repos"
+                    "  WHERE doc_id = ?), updated_at = ? WHERE doc_id = ?",
+                    (doc_id, doc_id, now, doc_id),
+                )
+
+    def get(self, doc_id: str) -> Optional[Dict[str, Any]]:
+        rows = self.get_many([doc_id])
+        return rows.get(doc_id)
+
+    def get_many(self, doc_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Rows for whichever of ``doc_ids`` are in the library."""
+        unique = list(dict.fromkeys(doc_ids))
+        found: Dict[str, Dict[str, Any]] = {}
+        with self._lock:
+            conn = self._connect()
+            # Stay under SQLite's bound-parameter limit
+            for start in range(0, len(unique), 500):
+                part = unique[start : start + 500]
+                marks = ",".join("?" * len(part))
+                rows = conn.execute(
+                    f"SELECT {', '.join(_COLUMNS)} FROM documents WHERE doc_id IN ({marks})",
+                    part,
+                ).fetchall()
+                for row in rows:
+                    found[row[0]] = self._row(row)
+        return found
+
+    def contains_many(self, doc_ids: Iterable[str]) -> Dict[str, bool]:
+        doc_ids = list(doc_ids)
+        found = self.get_many(doc_ids)
+        return {doc_id: doc_id in found for doc_id in doc_ids}
+
+    def list(self, limit: int = 500, offset: int = 0) -> List[Dict[str, Any]]:
+        """Documents, most recently ingested first."""
+        with self._lock:
+            rows = (
+                self._connect()
+                .execute(
+                    f"SELECT {', '.join(_COLUMNS)} FROM documents"
+                    " ORDER BY ingested_at DESC, doc_id LIMIT ? OFFSET ?",
+                    (limit, offset),
+                )
+                .fetchall()
+            )
+        return [self._row(row) for row in rows]
+
+    def repos(self, doc_id: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = (
+                self._connect()
+                .execute(
+                    "SELECT repo_url, file_count, ingested_at FROM repos WHERE doc_id = ?"
+                    " ORDER BY repo_url",
+                    (doc_id,),
+                )
+                .fetchall()
+            )
+        return [
+            {"repo_url": r[0], "file_count": r[1], "ingested_at": r[2]} for r in rows
+        ]
+
+    def image_hashes(self, doc_id: str) -> Set[str]:
+        """Image-store hashes of the figures extracted from ``doc_id``."""
+        with self._lock:
+            rows = (
+                self._connect()
+                .execute("SELECT image_hash FROM images WHERE doc_id = ?", (doc_id,))
+                .fetchall()
+            )
+        return {r[0] for r in rows}
+
+    def images_in_use(self, image_hashes: Iterable[str], excluding: str) -> Set[str]:
+        """Which of ``image_hashes`` another paper than ``excluding`` uses."""
+        unique = list(set(image_hashes))
+        used: Set[str] = set()
+        with self._lock:
+            conn = self._connect()
+            for start in range(0, len(unique), 500):
+                part = unique[start : start + 500]
+                marks = ",".join("?" * len(part))
+                rows = conn.execute(
+                    f"SELECT DISTINCT image_hash FROM images WHERE image_hash IN ({marks})"
+                    " AND doc_id != ?",
+                    [*part, excluding],
+                ).fetchall()
+                used.update(r[0] for r in rows)
+        return used
+
+    def count(self) -> int:
+        with self._lock:
+            return (
+                self._connect().execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+            )
+
+    def delete(self, doc_id: str) -> bool:
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute("DELETE FROM repos WHERE doc_id = ?", (doc_id,))
+                conn.execute("DELETE FROM images WHERE doc_id = ?", (doc_id,))
+                cur = conn.execute("DELETE FROM documents WHERE doc_id = ?", (doc_id,))
+            return cur.rowcount > 0
+
+    def backfill(self, chroma: Any, page_size: int = 1000) -> int:
+        """
+        Build rows from chunk metadata for a library ingested before the
+        catalog existed. Runs once, when the catalog is empty but Chroma is
+        not; returns the number of documents recorded.
+        """
+        if self.count() or not chroma.collection.count():
+            self.ready = True
+            return 0
+        self.ready = False
+        docs: Dict[str, Dict[str, Any]] = {}
+        repos: Dict[tuple, int] = {}
+        offset = 0
+        while True:
+            data = chroma.collection.get(
+                include=["metadatas"], limit=page_size, offset=offset
+            )
+            ids = data.get("ids") or []
+            if not ids:
+                break
+            for md in data.get("metadatas") or []:
+                md = md or {}
+                doc_id = md.get("doc_id")
+                if not doc_id:
+                    continue
+                doc = docs.setdefault(doc_id, {"chunk_count": 0, "title": ""})
+                if md.get("type") == "repo" and md.get("repo_url"):
+                    key = (doc_id, md["repo_url"])
+                    repos[key] = repos.get(key, 0) + 1
+                else:
+                    doc["chunk_count"] += 1
+                    doc["title"] = doc["title"] or md.get("title") or ""
+            offset += len(ids)
+
+        image_counts: Dict[str, int] = {}
+        for doc_id in docs:
+            image_counts[doc_id] = len(chroma.images.ids_where({"doc_id": doc_id}))
+        for doc_id, doc in docs.items():
+            self.record_document(
+                doc_id, doc["chunk_count"], image_counts[doc_id], title=doc["title"]
+            )
+        for (doc_id, repo_url), files in repos.items():
+            self.record_repo(doc_id, repo_url, files)
+        self.ready = True
+        logger.info(f"Backfilled library catalog with {len(docs)} documents")
+        return len(docs)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    @staticmethod
+    def _row(row: Sequence[Any]) -> Dict[str, Any]:
+        record = dict(zip(_COLUMNS, row))
+        record["authors"] = json.loads(record["authors"] or "[]")
+        return record
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS documents ("
+                " doc_id TEXT PRIMARY KEY, title TEXT NOT NULL DEFAULT '',"
+                " authors TEXT NOT NULL DEFAULT '[]', published TEXT NOT NULL DEFAULT '',"
+                " pdf_url TEXT NOT NULL DEFAULT '', github_url TEXT,"
+                " chunk_count INTEGER NOT NULL DEFAULT 0,"
+                " image_count INTEGER NOT NULL DEFAULT 0,"
+                " repo_count INTEGER NOT NULL DEFAULT 0,"
+                " repo_file_count INTEGER NOT NULL DEFAULT 0,"
+                " content_hash TEXT, ingested_at REAL NOT NULL, updated_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS documents_ingested_at ON documents (ingested_at)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS repos ("
+                " doc_id TEXT NOT NULL, repo_url TEXT NOT NULL,"
+                " file_count INTEGER NOT NULL, ingested_at REAL NOT NULL,"
+                " PRIMARY KEY (doc_id, repo_url))"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS images ("
+                " doc_id TEXT NOT NULL, image_hash TEXT NOT NULL,"
+                " PRIMARY KEY (doc_id, image_hash))"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS images_image_hash ON images (image_hash)"
+            )
+            self._conn = conn
+        return self._conn
+
+
+library_catalog = LibraryCatalog()
@@ -0,0 +1,119 @@
+"""nomic-embed-text-v1.5 on ONNX Runtime, a CPU alternative to the gpt4all backend."""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from typing import Any, List, Optional
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.docling_service import get_tokenizer
+
+logger = logging.getLogger(__name__)
+
+
+class OnnxNomicEmbeddings:
+    """
+    Text-only drop-in for ``NomicEmbeddings`` running the model's published
+    ONNX export (``onnx/model.onnx``, or ``onnx/model_quantized.onnx`` for
+    the int8 build).
+
+    Inputs get the same ``"<task>: "`` prefix the Nomic client adds, and the
+    output is mean-pooled and L2-normalized like the reference
+    implementation, so vectors land in the space of the existing
+    collection. The session is created on first use.
+    """
+
+    def __init__(
+        self,
+        repo: Optional[str] = None,
+        quantized: Optional[bool] = None,
+        model_path: Optional[str] = None,
+        intra_op_threads: Optional[int] = None,
+        max_length: Optional[int] = None,
+    ):
+        self.repo = repo or settings.onnx_model_repo
+        self.quantized = settings.onnx_quantized if quantized is None else quantized
+        self.model_path = model_path or settings.onnx_model_path or None
+        self.intra_op_threads = (
+            settings.onnx_intra_op_threads
+            if intra_op_threads is None
+            else intra_op_threads
+        )
+        self.max_length = max_length or settings.onnx_max_length
+        self.dimensionality: Optional[int] = None  # native size, like NomicEmbeddings
+        self._session: Any = None
+        self._input_names: List[str] = []
+        self._tokenizer: Any = None
+        self._load_lock = threading.Lock()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embed(texts, task_type="search_document")
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed([text], task_type="search_query")[0]
+
+    def embed(self, texts: List[str], *, task_type: str) -> List[List[float]]:
+        if not texts:
+            return []
+        self._load()
+        encoded = self._tokenizer(
+            [f"{task_type}: {text}" for text in texts],
+            padding=True,
+            truncation=True,
+            max_length=self.max_length,
+            return_tensors="np",
+        )
+        mask = encoded["attention_mask"].astype(np.int64)
+        feeds = {
+            name: (
+                encoded[name].astype(np.int64)
+                if name in encoded
+                else np.zeros_like(mask)  # token_type_ids when the tokenizer omits them
+            )
+            for name in self._input_names
+        }
+        hidden = self._session.run(None, feeds)[0]
+        weights = mask[:, :, None].astype(np.float32)
+        pooled = (hidden * weights).sum(axis=1) / np.maximum(weights.sum(axis=1), 1e-9)
+        pooled /= np.maximum(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12)
+        return pooled.tolist()
+
+    def _load(self) -> None:
+        if self._session is not None:
+            return
+        with self._load_lock:
+            if self._session is not None:
+                return
+            try:
+                import onnxruntime as ort
+            except ImportError as e:
+                raise RuntimeError(
+                    "EMBEDDING_BACKEND=onnx needs onnxruntime (`poetry run pip install onnxruntime`)"
+                ) from e
+
+            path = self.model_path or self._download()
+            options = ort.SessionOptions()
+            if self.intra_op_threads:
+                options.intra_op_num_threads = self.intra_op_threads
+            options.inter_op_num_threads = 1
+            options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+            session = ort.InferenceSession(
+                path, sess_options=options, providers=["CPUExecutionProvider"]
+            )
+            self._tokenizer = get_tokenizer(self.repo)
+            self._input_names = [i.name for i in session.get_inputs()]
+            self._session = session
+            logger.info(
+                f"Loaded ONNX embedder {os.path.basename(path)} "
+                f"(intra-op threads: {self.intra_op_threads or 'default'})"
+            )
+
+    def _download(self) -> str:
+        from huggingface_hub import hf_hub_download
+
+        filename = "onnx/model_quantized.onnx" if self.quantized else "onnx/model.onnx"
+        return hf_hub_download(self.repo, filename)
@@ -0,0 +1,363 @@
+"""Content-addressed on-disk cache for PDFs and converted Docling documents."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def sha256_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def sha256_file(path: str, chunk_size: int = 1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class PdfCache:
+    """
+    Stores raw PDFs and serialized DoclingDocuments keyed by the SHA-256 of
+    the PDF bytes, plus an arXiv id -> hash index.
+
+    Layout under ``root``::
+
+        pdf/<sha>.pdf
+        doc/<sha>-<options>.json
+        arxiv.json
+        tmp/  (callers' private links, never evicted)
+
+    Files are evicted least-recently-used (by mtime, refreshed on every hit)
+    once the cache grows past ``max_bytes``; a file is never evicted by the
+    call that stores it. Unversioned arXiv ids
+    ("2101.00001") can point at a new version later, so their index entries
+    expire after ``unversioned_ttl`` seconds; versioned ids never do.
+    """
+
+    def __init__(
+        self,
+        root: Optional[str] = None,
+        max_bytes: Optional[int] = None,
+        unversioned_ttl: Optional[float] = None,
+        enabled: Optional[bool] = None,
+    ):
+        self.root = root or settings.pdf_cache_dir
+        self.max_bytes = (
+            max_bytes if max_bytes is not None else settings.pdf_cache_max_bytes
+        )
+        self.unversioned_ttl = (
+            unversioned_ttl
+            if unversioned_ttl is not None
+            else settings.pdf_cache_unversioned_ttl
+        )
+        self.enabled = settings.pdf_cache_enabled if enabled is None else enabled
+        self._lock = threading.Lock()
+        self._stats: Dict[str, int] = {
+            "pdf_hits": 0,
+            "pdf_misses": 0,
+            "doc_hits": 0,
+            "doc_misses": 0,
+            "evictions": 0,
+        }
+        self._arxiv_index: Optional[Dict[str, Dict[str, Any]]] = None
+
+    # Paths
+
+    def _pdf_path(self, sha: str) -> str:
+        return os.path.join(self.root, "pdf", f"{sha}.pdf")
+
+    def _doc_path(self, sha: str, options_key: str) -> str:
+        return os.path.join(self.root, "doc", f"{sha}-{options_key}.json")
+
+    def _index_path(self) -> str:
+        return os.path.join(self.root, "arxiv.json")
+
+    # Raw PDFs
+
+    def get_pdf(self, sha: str) -> Optional[bytes]:
+        if not self.enabled:
+            return None
+        path = self._pdf_path(sha)
+        data = self._read(path, "pdf")
+        return data
+
+    def put_pdf(self, pdf_bytes: bytes, arxiv_id: Optional[str] = None) -> str:
+        sha = sha256_bytes(pdf_bytes)
+        if not self.enabled:
+            return sha
+        path = self._pdf_path(sha)
+        self._write(path, pdf_bytes)
+        if arxiv_id:
+            self._index_arxiv(arxiv_id, sha)
+        self._evict(keep=path)
+        return sha
+
+    def put_pdf_file(
+        self,
+        path: str,
+        sha: str,
+        arxiv_id: Optional[str] = None,
+        keep_source: bool = False,
+    ) -> Optional[str]:
+        """
+        Move an already-downloaded PDF into the cache and return its cached
+        path, or None (leaving ``path`` untouched) when caching is disabled.
+        With ``keep_source`` the file is hard-linked (copied across
+        filesystems) instead, so ``path`` stays the caller's own copy.
+        """
+        if not self.enabled:
+            return None
+        dest = self._pdf_path(sha)
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        if keep_source:
+            self._link(path, dest)
+        else:
+            try:
+                os.replace(path, dest)
+            except OSError:
+                # Temp dir on another filesystem
+                shutil.move(path, dest)
+        if arxiv_id:
+            self._index_arxiv(arxiv_id, sha)
+        self._evict(keep=dest)
+        return dest
+
+    def scratch_dir(self) -> Optional[str]:
+        """
+        Directory for the caller's private files, on the cache's filesystem
+        so ``put_pdf_file(..., keep_source=True)`` and ``pin_pdf`` can
+        hard-link. Eviction never looks in it. None when caching is disabled.
+        """
+        if not self.enabled:
+            return None
+        path = os.path.join(self.root, "tmp")
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def pin_pdf(self, sha: str) -> Optional[str]:
+        """
+        Link the cached PDF to a private path in ``scratch_dir`` that stays
+        readable however the cache is evicted, until the caller removes it.
+        None when the PDF is not (or no longer) cached.
+        """
+        folder = self.scratch_dir()
+        if folder is None:
+            return None
+        fd, pinned = tempfile.mkstemp(dir=folder, suffix=".pdf")
+        os.close(fd)
+        os.remove(pinned)
+        try:
+            self._link(self._pdf_path(sha), pinned)
+        except OSError:
+            self._remove(pinned)
+            return None
+        return pinned
+
+    def get_pdf_path_for_arxiv(self, arxiv_id: str) -> Optional[Tuple[str, str]]:
+        """Return (path, sha) of the cached PDF for an arXiv id, if fresh."""
+        if not self.enabled:
+            return None
+        sha = self._fresh_sha(arxiv_id)
+        path = self._pdf_path(sha) if sha else None
+        if path is None or not os.path.exists(path):
+            self._count("pdf_misses")
+            return None
+        _touch(path)
+        self._count("pdf_hits")
+        return path, sha
+
+    def get_pdf_for_arxiv(self, arxiv_id: str) -> Optional[bytes]:
+        """Return the cached PDF for an arXiv id, if its index entry is fresh."""
+        if not self.enabled:
+            return None
+        sha = self._fresh_sha(arxiv_id)
+        if sha is None:
+            self._count("pdf_misses")
+            return None
+        return self.get_pdf(sha)
+
+    def _fresh_sha(self, arxiv_id: str) -> Optional[str]:
+        with self._lock:
+            entry = self._load_index().get(arxiv_id)
+        fresh = entry is not None and (
+            _is_versioned(arxiv_id)
+            or time.time() - entry.get("stored_at", 0) < self.unversioned_ttl
+        )
+        return entry["sha"] if fresh else None
+
+    # Converted documents
+
+    def get_document(
+        self, sha: str, options_key: str, load: Callable[[str], Any]
+    ) -> Any:
+        """Return ``load(path)`` for a cached document, or None on a miss."""
+        if not self.enabled:
+            return None
+        path = self._doc_path(sha, options_key)
+        if not os.path.exists(path):
+            self._count("doc_misses")
+            return None
+        try:
+            doc = load(path)
+        except Exception as e:
+            logger.warning(f"Discarding unreadable cached document {path}: {e}")
+            self._remove(path)
+            self._count("doc_misses")
+            return None
+        _touch(path)
+        self._count("doc_hits")
+        return doc
+
+    def put_document(
+        self, sha: str, options_key: str, save: Callable[[str], None]
+    ) -> None:
+        """Persist a document with ``save(path)``, writing atomically."""
+        if not self.enabled:
+            return
+        path = self._doc_path(sha, options_key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        os.close(fd)
+        try:
+            save(tmp)
+            os.replace(tmp, path)
+        except Exception as e:
+            logger.warning(f"Failed to cache document {sha}: {e}")
+            self._remove(tmp)
+            return
+        self._evict(keep=path)
+
+    # Bookkeeping
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats: Dict[str, Any] = dict(self._stats)
+        for kind in ("pdf", "doc"):
+            lookups = stats[f"{kind}_hits"] + stats[f"{kind}_misses"]
+            stats[f"{kind}_hit_rate"] = (
+                stats[f"{kind}_hits"] / lookups if lookups else 0.0
+            )
+        stats["size_bytes"] = sum(size for _, size, _ in self._files())
+        stats["max_bytes"] = self.max_bytes
+        return stats
+
+    def clear(self) -> None:
+        for path, _, _ in self._files():
+            self._remove(path)
+        with self._lock:
+            self._arxiv_index = {}
+            self._save_index({})
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self._stats[key] += 1
+
+    def _read(self, path: str, kind: str) -> Optional[bytes]:
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            self._count(f"{kind}_misses")
+            return None
+        _touch(path)
+        self._count(f"{kind}_hits")
+        return data
+
+    def _write(self, path: str, data: bytes) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def _files(self):
+        for sub in ("pdf", "doc"):
+            folder = os.path.join(self.root, sub)
+            if not os.path.isdir(folder):
+                continue
+            for name in os.listdir(folder):
+                if name.endswith(".tmp"):
+                    continue
+                path = os.path.join(folder, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                yield path, st.st_size, st.st_mtime
+
+    def _evict(self, keep: Optional[str] = None) -> None:
+        """Drop LRU files past ``max_bytes``, sparing ``keep`` (just written)."""
+        files = sorted(self._files(), key=lambda f: f[2])
+        total = sum(size for _, size, _ in files)
+        for path, size, _ in files:
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            self._remove(path)
+            total -= size
+            self._count("evictions")
+
+    @staticmethod
+    def _link(src: str, dest: str) -> None:
+        try:
+            os.link(src, dest)
+        except FileNotFoundError:
+            raise
+        except OSError:
+            # No hard links across filesystems (or on this one)
+            shutil.copyfile(src, dest)
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _index_arxiv(self, arxiv_id: str, sha: str) -> None:
+        with self._lock:
+            index = self._load_index()
+            index[arxiv_id] = {"sha": sha, "stored_at": time.time()}
+            self._save_index(index)
+
+    def _load_index(self) -> Dict[str, Dict[str, Any]]:
+        if self._arxiv_index is None:
+            try:
+                with open(self._index_path(), "r", encoding="utf-8") as f:
+                    self._arxiv_index = json.load(f)
+            except (OSError, ValueError):
+                self._arxiv_index = {}
+        return self._arxiv_index
+
+    def _save_index(self, index: Dict[str, Dict[str, Any]]) -> None:
+        self._write(self._index_path(), json.dumps(index).encode("utf-8"))
+
+
+def _is_versioned(arxiv_id: str) -> bool:
+    head, sep, version = arxiv_id.rpartition("v")
+    return bool(sep and head and version.isdigit())
+
+
+def _touch(path: str) -> None:
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+pdf_cache = PdfCache()
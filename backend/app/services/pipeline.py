@@ -0,0 +1,121 @@
+"""Threaded multi-stage pipeline with bounded queues between stages."""
+
+from __future__ import annotations
+
+import queue
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, List, Optional
+
+_DONE = object()
+
+
+@dataclass
+class Stage:
+    """One pipeline stage: ``fn`` maps an item's value to the next value."""
+
+    name: str
+    fn: Callable[[Any], Any]
+    workers: int = 1
+
+
+@dataclass
+class PipelineItem:
+    index: int
+    key: Any
+    value: Any
+    error: Optional[str] = None
+    failed_stage: Optional[str] = None
+
+
+def run_pipeline(
+    items: Iterable[Any],
+    stages: List[Stage],
+    queue_size: int = 4,
+    key: Callable[[Any], Any] = lambda item: item,
+    on_item_done: Optional[Callable[[PipelineItem], None]] = None,
+) -> List[PipelineItem]:
+    """
+    Push ``items`` through ``stages`` concurrently.
+
+    Every stage runs on its own worker threads and hands results to the next
+    stage through a queue holding at most ``queue_size`` items, so a slow
+    stage applies back-pressure instead of letting work pile up in memory.
+    Total wall time approaches that of the slowest stage rather than the sum
+    of all of them.
+
+    An exception in a stage marks that item as failed; it skips the
+    remaining stages while other items continue. Results are returned in
+    input order.
+    """
+    if not stages:
+        raise ValueError("run_pipeline needs at least one stage")
+
+    queues: List["queue.Queue[Any]"] = [
+        queue.Queue(maxsize=max(1, queue_size)) for _ in stages
+    ]
+    results: List[PipelineItem] = []
+    results_lock = threading.Lock()
+    threads: List[threading.Thread] = []
+
+    def feed() -> None:
+        for index, item in enumerate(items):
+            queues[0].put(PipelineItem(index=index, key=key(item), value=item))
+        for _ in range(max(1, stages[0].workers)):
+            queues[0].put(_DONE)
+
+    def make_worker(stage_index: int, remaining: List[int], lock: threading.Lock):
+        stage = stages[stage_index]
+        is_last = stage_index == len(stages) - 1
+
+        def work() -> None:
+            while True:
+                entry = queues[stage_index].get()
+                if entry is _DONE:
+                    break
+                if entry.error is None:
+                    try:
+                        entry.value = stage.fn(entry.value)
+                    except Exception as e:
+                        entry.error = str(e)
+                        entry.failed_stage = stage.name
+                if is_last:
+                    with results_lock:
+                        results.append(entry)
+                    if on_item_done is not None:
+                        on_item_done(entry)
+                else:
+                    queues[stage_index + 1].put(entry)
+
+            # The last worker of a stage to finish closes the next stage
+            with lock:
+                remaining[0] -= 1
+                last_out = remaining[0] == 0
+            if last_out and not is_last:
+                for _ in range(max(1, stages[stage_index + 1].workers)):
+                    queues[stage_index + 1].put(_DONE)
+
+        return work
+
+    for i, stage in enumerate(stages):
+        workers = max(1, stage.workers)
+        remaining = [workers]
+        lock = threading.Lock()
+        for n in range(workers):
+            t = threading.Thread(
+                target=make_worker(i, remaining, lock),
+                name=f"pipeline-{stage.name}-{n}",
+                daemon=True,
+            )
+            threads.append(t)
+
+    feeder = threading.Thread(target=feed, name="pipeline-feed", daemon=True)
+    for t in threads:
+        t.start()
+    feeder.start()
+
+    feeder.join()
+    for t in threads:
+        t.join()
+
+    return sorted(results, key=lambda r: r.index)
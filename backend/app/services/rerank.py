@@ -0,0 +1,98 @@
+"""Diversity re-ranking of retrieved chunks over their stored embeddings."""
+
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from app.core.config import settings
+
+
+def _unit_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def collapse_duplicates(vectors: np.ndarray, threshold: float) -> List[int]:
+    """
+    Indices of ``vectors`` (assumed best first) left after dropping every
+    row whose cosine similarity to an earlier kept row is at least
+    ``threshold``.
+    """
+    if not len(vectors) or threshold >= 1.0:
+        return list(range(len(vectors)))
+    unit = _unit_rows(np.asarray(vectors, dtype=np.float32))
+    similar = np.triu(unit @ unit.T >= threshold, k=1)
+    dropped = np.zeros(len(unit), dtype=bool)
+    for i in range(len(unit)):
+        if not dropped[i]:
+            dropped |= similar[i]
+    return [i for i in range(len(unit)) if not dropped[i]]
+
+
+def mmr(
+    query_vectors: np.ndarray, vectors: np.ndarray, k: int, lambda_mult: float
+) -> List[int]:
+    """
+    Maximal Marginal Relevance: greedily pick ``k`` rows of ``vectors``
+    maximizing ``lambda_mult * relevance - (1 - lambda_mult) * redundancy``,
+    where relevance is the best cosine similarity to any query and
+    redundancy the highest similarity to a row already picked.
+    """
+    if not len(vectors) or k <= 0:
+        return []
+    unit = _unit_rows(np.asarray(vectors, dtype=np.float32))
+    queries = np.atleast_2d(np.asarray(query_vectors, dtype=np.float32))
+    # Stored vectors may be Matryoshka-truncated; compare in their space
+    queries = _unit_rows(queries[:, : unit.shape[1]])
+    relevance = (unit @ queries.T).max(axis=1)
+    similarity = unit @ unit.T
+
+    redundancy = np.zeros(len(unit), dtype=np.float32)
+    available = np.ones(len(unit), dtype=bool)
+    picked: List[int] = []
+    for _ in range(min(k, len(unit))):
+        scores = lambda_mult * relevance - (1.0 - lambda_mult) * redundancy
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        picked.append(best)
+        available[best] = False
+        redundancy = np.maximum(redundancy, similarity[best])
+    return picked
+
+
+def diversify_results(
+    result: Dict[str, Any],
+    query_vectors: Sequence[Sequence[float]],
+    k: int,
+    lambda_mult: Optional[float] = None,
+    dedup_threshold: Optional[float] = None,
+) -> Dict[str, Any]:
+    """
+    Re-rank the first row of a query result that includes embeddings:
+    collapse near-duplicates, then pick ``k`` chunks by MMR. Returns the
+    result shape without embeddings. ``lambda_mult`` 1.0 keeps the
+    retrieval order and ``dedup_threshold`` 1.0 keeps duplicates.
+    """
+    lambda_mult = settings.mmr_lambda if lambda_mult is None else lambda_mult
+    dedup_threshold = (
+        settings.dedup_threshold if dedup_threshold is None else dedup_threshold
+    )
+    keys = ("ids", "documents", "metadatas", "distances")
+    rows = {key: list((result.get(key) or [[]])[0]) for key in keys}
+    embeddings = (result.get("embeddings") or [[]])[0]
+    if embeddings is None or not len(embeddings):
+        return {key: [rows[key][:k]] for key in keys}
+
+    matrix = np.asarray([np.asarray(e, dtype=np.float32) for e in embeddings])
+    kept = collapse_duplicates(matrix, dedup_threshold)
+    if lambda_mult >= 1.0:
+        order = kept[:k]
+    else:
+        picked = mmr(
+            np.asarray(query_vectors, dtype=np.float32), matrix[kept], k, lambda_mult
+        )
+        order = [kept[i] for i in picked]
+    return {key: [[rows[key][i] for i in order if i < len(rows[key])]] for key in keys}
@@ -0,0 +1,103 @@
+"""Cache of search results, invalidated when their papers change."""
+
+from __future__ import annotations
+
+import threading
+from typing import Any, Dict, Hashable, Iterable, Optional, Sequence, Set, Tuple
+
+from app.core.config import settings
+from app.services.ttl_cache import TtlLruCache
+
+# Index entry for searches not scoped to any paper: any write invalidates them
+_UNSCOPED = "*"
+
+
+class RetrievalCache:
+    """
+    Search results keyed by (normalized queries, sorted doc_ids, top_k,
+    filters), held in a ``TtlLruCache``.
+
+    Reading groups ask the same questions over the same papers, so a hit
+    skips both the query embedding and the Chroma round trips. Entries are
+    indexed by the papers they were scoped to and dropped by ``invalidate``
+    when one of those papers is written or deleted; a version check keeps
+    a result computed concurrently with such a write out of the cache.
+    """
+
+    def __init__(self, maxsize: Optional[int] = None, ttl: Optional[float] = None):
+        self._cache: TtlLruCache[Any] = TtlLruCache(
+            settings.retrieval_cache_size if maxsize is None else maxsize,
+            settings.retrieval_cache_ttl if ttl is None else ttl,
+        )
+        self._lock = threading.Lock()
+        self._keys_by_doc: Dict[str, Set[Hashable]] = {}
+        self._version = 0
+        self._invalidations = 0
+        self._puts = 0  # since the index was last pruned
+
+    @staticmethod
+    def key(
+        queries: Sequence[str],
+        doc_ids: Optional[Iterable[str]],
+        top_k: Any,
+        **filters: Any,
+    ) -> Tuple[Any, ...]:
+        normalized = tuple(" ".join(q.split()).casefold() for q in queries)
+        scope = tuple(sorted(set(doc_ids or ())))
+        return (normalized, scope, top_k, tuple(sorted(filters.items())))
+
+    def version(self) -> int:
+        """Pass to ``put`` so a result that raced a write is not cached."""
+        return self._version
+
+    def get(self, key: Tuple[Any, ...]) -> Optional[Any]:
+        return self._cache.get(key)
+
+    def put(
+        self, key: Tuple[Any, ...], value: Any, version: Optional[int] = None
+    ) -> None:
+        with self._lock:
+            if version is not None and version != self._version:
+                return
+            self._cache.put(key, value)
+            for doc_id in key[1] or (_UNSCOPED,):
+                self._keys_by_doc.setdefault(doc_id, set()).add(key)
+            self._puts += 1
+            if self._puts >= max(1, self._cache.maxsize):
+                self._prune()
+
+    def invalidate(self, doc_ids: Iterable[str]) -> int:
+        """Drop every cached result scoped to any of ``doc_ids``."""
+        dropped: Set[Hashable] = set()
+        with self._lock:
+            self._version += 1
+            for doc_id in {*doc_ids, _UNSCOPED}:
+                dropped |= self._keys_by_doc.pop(doc_id, set())
+            for key in dropped:
+                self._cache.pop(key)
+            self._invalidations += len(dropped)
+        return len(dropped)
+
+    def stats(self) -> Dict[str, Any]:
+        stats = self._cache.stats()
+        stats["invalidated"] = self._invalidations
+        return stats
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+            self._keys_by_doc.clear()
+
+    def _prune(self) -> None:
+        """Forget index entries for keys the LRU already evicted."""
+        self._puts = 0
+        live = set(self._cache.keys())
+        for doc_id in list(self._keys_by_doc):
+            keys = self._keys_by_doc[doc_id] & live
+            if keys:
+                self._keys_by_doc[doc_id] = keys
+            else:
+                del self._keys_by_doc[doc_id]
+
+
+retrieval_cache = RetrievalCache()
@@ -0,0 +1,144 @@
+"""Per-paper float32 vectors held in memory for exact scoped search."""
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+
+
+class _Paper:
+    __slots__ = ("ids", "matrix", "documents", "metadatas", "nbytes")
+
+    def __init__(
+        self,
+        ids: List[str],
+        matrix: np.ndarray,
+        documents: List[Any],
+        metadatas: List[Any],
+    ):
+        self.ids = ids
+        self.matrix = matrix
+        self.documents = documents
+        self.metadatas = metadatas
+        # Vectors dominate; count a rough 1 KiB per chunk for text and metadata
+        self.nbytes = matrix.nbytes + 1024 * len(ids)
+
+
+class VectorCache:
+    """
+    Embeddings, documents and metadatas of recently searched papers.
+
+    Chat searches are scoped to a handful of papers, so scoring all of
+    their chunks with one matrix product is exact and cheaper than a
+    filtered HNSW query over the whole collection. Entries are keyed by
+    (collection, doc_id), read from Chroma on first use, dropped when the
+    paper is written to or deleted from, and evicted least recently used
+    beyond ``max_bytes``.
+    """
+
+    def __init__(self, max_bytes: Optional[int] = None):
+        self.max_bytes = (
+            max_bytes
+            if max_bytes is not None
+            else settings.vector_cache_max_mb * 1024 * 1024
+        )
+        self._lock = threading.Lock()
+        self._papers: "OrderedDict[Tuple[str, str], _Paper]" = OrderedDict()
+        self._owner: Dict[Tuple[str, str], str] = {}  # (collection, chunk id) -> doc_id
+        self._bytes = 0
+        self._version = 0  # bumped by every invalidation
+        self.hits = 0
+        self.misses = 0
+
+    def version(self) -> int:
+        """Pass to ``put`` so a read that raced a write is not cached."""
+        return self._version
+
+    def get(self, collection: str, doc_id: str) -> Optional[_Paper]:
+        with self._lock:
+            paper = self._papers.get((collection, doc_id))
+            if paper is None:
+                self.misses += 1
+                return None
+            self._papers.move_to_end((collection, doc_id))
+            self.hits += 1
+            return paper
+
+    def put(
+        self,
+        collection: str,
+        doc_id: str,
+        ids: Sequence[str],
+        embeddings: Any,
+        documents: Sequence[Any],
+        metadatas: Sequence[Any],
+        version: Optional[int] = None,
+    ) -> _Paper:
+        """
+        Store a paper read from Chroma. Papers larger than the budget, or
+        read before a write to the collection landed, are returned uncached.
+        """
+        matrix = np.asarray(embeddings, dtype=np.float32).reshape(
+            len(ids), -1 if ids else 0
+        )
+        paper = _Paper(list(ids), matrix, list(documents), list(metadatas))
+        if paper.nbytes > self.max_bytes:
+            return paper
+        with self._lock:
+            if version is not None and version != self._version:
+                return paper
+            self._drop((collection, doc_id))
+            self._papers[(collection, doc_id)] = paper
+            self._bytes += paper.nbytes
+            for chunk_id in paper.ids:
+                self._owner[(collection, chunk_id)] = doc_id
+            while self._bytes > self.max_bytes:
+                self._drop(next(iter(self._papers)))
+        return paper
+
+    def invalidate(self, collection: str, doc_ids: Iterable[str]) -> None:
+        with self._lock:
+            self._version += 1
+            for doc_id in set(doc_ids):
+                self._drop((collection, doc_id))
+
+    def invalidate_ids(self, collection: str, ids: Iterable[str]) -> None:
+        """Drop the papers owning any of ``ids`` (used on deletes)."""
+        with self._lock:
+            self._version += 1
+            for chunk_id in ids:
+                doc_id = self._owner.get((collection, chunk_id))
+                if doc_id is not None:
+                    self._drop((collection, doc_id))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "papers": len(self._papers),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._papers.clear()
+            self._owner.clear()
+            self._bytes = 0
+
+    def _drop(self, key: Tuple[str, str]) -> None:
+        paper = self._papers.pop(key, None)
+        if paper is None:
+            return
+        self._bytes -= paper.nbytes
+        for chunk_id in paper.ids:
+            self._owner.pop((key[0], chunk_id), None)
+
+
+vector_cache = VectorCache()
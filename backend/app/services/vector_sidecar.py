@@ -0,0 +1,203 @@
+"""Compact int8/float16 copy of a Chroma collection for first-stage search."""
+
+from __future__ import annotations
+
+import logging
+import os
+import tempfile
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+SIDECAR_DTYPES = ("int8", "float16")
+
+
+def quantize(vectors: np.ndarray, dtype: str) -> Tuple[np.ndarray, np.ndarray]:
+    """Return (quantized rows, per-row scales) for float32 ``vectors``."""
+    if dtype == "float16":
+        return vectors.astype(np.float16), np.ones(len(vectors), dtype=np.float32)
+    # Symmetric per-vector int8: v ~= q * scale
+    scales = np.abs(vectors).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    q = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+    return q, scales.astype(np.float32)
+
+
+class VectorSidecar:
+    """
+    Quantized vectors of one collection, kept on disk next to Chroma.
+
+    ``search`` ranks by approximate inner product over the compact matrix
+    (4x smaller than float32 for int8, 2x for float16); callers rescore the
+    returned candidates with the full-precision vectors held by Chroma.
+    The file is rewritten after every change, which is cheap next to the
+    embedding work that produces the change; bulk loads pass ``save=False``
+    and call ``save`` once.
+    """
+
+    def __init__(self, path: str, dtype: str):
+        if dtype not in SIDECAR_DTYPES:
+            raise ValueError(f"Unsupported sidecar dtype: {dtype!r}")
+        self.path = path
+        self.dtype = dtype
+        self.verified = False  # compared against the collection this process
+        self._lock = threading.Lock()
+        self._ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._doc_ids = np.array([], dtype=str)
+        self._data: Optional[np.ndarray] = None
+        self._scales = np.zeros(0, dtype=np.float32)
+        self._load()
+
+    def count(self) -> int:
+        return len(self._ids)
+
+    def nbytes(self) -> int:
+        return 0 if self._data is None else int(self._data.nbytes + self._scales.nbytes)
+
+    def upsert(
+        self,
+        ids: Sequence[str],
+        doc_ids: Sequence[str],
+        embeddings: Sequence[Sequence[float]],
+        save: bool = True,
+    ) -> None:
+        if not ids:
+            return
+        q, scales = quantize(np.asarray(embeddings, dtype=np.float32), self.dtype)
+        with self._lock:
+            if self._data is not None and self._data.shape[1] != q.shape[1]:
+                raise ValueError(
+                    f"Sidecar holds {self._data.shape[1]}-d vectors, got {q.shape[1]}-d"
+                )
+            new = [i for i, _id in enumerate(ids) if _id not in self._rows]
+            old = [i for i, _id in enumerate(ids) if _id in self._rows]
+            if old:
+                rows = [self._rows[ids[i]] for i in old]
+                self._data[rows] = q[old]
+                self._scales[rows] = scales[old]
+                self._doc_ids[rows] = [doc_ids[i] for i in old]
+            if new:
+                for i in new:
+                    self._rows[ids[i]] = len(self._ids)
+                    self._ids.append(ids[i])
+                self._data = (
+                    q[new] if self._data is None else np.vstack([self._data, q[new]])
+                )
+                self._scales = np.concatenate([self._scales, scales[new]])
+                self._doc_ids = np.concatenate(
+                    [self._doc_ids, np.array([doc_ids[i] for i in new], dtype=str)]
+                )
+            if save:
+                self._save()
+
+    def remove(self, ids: Sequence[str]) -> None:
+        with self._lock:
+            drop = {self._rows[_id] for _id in ids if _id in self._rows}
+            if not drop:
+                return
+            keep = [r for r in range(len(self._ids)) if r not in drop]
+            self._ids = [self._ids[r] for r in keep]
+            self._rows = {_id: r for r, _id in enumerate(self._ids)}
+            self._data = self._data[keep] if keep else None
+            self._scales = self._scales[keep]
+            self._doc_ids = self._doc_ids[keep]
+            self._save()
+
+    def clear(self, save: bool = True) -> None:
+        with self._lock:
+            self._ids, self._rows = [], {}
+            self._data = None
+            self._scales = np.zeros(0, dtype=np.float32)
+            self._doc_ids = np.array([], dtype=str)
+            if save:
+                self._save()
+
+    def save(self) -> None:
+        with self._lock:
+            self._save()
+
+    def search(
+        self,
+        query: Sequence[float],
+        k: int,
+        doc_ids: Optional[Sequence[str]] = None,
+    ) -> List[str]:
+        """Ids of the ``k`` rows with the highest approximate inner product."""
+        with self._lock:
+            if self._data is None or k <= 0:
+                return []
+            rows = np.arange(len(self._ids))
+            if doc_ids is not None:
+                rows = rows[np.isin(self._doc_ids, list(doc_ids))]
+            if not len(rows):
+                return []
+            q = np.asarray(query, dtype=np.float32)
+            scores = (self._data[rows].astype(np.float32) @ q) * self._scales[rows]
+            top = rows[np.argsort(-scores)[:k]]
+            return [self._ids[r] for r in top]
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        try:
+            with np.load(self.path, allow_pickle=False) as f:
+                if str(f["dtype"]) != self.dtype:
+                    logger.info(
+                        f"Sidecar {self.path} has dtype {f['dtype']}; rebuilding"
+                    )
+                    return
+                self._ids = [str(x) for x in f["ids"]]
+                self._doc_ids = f["doc_ids"].astype(str)
+                self._data = f["data"] if len(self._ids) else None
+                self._scales = f["scales"]
+        except Exception as e:
+            logger.warning(f"Discarding unreadable sidecar {self.path}: {e}")
+            self._ids = []
+        self._rows = {_id: r for r, _id in enumerate(self._ids)}
+
+    def _save(self) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(
+            dir=os.path.dirname(os.path.abspath(self.path)), suffix=".tmp"
+        )
+        with os.fdopen(fd, "wb") as f:
+            np.savez(
+                f,
+                dtype=np.array(self.dtype),
+                ids=np.array(self._ids, dtype=str),
+                doc_ids=self._doc_ids,
+                data=(
+                    self._data if self._data is not None else np.zeros((0, 0), np.int8)
+                ),
+                scales=self._scales,
+            )
+        os.replace(tmp, self.path)
+
+
+_sidecars: Dict[str, VectorSidecar] = {}
+_sidecars_lock = threading.Lock()
+
+
+def get_sidecar(collection_name: str) -> Optional[VectorSidecar]:
+    """The process-wide sidecar of ``collection_name``, or None if disabled."""
+    dtype = settings.vector_sidecar
+    if not dtype:
+        return None
+    path = os.path.join(settings.vector_sidecar_dir, f"{collection_name}.{dtype}.npz")
+    with _sidecars_lock:
+        sidecar = _sidecars.get(path)
+        if sidecar is None:
+            sidecar = VectorSidecar(path, dtype)
+            _sidecars[path] = sidecar
+    return sidecar
+
+
+def reset_sidecars() -> None:
+    with _sidecars_lock:
+        _sidecars.clear()
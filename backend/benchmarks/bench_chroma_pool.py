@@ -0,0 +1,113 @@
+"""
+Micro-benchmark: request latency with a fresh ChromaService per request
+("before") versus the application-scoped pool ("after").
+
+Runs against the local persistent store configured in settings. The embedder
+and the Gemini agent are replaced with fakes so only the retrieval plumbing
+of /gemini/chat_agent is measured.
+
+Usage:
+    poetry run python -m benchmarks.bench_chroma_pool --requests 50
+"""
+
+import argparse
+import statistics
+import time
+from typing import Callable, List
+
+from fastapi.testclient import TestClient
+
+from app.api import routes_gemini
+from app.main import app
+from app.services.agent_service import create_search_tools
+from app.services.chroma_service import ChromaService, chroma_pool, get_chroma
+from app.services.embedding_service import get_embedder
+
+
+class FakeEmbedder:
+    def __init__(self, dim: int = 768):
+        self._vec = [0.0] * (dim - 1) + [1.0]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._vec
+
+
+class FakeAgent:
+    """Runs the real search tool once instead of calling Gemini."""
+
+    def __init__(self, tool):
+        self._tool = tool
+
+    async def astream(self, *args, **kwargs):
+        self._tool.invoke({"query": "benchmark"})
+        return
+        yield
+
+
+def _fresh_chroma():
+    yield ChromaService()
+
+
+def _timed(label: str, fn: Callable[[], None], n: int) -> List[float]:
+    fn()  # warm-up request
+    samples = []
+    for _ in range(n):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    print(
+        f"{label:<28} p50={statistics.median(samples):8.2f} ms  "
+        f"p95={samples[int(len(samples) * 0.95) - 1]:8.2f} ms"
+    )
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--doc-id", default="2101.00001")
+    args = parser.parse_args()
+
+    app.dependency_overrides[get_embedder] = lambda: FakeEmbedder()
+    client = TestClient(app)
+    chat_body = {"prompt": "benchmark", "doc_ids": [args.doc_id]}
+
+    for mode in ("before", "after"):
+        fresh = mode == "before"
+        if fresh:
+            app.dependency_overrides[get_chroma] = _fresh_chroma
+        else:
+            app.dependency_overrides.pop(get_chroma, None)
+            chroma_pool.open()
+
+        def fake_agent(embedder, doc_ids, sources_tracker, **kwargs):
+            tool = create_search_tools(
+                embedder,
+                doc_ids,
+                sources_tracker,
+                chroma_service=ChromaService() if fresh else None,
+            )
+            return FakeAgent(tool)
+
+        routes_gemini.create_document_agent = fake_agent
+
+        print(f"--- {mode} ---")
+        _timed(
+            "/library/list",
+            lambda: client.get("/library/list").raise_for_status(),
+            args.requests,
+        )
+        _timed(
+            "/gemini/chat_agent",
+            lambda: client.post(
+                "/gemini/chat_agent", json=chat_body
+            ).raise_for_status(),
+            args.requests,
+        )
+
+    chroma_pool.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Benchmark: text embedding throughput of the gpt4all ("nomic") backend
+versus ONNX Runtime, fp32 and int8, on the same synthetic chunks.
+
+Also reports how closely each ONNX variant agrees with the gpt4all vectors
+(mean cosine similarity), since both must serve the same collection.
+The embedding cache is disabled so every text reaches the model.
+
+Usage:
+    poetry run python -m benchmarks.bench_embed_backends --texts 256
+    poetry run python -m benchmarks.bench_embed_backends --threads 4
+"""
+
+import argparse
+import random
+import time
+
+import numpy as np
+
+from app.core.config import settings
+
+
+def make_texts(n: int, seed: int = 0) -> list[str]:
+    rng = random.Random(seed)
+    words = (
+        "attention transformer layer model token graph network loss data train".split()
+    )
+    return [" ".join(rng.choices(words, k=rng.randint(40, 300))) for _ in range(n)]
+
+
+def run(backend: str, quantized: bool, texts: list[str]) -> tuple[float, np.ndarray]:
+    from app.services.embedding_cache import EmbeddingCache
+    from app.services.embedding_service import NomicEmbeddingService
+
+    settings.embedding_backend = backend
+    settings.onnx_quantized = quantized
+    service = NomicEmbeddingService(cache=EmbeddingCache(enabled=False))
+    service.embed_texts(texts[:4])  # load the model outside the timing
+    start = time.perf_counter()
+    vectors = np.asarray(service.embed_texts(texts), dtype=np.float32)
+    return time.perf_counter() - start, vectors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--texts", type=int, default=256)
+    parser.add_argument("--threads", type=int, default=settings.onnx_intra_op_threads)
+    args = parser.parse_args()
+    settings.onnx_intra_op_threads = args.threads
+
+    texts = make_texts(args.texts)
+    reference = None
+    for label, backend, quantized in (
+        ("nomic", "nomic", False),
+        ("onnx", "onnx", False),
+        ("onnx-int8", "onnx", True),
+    ):
+        seconds, vectors = run(backend, quantized, texts)
+        line = f"{label:<10} {len(texts) / seconds:8.1f} texts/s  ({seconds:.2f} s)"
+        if reference is None:
+            reference = vectors
+        else:
+            line += f"  cosine vs nomic={float((vectors * reference).sum(axis=1).mean()):.4f}"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""
+Benchmark: whole-document ingestion ("before") versus page-windowed
+ingestion ("after") of one long PDF.
+
+Reports time until the first chunks are written to Chroma, total time and
+peak RSS. Each mode runs in its own subprocess so peak RSS is not shared.
+Conversion runs in-process (DOCLING_WORKERS=0) so its memory is counted,
+the PDF/document cache is bypassed, Chroma writes go to a temporary store,
+and embeddings are faked unless --real-embedder is given.
+
+Usage:
+    poetry run python -m benchmarks.bench_windowed_ingest --pdf long-paper.pdf
+    poetry run python -m benchmarks.bench_windowed_ingest --arxiv 2303.08774 --window 8
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import List
+
+import psutil
+
+from app.core.config import settings
+
+
+class FakeEmbedder:
+    def __init__(self, dim: int = 768):
+        self._vec = [0.0] * (dim - 1) + [1.0]
+
+    def embed_texts(self, texts: List[str]) -> List[List[float]]:
+        return [self._vec for _ in texts]
+
+    def embed_images(self, images, batch_size=None) -> List[List[float]]:
+        return [self._vec for _ in images]
+
+
+class PeakRss:
+    def __init__(self, interval: float = 0.05):
+        self._proc = psutil.Process()
+        self._interval = interval
+        self._stop = threading.Event()
+        self.peak = self._proc.memory_info().rss
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+
+    def _sample(self):
+        while not self._stop.wait(self._interval):
+            self.peak = max(self.peak, self._proc.memory_info().rss)
+
+    def stop(self) -> int:
+        self._stop.set()
+        self._thread.join()
+        return self.peak
+
+
+def run_mode(mode: str, pdf_path: str, window: int, real_embedder: bool) -> dict:
+    from app.services import docling_service, embedding_service
+    from app.services.chroma_service import ChromaService
+    from app.services.docling_pool import DoclingProcessPool
+    from app.services.embedding_service import (
+        PdfMetadata,
+        embedder_registry,
+        ingest_pdf_windows_into_chroma,
+    )
+    from app.services.pdf_cache import pdf_cache
+
+    docling_service.docling_pool = DoclingProcessPool(workers=0)
+    pdf_cache.enabled = False
+    settings.chroma_persist_path = tempfile.mkdtemp(prefix="bench_chroma_")
+    embedder = embedder_registry.get() if real_embedder else FakeEmbedder()
+    chroma = ChromaService()
+    meta = PdfMetadata(
+        doc_id="bench", pdf_url="", title="bench", summary="", published="", authors=[]
+    )
+
+    first_write = [None]
+    start = time.perf_counter()
+
+    def on_window(_stats):
+        if first_write[0] is None:
+            first_write[0] = time.perf_counter() - start
+
+    rss = PeakRss()
+    if mode == "windowed":
+        stats = ingest_pdf_windows_into_chroma(
+            pdf_path,
+            meta,
+            window_pages=window,
+            embedder=embedder,
+            chroma=chroma,
+            on_window=on_window,
+        )
+    else:
+        stats = embedding_service._ingest_pdf(
+            lambda docling: docling.convert_document_path(pdf_path),
+            meta,
+            embedder,
+            chroma,
+            None,
+        )
+        on_window(stats)
+    total = time.perf_counter() - start
+    return {
+        "mode": mode,
+        "first_write_s": first_write[0],
+        "total_s": total,
+        "peak_rss_mb": rss.stop() / 1024**2,
+        "chunks": stats.get("text_chunks"),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pdf", help="Path to a long PDF")
+    parser.add_argument("--arxiv", help="arXiv id to download instead of --pdf")
+    parser.add_argument(
+        "--window", type=int, default=settings.docling_window_pages or 10
+    )
+    parser.add_argument("--real-embedder", action="store_true")
+    parser.add_argument("--mode", choices=["whole", "windowed"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        print(
+            json.dumps(run_mode(args.mode, args.pdf, args.window, args.real_embedder))
+        )
+        return
+
+    pdf_path = args.pdf
+    if not pdf_path:
+        if not args.arxiv:
+            parser.error("one of --pdf or --arxiv is required")
+        from app.services.ingestion_service import download_arxiv_pdf
+
+        pdf_path = download_arxiv_pdf(args.arxiv).path
+
+    from app.services.docling_service import pdf_page_count
+
+    print(f"{pdf_path}: {pdf_page_count(pdf_path)} pages, window={args.window}")
+    for mode in ("whole", "windowed"):
+        cmd = [
+            sys.executable,
+            "-m",
+            "benchmarks.bench_windowed_ingest",
+            "--mode",
+            mode,
+            "--pdf",
+            pdf_path,
+            "--window",
+            str(args.window),
+        ]
+        if args.real_embedder:
+            cmd.append("--real-embedder")
+        out = subprocess.run(
+            cmd, check=True, capture_output=True, text=True, cwd=os.getcwd()
+        ).stdout
+        result = json.loads(out.strip().splitlines()[-1])
+        print(
+            f"{mode:<9} first write={result['first_write_s']:8.2f} s  "
+            f"total={result['total_s']:8.2f} s  "
+            f"peak RSS={result['peak_rss_mb']:8.1f} MiB  chunks={result['chunks']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
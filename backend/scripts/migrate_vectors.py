@@ -0,0 +1,97 @@
+"""
+Copy a Chroma collection into a new one at a smaller Matryoshka dimension,
+optionally building its quantized sidecar.
+
+Vectors are read from the source, layer-normed, truncated and re-normalized
+as Nomic's Matryoshka recipe does, and written under the same ids, documents
+and metadata, so nothing is re-embedded. The
+source collection is left untouched; point the app at the target once the
+copy is complete.
+
+Usage:
+    poetry run python -m scripts.migrate_vectors --target documents_256 --dimension 256
+    poetry run python -m scripts.migrate_vectors --target documents_256 --dimension 256 --sidecar int8
+"""
+
+import argparse
+from typing import Any, cast
+
+from app.core.config import settings
+from app.services.chroma_service import ChromaService, truncate_embeddings
+from app.services.vector_sidecar import SIDECAR_DTYPES, VectorSidecar, get_sidecar
+
+
+def migrate(
+    source: ChromaService,
+    target: ChromaService,
+    dimension: int,
+    sidecar: VectorSidecar | None = None,
+    page_size: int = 1000,
+) -> int:
+    """Copy every entry of ``source`` into ``target``; returns the count."""
+    copied = 0
+    if sidecar is not None:
+        sidecar.clear(save=False)
+    for page in source.iter_embeddings(page_size):
+        vectors = truncate_embeddings(page["embeddings"], dimension)
+        target.collection.upsert(
+            ids=page["ids"],
+            embeddings=cast(Any, vectors),
+            documents=page["documents"],
+            metadatas=cast(Any, page["metadatas"]),
+        )
+        if sidecar is not None:
+            doc_ids = [str((md or {}).get("doc_id", "")) for md in page["metadatas"]]
+            sidecar.upsert(page["ids"], doc_ids, vectors, save=False)
+        copied += len(page["ids"])
+        print(f"[migrate_vectors] {copied} entries copied")
+    if sidecar is not None:
+        sidecar.save()
+    return copied
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--source", default=settings.chroma_collection_name)
+    parser.add_argument("--target", required=True)
+    parser.add_argument(
+        "--dimension", type=int, required=True, help="e.g. 512, 256, 128"
+    )
+    parser.add_argument(
+        "--sidecar", choices=SIDECAR_DTYPES, help="also build a quantized sidecar"
+    )
+    parser.add_argument("--page-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    if args.source == args.target:
+        parser.error("--target must differ from --source")
+
+    # Source vectors are read as stored; migrate() does the truncation
+    source = ChromaService(collection_name=args.source, dimension=0)
+    existing = source.vectorstore._client.list_collections()
+    if args.target in [getattr(c, "name", c) for c in existing]:
+        parser.error(f"collection {args.target!r} already exists")
+    target = ChromaService(
+        collection_name=args.target,
+        collection_metadata=source.collection.metadata,
+        dimension=0,
+    )
+
+    sidecar = None
+    if args.sidecar:
+        settings.vector_sidecar = args.sidecar
+        sidecar = get_sidecar(args.target)
+
+    copied = migrate(source, target, args.dimension, sidecar, args.page_size)
+    print(
+        f"[migrate_vectors] Copied {copied} entries from {args.source} to {args.target}"
+    )
+    print("Set these before restarting the backend:")
+    print(f"  CHROMA_COLLECTION_NAME={args.target}")
+    print(f"  EMBEDDING_DIMENSION={args.dimension}")
+    if args.sidecar:
+        print(f"  VECTOR_SIDECAR={args.sidecar}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+import pytest
+
+from app.core.config import settings
+from app.services.chroma_service import ChromaService
+from app.services.library_catalog import library_catalog
+from app.services.retrieval_cache import retrieval_cache
+
+
+class FakeEmbedder:
+    """Stands in for the Nomic models with constant text and figure vectors."""
+
+    def __init__(self):
+        self.image_calls = 0
+
+    def embed_texts(self, texts):
+        return [[1.0, 0.0, 0.0] for _ in texts]
+
+    def embed_images(self, images, batch_size=None):
+        self.image_calls += 1
+        return [[0.0, 1.0] for _ in images]
+
+
+@pytest.fixture(autouse=True)
+def _isolated_library_catalog(tmp_path, monkeypatch):
+    """Keep ingestion tests from writing the real library catalog."""
+    library_catalog.close()
+    monkeypatch.setattr(library_catalog, "path", str(tmp_path / "library.sqlite3"))
+    monkeypatch.setattr(library_catalog, "ready", True)
+    yield
+    library_catalog.close()
+
+
+@pytest.fixture(autouse=True)
+def _empty_retrieval_cache():
+    """Keep cached search results from leaking between tests."""
+    retrieval_cache.clear()
+    yield
+    retrieval_cache.clear()
+
+
+@pytest.fixture
+def fake_embedder():
+    return FakeEmbedder()
+
+
+@pytest.fixture
+def chroma(tmp_path, monkeypatch):
+    """A ChromaService over an empty store under ``tmp_path``."""
+    monkeypatch.setattr(settings, "chroma_persist_path", str(tmp_path / "chroma"))
+    monkeypatch.setattr(settings, "chroma_collection_name", "test_text")
+    monkeypatch.setattr(settings, "chroma_image_collection_name", "test_images")
+    return ChromaService()
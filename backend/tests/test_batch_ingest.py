@@ -0,0 +1,97 @@
+import threading
+
+from app.services import ingestion_service
+from app.services.embedding_service import PdfMetadata, PreparedRepo
+from app.services.ingestion_service import DownloadedPdf, ingest_arxiv_batch
+
+
+class FakeDocling:
+    def convert_document_path(self, path, sha=None):
+        return ["chunk"]
+
+    def extract_from_document(self, chunks):
+        return {
+            "chunks": [{"text": text, "metadata": {}} for text in chunks],
+            "images": {"pngs": [], "metadatas": [], "ids": [], "tmp_dir": None},
+        }
+
+
+def _patch_batch(tmp_path, monkeypatch, fetch_repo):
+    calls = []
+
+    def record(name, fn=None):
+        def wrapper(prepared, *args, **kwargs):
+            calls.append((name, threading.current_thread().name))
+            if fn is not None:
+                fn(prepared)
+            return prepared
+
+        return wrapper
+
+    def download(doc_id):
+        path = tmp_path / f"{doc_id}.pdf"
+        path.write_bytes(b"%PDF")
+        return DownloadedPdf(path=str(path), sha="ab" * 32, size=4)
+
+    def metadata(doc_id):
+        return PdfMetadata(
+            doc_id=doc_id,
+            pdf_url="",
+            title=doc_id,
+            summary="",
+            published="",
+            authors=[],
+            github_url=f"https://github.com/org/{doc_id}",
+        )
+
+    def embedded_pdf(prepared):
+        prepared.plan, prepared.embeddings = {"changed": [], "refresh": []}, []
+
+    def fetch(meta):
+        calls.append(("fetch_repo", threading.current_thread().name))
+        return fetch_repo(meta)
+
+    monkeypatch.setattr(ingestion_service, "download_arxiv_pdf", download)
+    monkeypatch.setattr(ingestion_service, "build_pdf_metadata", metadata)
+    monkeypatch.setattr(ingestion_service, "get_docling_service", FakeDocling)
+    monkeypatch.setattr(ingestion_service, "fetch_detected_repo", fetch)
+    monkeypatch.setattr(
+        ingestion_service, "embed_prepared_pdf", record("embed_pdf", embedded_pdf)
+    )
+    monkeypatch.setattr(ingestion_service, "embed_prepared_repo", record("embed_repo"))
+    monkeypatch.setattr(
+        ingestion_service, "write_prepared_pdf", lambda prepared: {"text_chunks": 1}
+    )
+    monkeypatch.setattr(ingestion_service, "write_prepared_repo", record("write_repo"))
+    return calls
+
+
+def test_batch_fetches_and_embeds_repos_outside_the_write_stage(tmp_path, monkeypatch):
+    calls = _patch_batch(
+        tmp_path,
+        monkeypatch,
+        lambda meta: PreparedRepo(meta.github_url, meta.doc_id, [], []),
+    )
+
+    result = ingest_arxiv_batch(["p1", "p2"], embedder=object())
+
+    assert result["succeeded"] == 2
+    stages = {name: thread.split("-")[1] for name, thread in calls}
+    assert stages == {
+        "fetch_repo": "repos",
+        "embed_pdf": "embed",
+        "embed_repo": "embed",
+        "write_repo": "write",
+    }
+
+
+def test_batch_ingests_the_paper_when_its_repo_fetch_fails(tmp_path, monkeypatch):
+    def unreachable(meta):
+        raise RuntimeError("GitHub is down")
+
+    calls = _patch_batch(tmp_path, monkeypatch, unreachable)
+
+    result = ingest_arxiv_batch(["p1"], embedder=object())
+
+    assert result["papers"][0]["status"] == "ok"
+    assert [name for name, _ in calls] == ["fetch_repo", "embed_pdf"]
@@ -0,0 +1,84 @@
+from langchain_core.documents import Document
+
+
+def _docs(texts, title="Paper"):
+    return [
+        Document(
+            page_content=t, metadata={"doc_id": "p1", "type": "text", "title": title}
+        )
+        for t in texts
+    ]
+
+
+def test_upsert_only_embeds_changed_chunks(chroma):
+    embedded = []
+
+    def embed(texts):
+        embedded.extend(texts)
+        return [[float(len(t)), 1.0] for t in texts]
+
+    ids = ["p1::chunk::0", "p1::chunk::1"]
+    first = chroma.upsert_changed(_docs(["alpha", "beta"]), ids, embed)
+    assert first["written"] == 2
+
+    embedded.clear()
+    second = chroma.upsert_changed(_docs(["alpha", "gamma"]), ids, embed)
+    assert embedded == ["gamma"]
+    assert second == {"written": 1, "updated": 0, "skipped": 1, "deleted": 0}
+    assert chroma.collection.count() == 2
+
+
+def test_upsert_refreshes_metadata_and_drops_stale_chunks(chroma):
+    embed = lambda texts: [[1.0, 0.0] for _ in texts]  # noqa: E731
+    where = {"$and": [{"doc_id": "p1"}, {"type": "text"}]}
+
+    chroma.upsert_changed(
+        _docs(["a", "b", "c"]),
+        ["p1::chunk::0", "p1::chunk::1", "p1::chunk::2"],
+        embed,
+        stale_where=where,
+    )
+    result = chroma.upsert_changed(
+        _docs(["a", "b"], title="Renamed"),
+        ["p1::chunk::0", "p1::chunk::1"],
+        embed,
+        stale_where=where,
+    )
+
+    assert result == {"written": 0, "updated": 2, "skipped": 0, "deleted": 1}
+    stored = chroma.collection.get(include=["metadatas"])
+    assert sorted(stored["ids"]) == ["p1::chunk::0", "p1::chunk::1"]
+    assert {md["title"] for md in stored["metadatas"]} == {"Renamed"}
+
+
+def test_repos_of_one_paper_sharing_paths_both_survive(chroma, fake_embedder):
+    from app.services.embedding_service import ingest_repo_files_into_chroma
+
+    def ingest(repo_url, files):
+        return ingest_repo_files_into_chroma(
+            repo_url,
+            "p1",
+            files,
+            {"doc_id": "p1", "source": "github"},
+            embedder=fake_embedder,
+            chroma=chroma,
+        )
+
+    ingest("https://github.com/a/one", [{"path": "README.md", "content": "one"}])
+    ingest(
+        "https://github.com/b/two",
+        [{"path": "README.md", "content": "two"}, {"path": "x.py", "content": "x"}],
+    )
+    # Re-ingesting the first repo must not treat the second one's files as stale
+    ingest("https://github.com/a/one", [{"path": "README.md", "content": "one v2"}])
+
+    data = chroma.collection.get(
+        where={"type": "repo"}, include=["metadatas", "documents"]
+    )
+    by_repo = {}
+    for md, doc in zip(data["metadatas"], data["documents"]):
+        by_repo.setdefault(md["repo_url"], set()).add((md["filename"], doc))
+    assert by_repo == {
+        "https://github.com/a/one": {("README.md", "one v2")},
+        "https://github.com/b/two": {("README.md", "two"), ("x.py", "x")},
+    }
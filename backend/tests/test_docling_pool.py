@@ -0,0 +1,71 @@
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+from docling_core.types.doc import DoclingDocument
+
+from app.services import docling_service
+from app.services.docling_pool import DoclingProcessPool, DoclingWorkerError
+from app.services.docling_service import default_pipeline_options
+
+
+class FakeExecutor:
+    def __init__(self, outcome):
+        self.outcome = outcome
+        self.submitted = []
+        self.shut_down = False
+
+    def submit(self, fn, *args):
+        self.submitted.append(args)
+        future = Future()
+        if isinstance(self.outcome, Exception):
+            future.set_exception(self.outcome)
+        else:
+            future.set_result(self.outcome)
+        return future
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        self.shut_down = True
+
+
+def _pool(monkeypatch, *executors):
+    pool = DoclingProcessPool(workers=1)
+    queue = list(executors)
+    monkeypatch.setattr(pool, "_create", lambda options_json: queue.pop(0))
+    return pool
+
+
+def test_converted_document_is_rebuilt_in_the_api_process(monkeypatch):
+    doc = DoclingDocument(name="paper")
+    executor = FakeExecutor(doc.export_to_dict())
+    pool = _pool(monkeypatch, executor)
+
+    result = pool.convert("/tmp/paper.pdf", default_pipeline_options())
+
+    assert isinstance(result, DoclingDocument)
+    assert result.name == "paper"
+    assert executor.submitted[0][0] == "/tmp/paper.pdf"
+
+
+def test_crashed_worker_fails_the_job_and_restarts_the_pool(monkeypatch):
+    broken = FakeExecutor(BrokenProcessPool("worker died"))
+    healthy = FakeExecutor(DoclingDocument(name="again").export_to_dict())
+    pool = _pool(monkeypatch, broken, healthy)
+
+    with pytest.raises(DoclingWorkerError):
+        pool.convert("/tmp/big.pdf", default_pipeline_options())
+    assert broken.shut_down
+
+    assert pool.convert("/tmp/ok.pdf", default_pipeline_options()).name == "again"
+
+
+def test_service_converts_in_process_when_pool_disabled(monkeypatch):
+    monkeypatch.setattr(docling_service, "docling_pool", DoclingProcessPool(workers=0))
+    service = docling_service.DoclingService()
+
+    class FakeConverter:
+        def convert(self, path):
+            return type("Result", (), {"document": DoclingDocument(name=path)})()
+
+    service._converter = FakeConverter()
+    assert service._convert_path("inline.pdf").name == "inline.pdf"
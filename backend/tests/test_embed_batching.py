@@ -0,0 +1,66 @@
+import threading
+
+from app.core.config import settings
+from app.services import embedding_service
+from app.services.embedding_cache import EmbeddingCache
+from app.services.embedding_service import NomicEmbeddingService, plan_token_batches
+from app.services.ttl_cache import TtlLruCache
+
+
+def test_batches_group_similar_lengths_within_budget():
+    lengths = [10, 500, 12, 480, 11, 5000]
+    batches = plan_token_batches(lengths, max_tokens=1000, max_texts=8)
+
+    assert batches[0] == [5]  # longer than the budget: alone
+    assert batches[1] == [1, 3]  # 2 x 500 fits, a third long text would not
+    assert batches[2] == [2, 4, 0]  # the short texts pad to 12, not 500
+    for batch in batches:
+        width = max(lengths[i] for i in batch)
+        assert len(batch) == 1 or len(batch) * width <= 1000
+    assert sorted(i for b in batches for i in b) == list(range(len(lengths)))
+
+
+def test_batches_respect_text_cap():
+    batches = plan_token_batches([1] * 10, max_tokens=10_000, max_texts=4)
+    assert [len(b) for b in batches] == [4, 4, 2]
+
+
+class RecordingEmbedder:
+    dimensionality = None
+
+    def __init__(self):
+        self.calls = []
+
+    def embed_documents(self, texts):
+        self.calls.append(list(texts))
+        return [[float(len(t))] for t in texts]
+
+
+def _service(cache):
+    service = NomicEmbeddingService.__new__(NomicEmbeddingService)
+    service.model = service.cache_model = "test-model"
+    service.embedder = RecordingEmbedder()
+    service.text_embedder = service.embedder
+    service.dispatcher = None
+    service.cache = cache
+    service._lock = threading.Lock()
+    service._stats_lock = threading.Lock()
+    service._stats = {"texts": 0, "tokens": 0, "seconds": 0.0}
+    service._query_cache = TtlLruCache(16, 60)
+    return service
+
+
+def test_embed_texts_batches_and_keeps_order(monkeypatch):
+    monkeypatch.setattr(
+        embedding_service, "count_tokens", lambda texts: [len(t) for t in texts]
+    )
+    monkeypatch.setattr(settings, "embed_batch_max_tokens", 20)
+    monkeypatch.setattr(settings, "embed_batch_max_texts", 64)
+    service = _service(EmbeddingCache(enabled=False))
+
+    texts = ["a" * 3, "b" * 10, "c" * 2, "d" * 9]
+    vectors = service.embed_texts(texts)
+
+    assert vectors == [[3.0], [10.0], [2.0], [9.0]]
+    assert service.embedder.calls == [["b" * 10, "d" * 9], ["a" * 3, "c" * 2]]
+    assert service.throughput()["tokens"] == 24
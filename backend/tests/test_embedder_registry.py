@@ -0,0 +1,52 @@
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services import embedding_service
+
+client = TestClient(app)
+
+
+class FakeEmbeddingService:
+    instances = 0
+
+    def __init__(self, model=None, vision_model=None):
+        FakeEmbeddingService.instances += 1
+        self.model = model
+        self.images = []
+
+    def embed_query(self, text):
+        return [0.0, 1.0]
+
+    def embed_images(self, images, batch_size=None):
+        self.images.extend(images)
+        return [[1.0, 0.0] for _ in images]
+
+
+def test_registry_loads_each_model_once(monkeypatch):
+    monkeypatch.setattr(
+        embedding_service, "NomicEmbeddingService", FakeEmbeddingService
+    )
+    registry = embedding_service.EmbedderRegistry()
+    FakeEmbeddingService.instances = 0
+
+    first = registry.get("model-a")
+    second = registry.get("model-a")
+
+    assert first is second
+    assert FakeEmbeddingService.instances == 1
+    assert not registry.is_ready("model-a")
+    assert registry.warm_up("model-a")
+    assert registry.is_ready("model-a")
+    # The vision model is loaded too, so the first figure batch is not cold
+    assert [img.size for img in first.images] == [(1, 1)]
+
+
+def test_ready_endpoint_reports_loading(monkeypatch):
+    from app.api import routes_health
+
+    monkeypatch.setattr(
+        routes_health, "embedder_registry", embedding_service.EmbedderRegistry()
+    )
+    resp = client.get("/health/ready")
+    assert resp.status_code == 503
+    assert resp.json()["status"] == "loading"
@@ -0,0 +1,72 @@
+import threading
+
+from app.services import embedding_service
+from app.services.embedding_cache import EmbeddingCache, text_key
+from app.services.embedding_service import NomicEmbeddingService
+from app.services.ttl_cache import TtlLruCache
+
+
+class CountingEmbedder:
+    dimensionality = None
+
+    def __init__(self):
+        self.embedded = []
+
+    def embed_documents(self, texts):
+        self.embedded.extend(texts)
+        return [[0.5, float(len(t))] for t in texts]
+
+
+def _service(cache):
+    service = NomicEmbeddingService.__new__(NomicEmbeddingService)
+    service.model = service.cache_model = "test-model"
+    service.embedder = CountingEmbedder()
+    service.text_embedder = service.embedder
+    service.dispatcher = None
+    service.cache = cache
+    service._lock = threading.Lock()
+    service._stats_lock = threading.Lock()
+    service._stats = {"texts": 0, "tokens": 0, "seconds": 0.0}
+    service._query_cache = TtlLruCache(16, 60)
+    return service
+
+
+def test_vectors_survive_reopening(tmp_path):
+    path = str(tmp_path / "emb.sqlite3")
+    cache = EmbeddingCache(path, max_entries=100, enabled=True)
+    key = text_key("search_document", "hello")
+    cache.put_many("m", 0, [key], [[0.25, -1.0]])
+    cache.close()
+
+    reopened = EmbeddingCache(path, max_entries=100, enabled=True)
+    assert reopened.get_many("m", 0, [key]) == {key: [0.25, -1.0]}
+    assert reopened.get_many("m", 256, [key]) == {}
+    assert reopened.get_many("other", 0, [key]) == {}
+    stats = reopened.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 2
+    assert stats["entries"] == 1
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "emb.sqlite3"), max_entries=10, enabled=True)
+    keys = [text_key("search_document", str(n)) for n in range(11)]
+    for key in keys:
+        cache.put_many("m", 0, [key], [[1.0]])
+
+    assert cache.stats()["entries"] == 9
+    assert cache.get_many("m", 0, keys[:2]) == {}
+    assert keys[-1] in cache.get_many("m", 0, keys[-1:])
+
+
+def test_embed_texts_only_runs_the_model_on_new_texts(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        embedding_service, "count_tokens", lambda texts: [len(t) for t in texts]
+    )
+    service = _service(EmbeddingCache(str(tmp_path / "emb.sqlite3"), enabled=True))
+
+    first = service.embed_texts(["readme", "chunk one"])
+    second = service.embed_texts(["chunk two", "readme", "chunk one"])
+
+    assert service.embedder.embedded == ["chunk one", "readme", "chunk two"]
+    assert second[1:] == first
+    assert service.cache.stats()["hit_rate"] == 0.4
@@ -0,0 +1,104 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.services.embedding_dispatcher import EmbeddingDispatcher
+from app.services.embedding_service import NomicEmbeddingService
+from app.services.ttl_cache import TtlLruCache
+
+
+class RecordingModel:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, task, texts):
+        self.calls.append((task, list(texts)))
+        return [[float(len(t)), 1.0 if task == "search_query" else 0.0] for t in texts]
+
+
+def test_concurrent_queries_share_one_model_call():
+    model = RecordingModel()
+    dispatcher = EmbeddingDispatcher(model, max_batch=8, max_wait_ms=200)
+    texts = ["a", "bb", "ccc", "bb"]
+    start = threading.Barrier(len(texts))
+
+    def embed(text):
+        start.wait()
+        return dispatcher.submit("search_query", text).result(timeout=5)
+
+    with ThreadPoolExecutor(len(texts)) as pool:
+        results = list(pool.map(embed, texts))
+    dispatcher.shutdown()
+
+    assert results == [[1.0, 1.0], [2.0, 1.0], [3.0, 1.0], [2.0, 1.0]]
+    assert len(model.calls) == 1
+    assert sorted(model.calls[0][1]) == ["a", "bb", "ccc"]  # duplicates embedded once
+    stats = dispatcher.stats()
+    assert stats["requests"] == 4 and stats["batches"] == 1
+
+
+def test_batches_split_by_task_and_size():
+    model = RecordingModel()
+    dispatcher = EmbeddingDispatcher(model, max_batch=2, max_wait_ms=200)
+    futures = [dispatcher.submit("search_document", t) for t in ["x", "yy", "zzz"]]
+    futures.append(dispatcher.submit("search_query", "q"))
+    assert [f.result(timeout=5) for f in futures] == [
+        [1.0, 0.0],
+        [2.0, 0.0],
+        [3.0, 0.0],
+        [1.0, 1.0],
+    ]
+    dispatcher.shutdown()
+    assert all(len(texts) <= 2 for _, texts in model.calls)
+    assert {task for task, _ in model.calls} == {"search_document", "search_query"}
+
+
+def test_errors_reach_every_caller():
+    def failing(task, texts):
+        raise RuntimeError("model crashed")
+
+    dispatcher = EmbeddingDispatcher(failing, max_batch=4, max_wait_ms=50)
+    futures = [dispatcher.submit("search_query", t) for t in ["a", "b"]]
+    for future in futures:
+        with pytest.raises(RuntimeError, match="model crashed"):
+            future.result(timeout=5)
+    dispatcher.shutdown()
+
+
+class BatchQueryEmbedder:
+    def __init__(self):
+        self.batches = []
+
+    def embed_query(self, text):
+        self.batches.append([text])
+        return [1.0]
+
+    def embed(self, texts, task_type):
+        self.batches.append(list(texts))
+        return [[1.0] for _ in texts]
+
+
+def test_service_coalesces_concurrent_queries():
+    service = NomicEmbeddingService.__new__(NomicEmbeddingService)
+    service.embedder = service.text_embedder = BatchQueryEmbedder()
+    service._lock = threading.Lock()
+    service._query_cache = TtlLruCache(16, 60)
+    service.dispatcher = EmbeddingDispatcher(
+        service._embed_batch, max_batch=8, max_wait_ms=100
+    )
+
+    start = threading.Barrier(5)
+
+    def embed(text):
+        start.wait()
+        return service.embed_query(text)
+
+    with ThreadPoolExecutor(5) as pool:
+        assert list(pool.map(embed, [f"q{i}" for i in range(5)])) == [[1.0]] * 5
+    service.dispatcher.shutdown()
+    [batch] = service.text_embedder.batches
+    assert sorted(batch) == [f"search_query: q{i}" for i in range(5)]
+    # Answered from the query cache without another model call
+    assert service.embed_query("q3") == [1.0]
+    assert len(service.text_embedder.batches) == 1
@@ -0,0 +1,61 @@
+from app.services.embedding_service import (
+    PdfMetadata,
+    embed_prepared_pdf,
+    prepare_pdf_documents,
+    write_prepared_pdf,
+)
+from app.services.image_store import ImageStore
+from app.services.pdf_cache import sha256_bytes
+
+
+def _docling_output(image_hash):
+    return {
+        "chunks": [{"text": "Intro text", "metadata": {"page": 1}}],
+        "images": {
+            "pngs": [b"png-bytes"],
+            "metadatas": [
+                {
+                    "picture_number": 1,
+                    "page": 2,
+                    "caption": "Figure 1",
+                    "image_hash": image_hash,
+                }
+            ],
+            "ids": ["x"],
+            "tmp_dir": None,
+        },
+    }
+
+
+def test_figures_are_indexed_in_the_image_collection(
+    chroma, fake_embedder, tmp_path, monkeypatch
+):
+    store = ImageStore(str(tmp_path / "images"))
+    monkeypatch.setattr("app.services.embedding_service.image_store", store)
+    image_hash = sha256_bytes(b"png-bytes")
+    meta = PdfMetadata(
+        doc_id="2101.00001",
+        pdf_url="",
+        title="Paper",
+        summary="",
+        published="",
+        authors=[],
+    )
+
+    prepared = prepare_pdf_documents(_docling_output(image_hash), meta)
+    # Extraction leaves storing the figure to ingestion
+    assert store.get(image_hash) == b"png-bytes"
+    embed_prepared_pdf(prepared, fake_embedder, chroma)
+    stats = write_prepared_pdf(prepared, chroma)
+
+    assert stats["images_indexed"] == 1
+    assert chroma.collection.count() == 1
+    images = chroma.images.collection.get(include=["metadatas"])
+    assert images["ids"] == ["2101.00001::image::1"]
+    assert images["metadatas"][0]["type"] == "image"
+    assert images["metadatas"][0]["image_hash"] == image_hash
+
+    # Re-ingesting the same figure does not re-embed it
+    prepared = prepare_pdf_documents(_docling_output(image_hash), meta)
+    embed_prepared_pdf(prepared, fake_embedder, chroma)
+    assert fake_embedder.image_calls == 1
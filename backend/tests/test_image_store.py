@@ -0,0 +1,83 @@
+import os
+from io import BytesIO
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+from PIL import Image
+
+from app.main import app
+from app.services.docling_service import DoclingService
+from app.services.image_store import ImageStore
+from app.services.pdf_cache import sha256_bytes
+
+client = TestClient(app)
+
+
+def _png(width=400, height=200):
+    buf = BytesIO()
+    Image.new("RGB", (width, height), "white").save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def test_put_is_content_addressed(tmp_path):
+    store = ImageStore(str(tmp_path))
+    first = store.put(_png())
+    second = store.put(_png())
+
+    assert first == second
+    assert store.get(first) == _png()
+    assert store.get("0" * 64) is None
+    assert store.get("../etc/passwd") is None
+
+
+def test_thumbnail_fits_requested_size(tmp_path):
+    store = ImageStore(str(tmp_path))
+    image_hash = store.put(_png())
+
+    with Image.open(store.thumbnail(image_hash, 128)) as thumb:
+        assert thumb.size == (128, 64)
+
+    store.delete(image_hash)
+    assert not store.exists(image_hash)
+    assert store.thumbnail(image_hash, 128) is None
+
+
+def test_image_endpoint_caches_by_etag(tmp_path, monkeypatch):
+    store = ImageStore(str(tmp_path))
+    monkeypatch.setattr("app.api.routes_library.image_store", store)
+    image_hash = store.put(_png())
+
+    resp = client.get(f"/library/image/{image_hash}")
+    assert resp.status_code == 200
+    assert resp.headers["content-type"] == "image/png"
+    assert "immutable" in resp.headers["cache-control"]
+    etag = resp.headers["etag"]
+
+    resp = client.get(f"/library/image/{image_hash}", headers={"If-None-Match": etag})
+    assert resp.status_code == 304
+
+    resp = client.get(f"/library/image/{image_hash}?size=128")
+    assert resp.status_code == 200
+    assert resp.headers["etag"] != etag
+
+    assert client.get(f"/library/image/{image_hash}?size=100").status_code == 400
+    assert client.get(f"/library/image/{'0' * 64}").status_code == 404
+    assert client.get("/library/image/not-a-hash").status_code == 400
+
+
+def test_extraction_does_not_write_the_store(tmp_path):
+    store = ImageStore(str(tmp_path))
+    img = Image.new("RGB", (40, 20), "white")
+    picture = SimpleNamespace(
+        prov=[SimpleNamespace(bbox=None, page_no=1)],
+        image=SimpleNamespace(pil_image=img),
+        caption_text=lambda doc: "Figure 1",
+    )
+    doc = SimpleNamespace(pictures=[picture])
+
+    images = DoclingService.__new__(DoclingService).extract_images(doc)
+
+    meta = images["metadatas"][0]
+    assert (meta["width"], meta["height"]) == (40, 20)
+    assert not os.listdir(tmp_path)
+    assert sha256_bytes(images["pngs"][0]) == meta["image_hash"]
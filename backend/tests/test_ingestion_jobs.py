@@ -0,0 +1,94 @@
+import threading
+import time
+
+import pytest
+
+from app.services.ingestion_jobs import IngestionJobQueue, QueueFullError
+
+
+def _wait_for(queue, job_id, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = queue.get(job_id)
+        if job.status in ("completed", "failed"):
+            return job
+        time.sleep(0.01)
+    raise AssertionError("job did not finish")
+
+
+def test_job_reports_stages_and_result():
+    queue = IngestionJobQueue(workers=1, max_pending=2)
+
+    def work(report):
+        report("download")
+        report("embed")
+        return {"text_chunks": 3}
+
+    job = queue.submit("2101.00001", work)
+    finished = _wait_for(queue, job.id)
+
+    assert finished.status == "completed"
+    assert finished.stage == "done"
+    assert finished.progress == 1.0
+    assert finished.result == {"text_chunks": 3}
+    queue.shutdown()
+
+
+def test_job_records_errors():
+    queue = IngestionJobQueue(workers=1, max_pending=2)
+
+    def work(report):
+        report("convert")
+        raise ValueError("bad pdf")
+
+    finished = _wait_for(queue, queue.submit("x", work).id)
+
+    assert finished.status == "failed"
+    assert finished.stage == "convert"
+    assert finished.error == "bad pdf"
+    queue.shutdown()
+
+
+def test_queue_rejects_when_full():
+    queue = IngestionJobQueue(workers=1, max_pending=1)
+    release = threading.Event()
+
+    queue.submit("a", lambda report: release.wait(5) and {})
+    with pytest.raises(QueueFullError):
+        queue.submit("b", lambda report: {})
+
+    release.set()
+    queue.shutdown(wait=True)
+
+
+def test_shutdown_cancels_jobs_that_never_started():
+    queue = IngestionJobQueue(workers=1, max_pending=3)
+    started, release = threading.Event(), threading.Event()
+
+    def blocking(report):
+        started.set()
+        release.wait(5)
+        return {}
+
+    running = queue.submit("a", blocking)
+    started.wait(5)
+    waiting = queue.submit("b", lambda report: {})
+    queue.shutdown()
+    release.set()
+
+    assert queue.get(waiting.id).status == "cancelled"
+    assert _wait_for(queue, running.id).status == "completed"
+    assert queue._pending == 0
+
+
+def test_latest_finds_batch_jobs_per_paper():
+    queue = IngestionJobQueue(workers=1, max_pending=2)
+
+    single = queue.submit("a", lambda report: {})
+    batch = queue.submit("a,b", lambda report: {}, doc_ids=["a", "b"])
+    _wait_for(queue, batch.id)
+
+    assert queue.latest("a") is batch and queue.latest("b") is batch
+    assert queue.latest("a,b") is None and queue.latest("c") is None
+    assert queue.get(single.id) is single
+    queue.shutdown()
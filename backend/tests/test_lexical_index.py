@@ -0,0 +1,61 @@
+from langchain_core.documents import Document
+
+from app.core.config import settings
+from app.services.lexical_index import LexicalIndex, reciprocal_rank_fusion
+
+
+def test_bm25_ranks_exact_terms_within_scope():
+    index = LexicalIndex(max_docs=4)
+    index.load(
+        "p1",
+        ["p1::0", "p1::1"],
+        ["we train ResNet50 on ImageNet", "results and discussion"],
+    )
+    index.load("p2", ["p2::0"], ["ResNet50 ResNet50 baseline"])
+
+    assert [i for i, _ in index.search("resnet50 imagenet", 5, ["p1"])] == ["p1::0"]
+    assert index.search("resnet50", 5, ["p1", "p2"])[0][0] == "p2::0"
+    assert index.search("resnet50", 5, ["p3"]) == []
+
+
+def test_writes_deletes_and_eviction():
+    index = LexicalIndex(max_docs=2)
+    index.load("p1", ["p1::0"], ["alpha"])
+    index.add(["p1::1", "p9::0"], ["p1", "p9"], ["beta gamma", "beta"])
+    assert [i for i, _ in index.search("beta", 5, ["p1", "p9"])] == ["p1::1"]
+    index.remove(["p1::1"])
+    assert index.search("beta", 5, ["p1"]) == []
+
+    index.load("p2", ["p2::0"], ["x"])
+    index.search("alpha", 1, ["p1"])  # p1 becomes most recently used
+    index.load("p3", ["p3::0"], ["y"])
+    assert index.loaded("p1") and index.loaded("p3") and not index.loaded("p2")
+
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["b", "d", "c"]], k=60)
+    assert fused[0] == "b" and set(fused) == {"a", "b", "c", "d"}
+
+
+def test_hybrid_search_surfaces_exact_term_match(chroma, monkeypatch):
+    monkeypatch.setattr(settings, "hybrid_candidates", 2)
+    texts = ["attention is all you need", "self attention layers", "trained with AdamW"]
+    vectors = [[1.0, 0.0, 0.0], [0.9, 0.1, 0.0], [0.0, 0.0, 1.0]]
+    chroma.add_documents(
+        [Document(page_content=t, metadata={"doc_id": "p1"}) for t in texts],
+        vectors,
+        [f"p1::chunk::{n}" for n in range(3)],
+    )
+
+    dense = chroma.search([1.0, 0.0, 0.0], 2, ["p1"])
+    assert "p1::chunk::2" not in dense["ids"][0]
+    res = chroma.hybrid_search(["which optimizer? AdamW"], [[1.0, 0.0, 0.0]], 2, ["p1"])
+    assert "p1::chunk::2" in res["ids"][0]
+    i = res["ids"][0].index("p1::chunk::2")
+    assert res["documents"][0][i] == "trained with AdamW"
+    assert res["distances"][0][i] is None
+
+    # Deletes reach the already loaded postings
+    chroma.delete(["p1::chunk::2"])
+    res = chroma.hybrid_search(["AdamW"], [[1.0, 0.0, 0.0]], 3, ["p1"])
+    assert "p1::chunk::2" not in res["ids"][0]
@@ -0,0 +1,134 @@
+from fastapi.testclient import TestClient
+from langchain_core.documents import Document
+
+from app.api import routes_library
+from app.core.config import settings
+from app.main import app
+from app.services.embedding_service import (
+    PdfMetadata,
+    embed_prepared_pdf,
+    ingest_repo_files_into_chroma,
+    prepare_pdf_documents,
+    write_prepared_pdf,
+)
+from app.services.ingestion_jobs import IngestionJobQueue
+from app.services.library_catalog import LibraryCatalog, library_catalog
+
+client = TestClient(app)
+
+
+def test_ingest_records_documents_and_repos(chroma, fake_embedder, monkeypatch):
+    monkeypatch.setattr(settings, "index_images", False)
+    meta = PdfMetadata(
+        doc_id="2101.00001",
+        pdf_url="https://arxiv.org/pdf/2101.00001",
+        title="Paper",
+        summary="",
+        published="2021",
+        authors=["A. Author"],
+    )
+    docs = {
+        "chunks": [{"text": t, "metadata": {}} for t in ("one", "two", "three")],
+        "images": {"pngs": [], "metadatas": [], "ids": [], "tmp_dir": None},
+    }
+    prepared = prepare_pdf_documents(docs, meta)
+    prepared.content_hash = "ab" * 32
+    embed_prepared_pdf(prepared, fake_embedder, chroma)
+    write_prepared_pdf(prepared, chroma)
+    ingest_repo_files_into_chroma(
+        "https://github.com/org/repo",
+        "2101.00001",
+        [{"path": "README.md", "content": "hi"}, {"path": "a.py", "content": "x = 1"}],
+        {"doc_id": "2101.00001", "source": "github"},
+        embedder=fake_embedder,
+        chroma=chroma,
+    )
+
+    doc = library_catalog.get("2101.00001")
+    assert doc["title"] == "Paper" and doc["authors"] == ["A. Author"]
+    assert doc["chunk_count"] == 3 and doc["content_hash"] == "ab" * 32
+    assert doc["repo_count"] == 1 and doc["repo_file_count"] == 2
+
+    resp = client.post("/library/check_batch", json=["2101.00001", "2101.99999"])
+    assert resp.json()["results"] == {"2101.00001": True, "2101.99999": False}
+    status = client.get("/library/status/2101.00001").json()
+    assert status["repos"][0]["repo_url"] == "https://github.com/org/repo"
+    assert status["in_chromadb"] and status["status"] == "completed"
+    missing = client.get("/library/status/2101.99999")
+    assert missing.status_code == 200
+    assert missing.json()["in_chromadb"] is False
+    assert missing.json()["status"] == "not_found"
+    listing = client.get("/library/list").json()
+    assert [r["id"] for r in listing["results"]] == ["2101.00001"] and listing[
+        "total"
+    ] == 1
+
+
+def test_reingest_keeps_first_ingest_time(tmp_path):
+    catalog = LibraryCatalog(str(tmp_path / "catalog.sqlite3"))
+    catalog.record_document("a", 5, 1, title="Old", github_url="https://github.com/o/r")
+    first = catalog.get("a")
+    catalog.record_document("a", 3, 0, title="New")
+    doc = catalog.get("a")
+    assert doc["ingested_at"] == first["ingested_at"]
+    assert doc["chunk_count"] == 3 and doc["title"] == "New"
+    assert doc["github_url"] == "https://github.com/o/r"
+    assert catalog.contains_many(["a", "b"]) == {"a": True, "b": False}
+    assert catalog.delete("a") and catalog.count() == 0
+
+
+def test_backfill_from_existing_collection(chroma, tmp_path):
+    chroma.add_documents(
+        [
+            Document(
+                page_content="c0",
+                metadata={"doc_id": "p1", "title": "P1", "type": "text"},
+            ),
+            Document(
+                page_content="c1",
+                metadata={"doc_id": "p1", "title": "P1", "type": "text"},
+            ),
+            Document(
+                page_content="f",
+                metadata={
+                    "doc_id": "p1",
+                    "type": "repo",
+                    "repo_url": "https://github.com/o/r",
+                },
+            ),
+            Document(
+                page_content="c0",
+                metadata={"doc_id": "p2", "title": "P2", "type": "text"},
+            ),
+        ],
+        [[1.0, 0.0, 0.0]] * 4,
+        ["p1::chunk::0", "p1::chunk::1", "p1::repo::f::0", "p2::chunk::0"],
+    )
+
+    catalog = LibraryCatalog(str(tmp_path / "catalog.sqlite3"))
+    assert catalog.backfill(chroma, page_size=2) == 2
+    assert catalog.ready
+    p1 = catalog.get("p1")
+    assert p1["chunk_count"] == 2 and p1["repo_file_count"] == 1 and p1["title"] == "P1"
+    # Only runs while the catalog is empty
+    assert catalog.backfill(chroma) == 0
+
+
+def test_status_reports_papers_of_a_batch_job(monkeypatch):
+    queue = IngestionJobQueue(workers=1, max_pending=2)
+    monkeypatch.setattr(routes_library, "ingestion_jobs", queue)
+    papers = [
+        {"doc_id": "2101.00007", "status": "ok"},
+        {"doc_id": "2101.00008", "status": "error", "error": "bad pdf"},
+    ]
+    job = queue.submit(
+        "2101.00007,2101.00008",
+        lambda report: {"papers": papers},
+        doc_ids=["2101.00007", "2101.00008"],
+    )
+    queue.shutdown(wait=True)
+
+    ok = client.get("/library/status/2101.00007").json()
+    assert ok["job_id"] == job.id and ok["status"] == "completed"
+    failed = client.get("/library/status/2101.00008").json()
+    assert failed["status"] == "failed" and failed["error"] == "bad pdf"
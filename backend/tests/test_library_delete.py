@@ -0,0 +1,77 @@
+from app.core.config import settings
+from app.services import ingestion_service
+from app.services.embedding_service import (
+    PdfMetadata,
+    embed_prepared_pdf,
+    prepare_pdf_documents,
+    write_prepared_pdf,
+)
+from app.services.image_store import ImageStore
+from app.services.ingestion_service import delete_document
+from app.services.library_catalog import library_catalog
+from app.services.retrieval_cache import retrieval_cache
+
+
+def _ingest(chroma, embedder, doc_id, texts, image_hashes):
+    meta = PdfMetadata(
+        doc_id=doc_id, pdf_url="", title=doc_id, summary="", published="", authors=[]
+    )
+    docs = {
+        "chunks": [{"text": t, "metadata": {}} for t in texts],
+        "images": {
+            "pngs": [],
+            "metadatas": [
+                {"picture_number": n, "page": 1, "caption": "", "image_hash": h}
+                for n, h in enumerate(image_hashes, 1)
+            ],
+            "ids": [],
+            "tmp_dir": None,
+        },
+    }
+    prepared = prepare_pdf_documents(docs, meta)
+    prepared.content_hash = "c" * 64
+    embed_prepared_pdf(prepared, embedder, chroma)
+    write_prepared_pdf(prepared, chroma)
+
+
+def test_delete_removes_everything_derived_from_a_paper(
+    chroma, fake_embedder, tmp_path, monkeypatch
+):
+    monkeypatch.setattr(settings, "delete_batch_size", 2)
+    store = ImageStore(str(tmp_path / "images"))
+    monkeypatch.setattr("app.services.embedding_service.image_store", store)
+    monkeypatch.setattr(ingestion_service, "image_store", store)
+
+    shared, own = store.put(b"shared-png"), store.put(b"own-png")
+    _ingest(chroma, fake_embedder, "p1", ["a", "b", "c", "d", "e"], [shared, own])
+    _ingest(chroma, fake_embedder, "p2", ["x"], [shared])
+    key = retrieval_cache.key(["q"], ["p1"], 8)
+    retrieval_cache.put(key, {})
+
+    result = delete_document("p1", chroma)
+
+    assert result["deleted_count"] == 5 and result["images_deleted"] == 2
+    assert chroma.ids_where({"doc_id": "p1"}) == []
+    assert chroma.ids_where({"doc_id": "p2"}) == ["p2::chunk::0"]
+    assert store.exists(shared) and not store.exists(own)
+    assert retrieval_cache.get(key) is None
+    assert library_catalog.get("p1") is None and library_catalog.get("p2") is not None
+
+
+def test_delete_removes_figure_blobs_that_were_never_indexed(
+    chroma, fake_embedder, tmp_path, monkeypatch
+):
+    monkeypatch.setattr(settings, "index_images", False)
+    store = ImageStore(str(tmp_path / "images"))
+    monkeypatch.setattr("app.services.embedding_service.image_store", store)
+    monkeypatch.setattr(ingestion_service, "image_store", store)
+
+    shared, own = store.put(b"shared-png"), store.put(b"own-png")
+    _ingest(chroma, fake_embedder, "p1", ["a", "b"], [shared, own])
+    _ingest(chroma, fake_embedder, "p2", ["x"], [shared])
+    assert chroma.images.ids_where({"doc_id": "p1"}) == []
+
+    result = delete_document("p1", chroma)
+
+    assert result["images_deleted"] == 0 and result["image_files_removed"] == 1
+    assert store.exists(shared) and not store.exists(own)
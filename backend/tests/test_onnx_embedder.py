@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+
+from app.core.config import settings
+from app.services.embedding_service import NomicEmbeddingService
+from app.services.onnx_embedder import OnnxNomicEmbeddings
+
+
+class FakeTokenizer:
+    """One token per word, padded to the longest text."""
+
+    def __init__(self):
+        self.texts = []
+
+    def __call__(self, texts, padding, truncation, max_length, return_tensors):
+        self.texts.extend(texts)
+        width = min(max(len(t.split()) for t in texts), max_length)
+        ids = np.zeros((len(texts), width), dtype=np.int64)
+        mask = np.zeros_like(ids)
+        for row, text in enumerate(texts):
+            n = min(len(text.split()), width)
+            ids[row, :n] = np.arange(1, n + 1)
+            mask[row, :n] = 1
+        return {"input_ids": ids, "attention_mask": mask}
+
+
+class FakeInput:
+    def __init__(self, name):
+        self.name = name
+
+
+class FakeSession:
+    """Hidden state of token i is [i, 1]; padding positions are huge."""
+
+    def __init__(self):
+        self.feeds = None
+
+    def get_inputs(self):
+        return [FakeInput(n) for n in ("input_ids", "attention_mask", "token_type_ids")]
+
+    def run(self, outputs, feeds):
+        self.feeds = feeds
+        ids = feeds["input_ids"].astype(np.float32)
+        hidden = np.stack([ids, np.ones_like(ids)], axis=-1)
+        hidden[feeds["attention_mask"] == 0] = 1e6
+        return [hidden]
+
+
+def _embedder(max_length=8):
+    embedder = OnnxNomicEmbeddings(repo="test/repo", max_length=max_length)
+    embedder._session = FakeSession()
+    embedder._input_names = [i.name for i in embedder._session.get_inputs()]
+    embedder._tokenizer = FakeTokenizer()
+    return embedder
+
+
+def test_prefixes_match_the_nomic_client():
+    embedder = _embedder()
+    embedder.embed_documents(["a b"])
+    embedder.embed_query("search_query: c")
+    assert embedder._tokenizer.texts == [
+        "search_document: a b",
+        "search_query: search_query: c",
+    ]
+
+
+def test_mean_pools_over_the_mask_and_normalizes():
+    embedder = _embedder()
+    # "search_document: a" is 2 tokens -> mean [1.5, 1]; the 4-token text -> [2.5, 1]
+    vectors = embedder.embed_documents(["a", "a b c"])
+    expected = np.array([[1.5, 1.0], [2.5, 1.0]])
+    expected /= np.linalg.norm(expected, axis=1, keepdims=True)
+    assert np.allclose(vectors, expected)
+    # Missing token_type_ids are fed as zeros
+    assert not embedder._session.feeds["token_type_ids"].any()
+
+
+def test_service_uses_onnx_for_text_and_keeps_cache_keys_apart(monkeypatch):
+    monkeypatch.setattr(settings, "embedding_backend", "onnx")
+    monkeypatch.setattr(settings, "onnx_quantized", True)
+    service = NomicEmbeddingService()
+    assert isinstance(service.text_embedder, OnnxNomicEmbeddings)
+    assert service.cache_model == f"{service.model}@onnx-int8"
+
+    monkeypatch.setattr(settings, "embedding_backend", "torch")
+    with pytest.raises(ValueError):
+        NomicEmbeddingService()
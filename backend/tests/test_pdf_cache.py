@@ -0,0 +1,82 @@
+import os
+import time
+
+from app.services.pdf_cache import PdfCache, sha256_bytes
+
+
+def _cache(tmp_path, **kwargs):
+    return PdfCache(root=str(tmp_path), enabled=True, **kwargs)
+
+
+def test_pdf_roundtrip_by_hash_and_arxiv_id(tmp_path):
+    cache = _cache(tmp_path, max_bytes=10_000)
+    sha = cache.put_pdf(b"%PDF-1.4 one", arxiv_id="2101.00001v1")
+
+    assert sha == sha256_bytes(b"%PDF-1.4 one")
+    assert cache.get_pdf(sha) == b"%PDF-1.4 one"
+    assert cache.get_pdf_for_arxiv("2101.00001v1") == b"%PDF-1.4 one"
+    assert cache.get_pdf_for_arxiv("2101.00002") is None
+
+    stats = cache.stats()
+    assert stats["pdf_hits"] == 2
+    assert stats["pdf_misses"] == 1
+
+
+def test_unversioned_ids_expire(tmp_path):
+    cache = _cache(tmp_path, max_bytes=10_000, unversioned_ttl=0)
+    cache.put_pdf(b"%PDF latest", arxiv_id="2101.00001")
+    cache.put_pdf(b"%PDF v2", arxiv_id="2101.00001v2")
+
+    assert cache.get_pdf_for_arxiv("2101.00001") is None
+    assert cache.get_pdf_for_arxiv("2101.00001v2") == b"%PDF v2"
+
+
+def test_documents_are_saved_and_loaded(tmp_path):
+    cache = _cache(tmp_path, max_bytes=10_000)
+
+    def save(path):
+        with open(path, "w") as f:
+            f.write("{}")
+
+    assert cache.get_document("abc", "opts", lambda p: open(p).read()) is None
+    cache.put_document("abc", "opts", save)
+    assert cache.get_document("abc", "opts", lambda p: open(p).read()) == "{}"
+    assert cache.get_document("abc", "other", lambda p: open(p).read()) is None
+
+
+def test_least_recently_used_files_are_evicted(tmp_path):
+    cache = _cache(tmp_path, max_bytes=250)
+    old = cache.put_pdf(b"a" * 100)
+    recent = cache.put_pdf(b"b" * 100)
+    past = time.time() - 100
+    os.utime(os.path.join(tmp_path, "pdf", f"{old}.pdf"), (past, past))
+    os.utime(os.path.join(tmp_path, "pdf", f"{recent}.pdf"), (past + 50, past + 50))
+
+    cache.get_pdf(old)  # refreshes old, leaving recent as the LRU entry
+    cache.put_pdf(b"c" * 100)
+
+    assert cache.get_pdf(old) is not None
+    assert cache.get_pdf(recent) is None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_downloaded_files_move_into_the_cache(tmp_path):
+    cache = _cache(tmp_path / "cache", max_bytes=10_000)
+    download = tmp_path / "download.pdf"
+    download.write_bytes(b"%PDF streamed")
+    sha = sha256_bytes(b"%PDF streamed")
+
+    path = cache.put_pdf_file(str(download), sha, arxiv_id="2101.00003v1")
+
+    assert not download.exists()
+    assert cache.get_pdf_path_for_arxiv("2101.00003v1") == (path, sha)
+    assert cache.get_pdf(sha) == b"%PDF streamed"
+
+
+def test_a_file_is_not_evicted_by_the_call_that_stores_it(tmp_path):
+    cache = _cache(tmp_path / "cache", max_bytes=50)
+    small = cache.put_pdf(b"a" * 40)
+    big = cache.put_pdf(b"b" * 100)
+
+    assert cache.get_pdf(big) == b"b" * 100
+    assert cache.get_pdf(small) is None
@@ -0,0 +1,107 @@
+import os
+from contextlib import contextmanager
+
+import pytest
+
+from app.core.config import settings
+from app.services import ingestion_service
+from app.services.ingestion_service import IngestionError, download_arxiv_pdf
+from app.services.pdf_cache import PdfCache, sha256_bytes
+
+
+class FakeResponse:
+    def __init__(self, blocks, status_code=200, headers=None):
+        self.blocks = blocks
+        self.status_code = status_code
+        self.headers = headers or {}
+
+    def iter_bytes(self, chunk_size=None):
+        yield from self.blocks
+
+
+def _serve(monkeypatch, response):
+    calls = []
+
+    @contextmanager
+    def fake_stream(method, url, **kwargs):
+        calls.append(url)
+        yield response
+
+    monkeypatch.setattr(ingestion_service.httpx, "stream", fake_stream)
+    return calls
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = PdfCache(root=str(tmp_path / "cache"), max_bytes=10_000, enabled=True)
+    monkeypatch.setattr(ingestion_service, "pdf_cache", cache)
+    return cache
+
+
+def test_pdf_is_streamed_to_disk_and_cached(cache, monkeypatch):
+    calls = _serve(monkeypatch, FakeResponse([b"%PDF-1.4 ", b"body"]))
+
+    pdf = download_arxiv_pdf("2101.00001v1")
+    assert pdf.sha == sha256_bytes(b"%PDF-1.4 body")
+    assert pdf.size == len(b"%PDF-1.4 body")
+    with open(pdf.path, "rb") as f:
+        assert f.read() == b"%PDF-1.4 body"
+    assert cache.get_pdf(pdf.sha) == b"%PDF-1.4 body"
+
+    again = download_arxiv_pdf("2101.00001v1")
+    assert again.sha == pdf.sha and again.path != pdf.path
+    assert len(calls) == 1
+    pdf.release()
+    again.release()
+    assert not os.path.exists(pdf.path) and not os.path.exists(again.path)
+    assert cache.get_pdf(pdf.sha) == b"%PDF-1.4 body"
+
+
+def test_downloaded_pdf_survives_cache_eviction(cache, monkeypatch):
+    _serve(monkeypatch, FakeResponse([b"%PDF-1.4 ", b"body"]))
+    pdf = download_arxiv_pdf("2101.00001v1")
+    hit = download_arxiv_pdf("2101.00001v1")
+
+    # Another ingest filling the cache evicts the PDF while it is in use
+    cache.put_pdf(b"x" * 10_000)
+    assert cache.get_pdf(pdf.sha) is None
+    for held in (pdf, hit):
+        with open(held.path, "rb") as f:
+            assert f.read() == b"%PDF-1.4 body"
+        held.release()
+
+
+def test_pdf_larger_than_the_cache_is_still_readable(tmp_path, monkeypatch):
+    cache = PdfCache(root=str(tmp_path / "cache"), max_bytes=4, enabled=True)
+    monkeypatch.setattr(ingestion_service, "pdf_cache", cache)
+    _serve(monkeypatch, FakeResponse([b"%PDF-1.4 ", b"body"]))
+
+    pdf = download_arxiv_pdf("2101.00001v1")
+    assert os.path.getsize(pdf.path) == pdf.size
+    pdf.release()
+
+
+def test_uncached_download_is_a_temp_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        ingestion_service, "pdf_cache", PdfCache(root=str(tmp_path), enabled=False)
+    )
+    _serve(monkeypatch, FakeResponse([b"%PDF"]))
+
+    pdf = download_arxiv_pdf("2101.00002")
+    assert os.path.exists(pdf.path)
+    pdf.release()
+    assert not os.path.exists(pdf.path)
+
+
+def test_oversized_pdf_is_rejected(cache, monkeypatch):
+    monkeypatch.setattr(settings, "pdf_max_bytes", 8)
+    _serve(monkeypatch, FakeResponse([b"%PDF-1.4 ", b"too much"]))
+
+    with pytest.raises(IngestionError) as exc:
+        download_arxiv_pdf("2101.00003")
+    assert exc.value.status_code == 413
+    assert cache.get_pdf_path_for_arxiv("2101.00003") is None
+
+    _serve(monkeypatch, FakeResponse([], headers={"Content-Length": "1000"}))
+    with pytest.raises(IngestionError):
+        download_arxiv_pdf("2101.00004")
@@ -0,0 +1,65 @@
+import threading
+import time
+
+from app.services.pipeline import Stage, run_pipeline
+
+
+def test_pipeline_preserves_order_and_isolates_failures():
+    def fail_on_four(x):
+        if x == 4:
+            raise ValueError("boom")
+        return x * 10
+
+    results = run_pipeline(
+        [1, 2, 3, 4],
+        [
+            Stage("double", lambda x: x * 2, workers=2),
+            Stage("check", fail_on_four),
+            Stage("inc", lambda x: x + 1),
+        ],
+        queue_size=1,
+        key=lambda x: f"doc-{x}",
+    )
+
+    assert [r.key for r in results] == ["doc-1", "doc-2", "doc-3", "doc-4"]
+    assert [r.value for r in results] == [21, 4, 61, 81]
+    assert results[1].error == "boom"
+    assert results[1].failed_stage == "check"
+    assert all(r.error is None for i, r in enumerate(results) if i != 1)
+
+
+def test_pipeline_records_failed_stage():
+    results = run_pipeline(
+        ["a", "b"],
+        [
+            Stage("download", lambda x: x),
+            Stage("convert", lambda x: 1 / 0 if x == "b" else x),
+            Stage("write", lambda x: x.upper()),
+        ],
+    )
+
+    assert results[0].value == "A"
+    assert results[1].failed_stage == "convert"
+    assert "division" in results[1].error
+
+
+def test_pipeline_overlaps_stages():
+    active = set()
+    overlap = threading.Event()
+    lock = threading.Lock()
+
+    def slow(name):
+        def fn(x):
+            with lock:
+                active.add(name)
+                if len(active) > 1:
+                    overlap.set()
+            time.sleep(0.02)
+            with lock:
+                active.discard(name)
+            return x
+
+        return fn
+
+    run_pipeline(range(6), [Stage("a", slow("a")), Stage("b", slow("b"))])
+    assert overlap.is_set()
@@ -0,0 +1,109 @@
+import threading
+import time
+
+from app.services.agent_service import create_search_tools
+from app.services.embedding_service import NomicEmbeddingService
+from app.services.retrieval_cache import retrieval_cache
+from app.services.ttl_cache import TtlLruCache
+
+
+class CountingQueryEmbedder:
+    def __init__(self):
+        self.queries = []
+
+    def embed_query(self, text):
+        self.queries.append(text)
+        return [1.0, 0.0]
+
+    def embed_queries(self, texts):
+        return [self.embed_query(text) for text in texts]
+
+
+def _service(ttl=60.0):
+    service = NomicEmbeddingService.__new__(NomicEmbeddingService)
+    service.embedder = CountingQueryEmbedder()
+    service.text_embedder = service.embedder
+    service.dispatcher = None
+    service._lock = threading.Lock()
+    service._query_cache = TtlLruCache(4, ttl)
+    return service
+
+
+def test_repeated_queries_are_embedded_once():
+    service = _service()
+
+    service.embed_query("what is attention?")
+    service.embed_query("  what is   attention? ")
+
+    assert service.embedder.queries == ["search_query: what is attention?"]
+    assert service._query_cache.stats()["hits"] == 1
+
+
+def test_expired_queries_are_embedded_again():
+    service = _service(ttl=0.0)
+    service.embed_query("q")
+    time.sleep(0.01)
+    service.embed_query("q")
+    assert len(service.embedder.queries) == 2
+
+
+def test_lru_evicts_oldest():
+    cache = TtlLruCache(2, 60)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+
+
+class FakeChroma:
+    def __init__(self):
+        self.calls = 0
+
+    def search_many(
+        self, query_embeddings, n_results, doc_ids=None, include_embeddings=False
+    ):
+        self.calls += 1
+        rows = [[] for _ in query_embeddings]
+        return {"ids": rows, "documents": rows, "metadatas": rows, "distances": rows}
+
+    def hybrid_search(
+        self, queries, query_embeddings, n_results, doc_ids, include_embeddings=False
+    ):
+        return self.search_many(
+            query_embeddings, n_results, doc_ids, include_embeddings
+        )
+
+    @property
+    def images(self):
+        return self
+
+
+def test_search_tool_embeds_the_query_once():
+    embedder = CountingQueryEmbedder()
+    chroma = FakeChroma()
+    tool = create_search_tools(embedder, ["2101.00001"], {}, chroma_service=chroma)
+
+    output = tool.invoke(
+        {"query": "transformers", "related_queries": ["vit", "transformers"]}
+    )
+
+    assert embedder.queries == ["transformers", "vit"]
+    # One batched call per source (text and images)
+    assert chroma.calls == 2
+    assert "ERROR" not in output
+
+
+def test_repeated_searches_are_served_from_the_retrieval_cache():
+    embedder = CountingQueryEmbedder()
+    chroma = FakeChroma()
+    tool = create_search_tools(embedder, ["2101.00001"], {}, chroma_service=chroma)
+
+    tool.invoke({"query": "What is attention?"})
+    tool.invoke({"query": "  what is   ATTENTION? "})
+    assert embedder.queries == ["What is attention?"] and chroma.calls == 2
+
+    retrieval_cache.invalidate(["2101.00001"])
+    tool.invoke({"query": "What is attention?"})
+    assert chroma.calls == 4
@@ -0,0 +1,58 @@
+import numpy as np
+from langchain_core.documents import Document
+
+from app.core.config import settings
+from app.services.rerank import collapse_duplicates, diversify_results, mmr
+
+
+def test_collapse_keeps_first_of_near_duplicates():
+    vectors = np.array([[1.0, 0.0], [0.999, 0.01], [0.0, 1.0], [0.01, 0.999]])
+    assert collapse_duplicates(vectors, 0.95) == [0, 2]
+    assert collapse_duplicates(vectors, 1.0) == [0, 1, 2, 3]
+
+
+def test_mmr_trades_relevance_for_diversity():
+    query = np.array([1.0, 0.0, 0.0])
+    vectors = np.array([[1.0, 0.0, 0.0], [0.95, 0.3, 0.0], [0.7, 0.0, 0.7]])
+    assert mmr(query, vectors, 2, 1.0) == [0, 1]
+    assert mmr(query, vectors, 2, 0.3) == [0, 2]
+    # Queries longer than the stored (truncated) vectors are cut to match
+    assert mmr(np.array([1.0, 0.0, 0.0, 0.5]), vectors, 1, 0.5) == [0]
+
+
+def test_diversify_results_drops_duplicates_and_embeddings():
+    result = {
+        "ids": [["a", "b", "c"]],
+        "documents": [["x", "x'", "y"]],
+        "metadatas": [[{}, {}, {}]],
+        "distances": [[0.1, 0.11, 0.5]],
+        "embeddings": [[[1.0, 0.0], [1.0, 0.001], [0.6, 0.8]]],
+    }
+    out = diversify_results(
+        result, [[1.0, 0.0]], 2, lambda_mult=1.0, dedup_threshold=0.99
+    )
+    assert out["ids"] == [["a", "c"]] and out["documents"] == [["x", "y"]]
+    assert "embeddings" not in out
+
+
+def test_search_returns_stored_embeddings_for_reranking(chroma, monkeypatch):
+    vectors = [[1.0, 0.0, 0.0], [0.99, 0.1, 0.0], [0.0, 1.0, 0.0]]
+    chroma.add_documents(
+        [Document(page_content=f"c{n}", metadata={"doc_id": "p1"}) for n in range(3)],
+        vectors,
+        [f"p1::chunk::{n}" for n in range(3)],
+    )
+
+    exact = chroma.hybrid_search(
+        ["c0"], [[1.0, 0.0, 0.0]], 3, ["p1"], include_embeddings=True
+    )
+    monkeypatch.setattr(settings, "exact_search_max_docs", 0)
+    hnsw = chroma.search_many([[1.0, 0.0, 0.0]], 3, ["p1"], include_embeddings=True)
+
+    for res in (exact, hnsw):
+        stored = dict(zip(res["ids"][0], res["embeddings"][0]))
+        assert np.allclose(stored["p1::chunk::2"], vectors[2])
+    out = diversify_results(
+        exact, [[1.0, 0.0, 0.0]], 2, lambda_mult=0.7, dedup_threshold=0.95
+    )
+    assert out["ids"] == [["p1::chunk::0", "p1::chunk::2"]]
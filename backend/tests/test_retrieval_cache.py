@@ -0,0 +1,77 @@
+from langchain_core.documents import Document
+
+from app.services.retrieval_cache import RetrievalCache, retrieval_cache
+
+
+def test_keys_normalize_queries_and_scope():
+    a = RetrievalCache.key(["What  is BERT?"], ["p2", "p1"], 8, mode="hybrid")
+    b = RetrievalCache.key(["what is bert?"], ["p1", "p2", "p1"], 8, mode="hybrid")
+    assert a == b
+    assert a != RetrievalCache.key(["what is bert?"], ["p1", "p2"], 4, mode="hybrid")
+    assert a != RetrievalCache.key(["what is bert?"], ["p1", "p2"], 8, mode="dense")
+
+
+def test_invalidation_is_per_paper():
+    cache = RetrievalCache(maxsize=8, ttl=60)
+    k1 = cache.key(["q"], ["p1"], 8)
+    k12 = cache.key(["q"], ["p1", "p2"], 8)
+    k3 = cache.key(["q"], ["p3"], 8)
+    unscoped = cache.key(["q"], [], 8)
+    for key in (k1, k12, k3, unscoped):
+        cache.put(key, {"text": key})
+
+    assert cache.invalidate(["p2"]) == 2  # k12 and the unscoped search
+    assert cache.get(k1) is not None and cache.get(k3) is not None
+    assert cache.get(k12) is None and cache.get(unscoped) is None
+    stats = cache.stats()
+    assert stats["invalidated"] == 2 and stats["hits"] == 2 and stats["misses"] == 2
+
+    # A result computed while a paper was being written is not kept
+    version = cache.version()
+    cache.invalidate(["p1"])
+    cache.put(k1, {"text": "stale"}, version)
+    assert cache.get(k1) is None
+
+
+def test_index_forgets_evicted_keys():
+    cache = RetrievalCache(maxsize=2, ttl=60)
+    for n in range(10):
+        cache.put(cache.key([f"q{n}"], ["p1"], 8), n)
+    assert len(cache._keys_by_doc["p1"]) <= 4
+
+
+def test_chroma_writes_and_deletes_invalidate(chroma):
+    key = retrieval_cache.key(["q"], ["p1"], 8)
+    other = retrieval_cache.key(["q"], ["p2"], 8)
+    retrieval_cache.put(key, {})
+    retrieval_cache.put(other, {})
+
+    chroma.add_documents(
+        [Document(page_content="c", metadata={"doc_id": "p1"})],
+        [[1.0, 0.0]],
+        ["p1::chunk::0"],
+    )
+    assert retrieval_cache.get(key) is None and retrieval_cache.get(other) is not None
+
+    retrieval_cache.put(key, {})
+    chroma.delete(["p1::chunk::0"])
+    assert retrieval_cache.get(key) is None
+
+
+def test_metadata_only_reingest_invalidates(chroma):
+    ids = ["p1::chunk::0"]
+
+    def ingest(title):
+        docs = [Document(page_content="c", metadata={"doc_id": "p1", "title": title})]
+        plan = chroma.plan_upsert(docs, ids)
+        chroma.apply_upsert(docs, ids, plan, [[1.0, 0.0]] * len(plan["changed"]))
+        return plan
+
+    ingest("Draft")
+    key = retrieval_cache.key(["q"], ["p1"], 8)
+    other = retrieval_cache.key(["q"], ["p2"], 8)
+    retrieval_cache.put(key, {})
+    retrieval_cache.put(other, {})
+
+    assert ingest("Final") == {"changed": [], "refresh": [0]}
+    assert retrieval_cache.get(key) is None and retrieval_cache.get(other) is not None
@@ -0,0 +1,110 @@
+from langchain_core.documents import Document
+
+from app.core.config import settings
+from app.services.chroma_service import merge_results
+from app.services.vector_cache import VectorCache, vector_cache
+
+
+def _seed(chroma):
+    vectors = {
+        "p1": [[1.0, 0.0, 0.0], [0.6, 0.8, 0.0]],
+        "p2": [[0.0, 1.0, 0.0], [0.0, 0.0, 1.0]],
+    }
+    for doc_id, rows in vectors.items():
+        chroma.add_documents(
+            [
+                Document(page_content=f"{doc_id}-{n}", metadata={"doc_id": doc_id})
+                for n in range(2)
+            ],
+            rows,
+            [f"{doc_id}::chunk::{n}" for n in range(2)],
+        )
+
+
+def test_exact_search_matches_hnsw(chroma, monkeypatch):
+    _seed(chroma)
+    query = [0.7, 0.7, 0.1]
+
+    exact = chroma.search(query, 3, ["p1", "p2"])
+    monkeypatch.setattr(settings, "exact_search_max_docs", 0)
+    hnsw = chroma.search(query, 3, ["p1", "p2"])
+
+    assert exact["ids"] == hnsw["ids"]
+    assert exact["documents"] == hnsw["documents"]
+    for a, b in zip(exact["distances"][0], hnsw["distances"][0]):
+        assert abs(a - b) < 1e-4
+    assert vector_cache.get(chroma.cache_key, "p1") is not None
+
+
+def test_search_many_batches_queries_and_merges(chroma, monkeypatch):
+    _seed(chroma)
+    queries = [[1.0, 0.0, 0.0], [0.0, 0.3, 1.0]]
+
+    exact = chroma.search_many(queries, 2, ["p1", "p2"])
+    monkeypatch.setattr(settings, "exact_search_max_docs", 0)
+    hnsw = chroma.search_many(queries, 2, ["p1", "p2"])
+
+    assert exact["ids"] == hnsw["ids"]
+    assert exact["ids"][0][0] == "p1::chunk::0" and exact["ids"][1][0] == "p2::chunk::1"
+    merged = merge_results(exact, 3)
+    assert len(merged["ids"][0]) == len(set(merged["ids"][0])) == 3
+    assert merged["ids"][0][:2] == ["p1::chunk::0", "p2::chunk::1"]
+    assert merged["distances"][0] == sorted(merged["distances"][0])
+
+
+def test_writes_and_deletes_invalidate(chroma):
+    _seed(chroma)
+    assert chroma.search([1.0, 0.0, 0.0], 1, ["p1"])["ids"] == [["p1::chunk::0"]]
+
+    chroma.add_documents(
+        [Document(page_content="new", metadata={"doc_id": "p1"})],
+        [[0.0, 0.0, 1.0]],
+        ["p1::chunk::2"],
+    )
+    assert vector_cache.get(chroma.cache_key, "p1") is None
+    assert chroma.search([0.0, 0.0, 1.0], 1, ["p1"])["ids"] == [["p1::chunk::2"]]
+
+    chroma.delete(["p1::chunk::2"])
+    assert chroma.search([0.0, 1.0, 0.0], 3, ["p1"])["ids"][0] == [
+        "p1::chunk::1",
+        "p1::chunk::0",
+    ]
+    assert chroma.search([1.0, 0.0, 0.0], 3, ["missing"])["ids"] == [[]]
+
+
+def test_metadata_only_reingest_invalidates(chroma):
+    _seed(chroma)
+    ids = ["p3::chunk::0", "p3::chunk::1"]
+
+    def ingest(title):
+        docs = [
+            Document(page_content=f"p3-{n}", metadata={"doc_id": "p3", "title": title})
+            for n in range(2)
+        ]
+        plan = chroma.plan_upsert(docs, ids)
+        vectors = [[[1.0, 0.0, 0.0], [0.0, 1.0, 0.0]][i] for i in plan["changed"]]
+        chroma.apply_upsert(docs, ids, plan, vectors)
+        return plan
+
+    ingest("Draft")
+    hit = chroma.search([1.0, 0.0, 0.0], 1, ["p3"])
+    assert hit["metadatas"][0][0]["title"] == "Draft"
+
+    assert ingest("Final") == {"changed": [], "refresh": [0, 1]}
+    hit = chroma.search([1.0, 0.0, 0.0], 1, ["p3"])
+    assert hit["ids"] == [["p3::chunk::0"]]
+    assert hit["metadatas"][0][0]["title"] == "Final"
+
+
+def test_evicts_by_memory_budget():
+    cache = VectorCache(max_bytes=2 * (3 * 4 + 1024))
+    for doc_id in ("a", "b", "c"):
+        cache.put("col", doc_id, [f"{doc_id}::0"], [[1.0, 0.0, 0.0]], ["t"], [{}])
+    assert cache.get("col", "a") is None and cache.get("col", "c") is not None
+    assert cache.stats()["papers"] == 2
+
+    # A read that raced a write is served but not kept
+    version = cache.version()
+    cache.invalidate("col", ["b"])
+    cache.put("col", "b", ["b::0"], [[1.0, 0.0, 0.0]], ["t"], [{}], version=version)
+    assert cache.get("col", "b") is None
@@ -0,0 +1,143 @@
+import numpy as np
+from langchain_core.documents import Document
+
+from app.core.config import settings
+from app.services import vector_sidecar
+from app.services.chroma_service import ChromaService, truncate_embeddings
+from app.services.vector_sidecar import VectorSidecar
+from scripts.migrate_vectors import migrate
+
+
+def _unit_vectors(n, dim, seed=0):
+    rng = np.random.default_rng(seed)
+    m = rng.normal(size=(n, dim)).astype(np.float32)
+    return (m / np.linalg.norm(m, axis=1, keepdims=True)).tolist()
+
+
+def _docs(n):
+    return [
+        Document(page_content=f"chunk {i}", metadata={"doc_id": f"paper{i % 3}"})
+        for i in range(n)
+    ]
+
+
+def _matryoshka(vector, dim):
+    v = np.asarray(vector, dtype=np.float64)
+    v = ((v - v.mean()) / v.std())[:dim]
+    return v / np.linalg.norm(v)
+
+
+def test_truncate_embeddings_follows_matryoshka_recipe():
+    vectors = _unit_vectors(4, 16)
+    short = truncate_embeddings(vectors, 8)
+    assert all(len(v) == 8 for v in short)
+    assert np.allclose(np.linalg.norm(short, axis=1), 1.0)
+    for full, got in zip(vectors, short):
+        assert np.allclose(got, _matryoshka(full, 8), atol=1e-5)
+    # Layer norm makes the result independent of the input's scale
+    assert np.allclose(
+        truncate_embeddings([[3 * x for x in vectors[0]]], 8)[0], short[0], atol=1e-6
+    )
+    # 0 or a dimension at least the native size leaves vectors alone
+    assert truncate_embeddings(vectors, 0) == vectors
+    assert truncate_embeddings(vectors, 16) == vectors
+
+
+def test_sidecar_search_filters_and_persists(tmp_path):
+    path = str(tmp_path / "docs.int8.npz")
+    vectors = _unit_vectors(30, 32)
+    ids = [f"id{i}" for i in range(30)]
+    doc_ids = [f"paper{i % 3}" for i in range(30)]
+    sidecar = VectorSidecar(path, "int8")
+    sidecar.upsert(ids, doc_ids, vectors)
+
+    assert sidecar.search(vectors[7], 1) == ["id7"]
+    assert all(int(i[2:]) % 3 == 1 for i in sidecar.search(vectors[7], 5, ["paper1"]))
+    assert sidecar.nbytes() < np.asarray(vectors, dtype=np.float32).nbytes / 3
+
+    sidecar.remove(["id7"])
+    reloaded = VectorSidecar(path, "int8")
+    assert reloaded.count() == 29
+    assert "id7" not in reloaded.search(vectors[7], 5)
+    # Re-upserting an id replaces its row instead of adding one
+    reloaded.upsert(["id8"], ["paper2"], [vectors[7]])
+    assert reloaded.count() == 29
+    assert reloaded.search(vectors[7], 1) == ["id8"]
+
+
+def test_sidecar_search_matches_full_precision(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "chroma_persist_path", str(tmp_path / "chroma"))
+    monkeypatch.setattr(settings, "vector_sidecar_dir", str(tmp_path / "sidecar"))
+    # Compare against HNSW rather than the exact in-memory path
+    monkeypatch.setattr(settings, "exact_search_max_docs", 0)
+    vector_sidecar.reset_sidecars()
+    vectors = _unit_vectors(60, 32)
+    queries = _unit_vectors(5, 32, seed=1)
+
+    monkeypatch.setattr(settings, "vector_sidecar", "")
+    plain = ChromaService(collection_name="plain")
+    plain.add_documents(_docs(60), vectors, [f"id{i}" for i in range(60)])
+
+    monkeypatch.setattr(settings, "vector_sidecar", "int8")
+    quantized = ChromaService(collection_name="quantized")
+    quantized.add_documents(_docs(60), vectors, [f"id{i}" for i in range(60)])
+    assert quantized.sidecar is not None and quantized.sidecar.count() == 60
+
+    for q in queries:
+        expected = plain.search(q, n_results=5, doc_ids=["paper0", "paper2"])
+        got = quantized.search(q, n_results=5, doc_ids=["paper0", "paper2"])
+        assert got["ids"] == expected["ids"]
+        assert np.allclose(got["distances"], expected["distances"], atol=1e-4)
+        assert got["metadatas"][0][0]["doc_id"] in {"paper0", "paper2"}
+    batched = quantized.search_many(queries, n_results=5, doc_ids=["paper0", "paper2"])
+    assert batched["ids"] == plain.search_many(queries, 5, ["paper0", "paper2"])["ids"]
+
+    quantized.delete(["id0"])
+    assert quantized.sidecar.count() == 59
+    vector_sidecar.reset_sidecars()
+
+
+def test_sidecar_rebuilds_from_chroma(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "chroma_persist_path", str(tmp_path / "chroma"))
+    monkeypatch.setattr(settings, "vector_sidecar_dir", str(tmp_path / "sidecar"))
+    vectors = _unit_vectors(10, 16)
+    monkeypatch.setattr(settings, "vector_sidecar", "")
+    ChromaService(collection_name="docs").add_documents(
+        _docs(10), vectors, [f"id{i}" for i in range(10)]
+    )
+
+    # Enabling the sidecar later fills it from the existing collection
+    monkeypatch.setattr(settings, "vector_sidecar", "float16")
+    vector_sidecar.reset_sidecars()
+    chroma = ChromaService(collection_name="docs")
+    res = chroma.search(vectors[3], n_results=1)
+    assert res["ids"] == [["id3"]]
+    assert chroma.sidecar.count() == 10
+    vector_sidecar.reset_sidecars()
+
+
+def test_dimension_truncates_stored_vectors_and_migration(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "chroma_persist_path", str(tmp_path / "chroma"))
+    monkeypatch.setattr(settings, "vector_sidecar", "")
+    vectors = _unit_vectors(12, 32)
+    source = ChromaService(collection_name="full", dimension=0)
+    source.add_documents(_docs(12), vectors, [f"id{i}" for i in range(12)])
+
+    target = ChromaService(collection_name="small", dimension=0)
+    sidecar = VectorSidecar(str(tmp_path / "small.int8.npz"), "int8")
+    assert migrate(source, target, 8, sidecar, page_size=5) == 12
+    assert sidecar.count() == 12
+
+    stored = target.collection.get(ids=["id4"], include=["embeddings", "documents"])
+    assert len(stored["embeddings"][0]) == 8
+    assert np.allclose(stored["embeddings"][0], _matryoshka(vectors[4], 8), atol=1e-5)
+    assert stored["documents"] == ["chunk 4"]
+
+    # A service configured for 8 dimensions truncates queries to match
+    small = ChromaService(collection_name="small", dimension=8)
+    assert small.search(vectors[4], n_results=1)["ids"] == [["id4"]]
+    small.add_documents(_docs(1), [vectors[0]], ["new"])
+    assert (
+        len(small.collection.get(ids=["new"], include=["embeddings"])["embeddings"][0])
+        == 8
+    )
@@ -0,0 +1,91 @@
+from docling_core.types.doc import DoclingDocument
+
+from app.services import docling_service, embedding_service
+from app.services.docling_service import DocumentWindow
+from app.services.embedding_service import PdfMetadata, ingest_pdf_windows_into_chroma
+from app.services.pdf_cache import PdfCache
+
+
+class FakeDocling:
+    """Yields windows whose 'documents' are already-extracted chunk lists."""
+
+    def __init__(self, windows):
+        self.windows = windows
+
+    def iter_document_windows(self, path, sha=None, window_pages=None):
+        total = len(self.windows) * 10
+        for n, chunks in enumerate(self.windows):
+            yield DocumentWindow(
+                start=n * 10 + 1, end=(n + 1) * 10, total_pages=total, document=chunks
+            )
+
+    def extract_from_document(self, chunks):
+        return {
+            "chunks": [{"text": text, "metadata": {}} for text in chunks],
+            "images": {"pngs": [], "metadatas": [], "ids": [], "tmp_dir": None},
+        }
+
+
+def _meta():
+    return PdfMetadata(
+        doc_id="2101.00001",
+        pdf_url="",
+        title="Long",
+        summary="",
+        published="",
+        authors=[],
+    )
+
+
+def test_windows_are_written_as_they_convert(chroma, fake_embedder, monkeypatch):
+
+    # A previous whole-document ingest produced more chunks than we will now
+    fake = FakeDocling([["a", "b", "c", "d", "e"]])
+    monkeypatch.setattr(embedding_service, "get_docling_service", lambda: fake)
+    ingest_pdf_windows_into_chroma(
+        "paper.pdf", _meta(), embedder=fake_embedder, chroma=chroma
+    )
+
+    fake.windows = [["a", "b"], ["c", "https://github.com/org/repo"]]
+    written_after_window = []
+    meta = _meta()
+    stats = ingest_pdf_windows_into_chroma(
+        "paper.pdf",
+        meta,
+        embedder=fake_embedder,
+        chroma=chroma,
+        on_window=lambda s: written_after_window.append(chroma.collection.count()),
+    )
+
+    ids = sorted(chroma.collection.get()["ids"])
+    assert ids == [f"2101.00001::chunk::{n}" for n in range(4)]
+    assert (
+        written_after_window[0] >= 2
+    )  # first window visible before the second converts
+    assert stats["text_chunks"] == 4
+    assert stats["deleted"] == 1
+    assert meta.github_url == "https://github.com/org/repo"
+
+
+def test_iter_document_windows_splits_pages(monkeypatch, tmp_path):
+    monkeypatch.setattr(docling_service, "pdf_page_count", lambda path: 25)
+    monkeypatch.setattr(
+        docling_service, "pdf_cache", PdfCache(str(tmp_path), enabled=False)
+    )
+    service = docling_service.DoclingService()
+    converted = []
+
+    def fake_convert(path, page_range=None):
+        converted.append(page_range)
+        return DoclingDocument(name=f"p{page_range[0]}")
+
+    monkeypatch.setattr(service, "_convert_path", fake_convert)
+
+    windows = list(
+        service.iter_document_windows("paper.pdf", sha="abc", window_pages=10)
+    )
+
+    assert [(w.start, w.end) for w in windows] == [(1, 10), (11, 20), (21, 25)]
+    assert converted == [(1, 10), (11, 20), (21, 25)]
+    assert [w.document.name for w in windows] == ["p1", "p11", "p21"]
+    assert all(w.total_pages == 25 for w in windows)
@@ -25,6 +25,27 @@ function getFirebaseApp() {
   return getApps()[0];
 }
 
+const JOB_POLL_INTERVAL_MS = 2000;
+const JOB_TIMEOUT_MS = 600000; // 10 minutes
+
+// Poll the backend ingestion job until it completes, fails or is cancelled
+async function waitForIngestionJob(jobId: string) {
+  const jobUrl = `${BACKEND_URL}/library/jobs/${encodeURIComponent(jobId)}`;
+  const deadline = Date.now() + JOB_TIMEOUT_MS;
+  while (Date.now() < deadline) {
+    const resp = await fetch(jobUrl, { signal: AbortSignal.timeout(30000) });
+    if (!resp.ok) {
+      throw new Error(`Job status request failed: ${resp.status}`);
+    }
+    const job = await resp.json();
+    if (["completed", "failed", "cancelled"].includes(job.status)) {
+      return job;
+    }
+    await new Promise((resolve) => setTimeout(resolve, JOB_POLL_INTERVAL_MS));
+  }
+  throw new Error("Timed out waiting for ingestion job");
+}
+
 export async function POST(request: NextRequest) {
   try {
     const { searchParams } = new URL(request.url);
@@ -120,7 +141,7 @@ export async function POST(request: NextRequest) {
       try {
         const backendResp = await fetch(backendUrl, {
           method: "POST",
-          signal: AbortSignal.timeout(600000), // 10 minutes timeout
+          signal: AbortSignal.timeout(30000),
         });
 
         console.log(
@@ -144,7 +165,20 @@ export async function POST(request: NextRequest) {
         const backendData = await backendResp.json();
         console.log(`[Library Add] Backend response:`, backendData);
 
-        // Backend returns status "completed" after successful ingestion
+        // Backend queues ingestion and returns a job id; wait for the job
+        const job = await waitForIngestionJob(backendData.job_id);
+        if (job.status !== "completed") {
+          console.error(`[Library Add] Ingestion job failed:`, job);
+          await updatePaperIngestionStatus(dc, {
+            paperId,
+            status: "failed",
+          });
+          return NextResponse.json(
+            { error: job.error || "Failed to ingest paper in backend" },
+            { status: 500 }
+          );
+        }
+
         await updatePaperIngestionStatus(dc, {
           paperId,
           status: "completed",
@@ -357,7 +357,7 @@ export default function ChatPage() {
                   chunk_index?: number;
                   page?: number;
                   filename?: string;
-                  image_data?: string;
+                  image_url?: string;
                   citation_number?: number;
                   bbox?: {
                     left: number;
@@ -386,7 +386,7 @@ export default function ChatPage() {
                       chunk_index: src.chunk_index,
                       page: src.page,
                       filename: src.filename,
-                      image_data: src.image_data,
+                      image_url: src.image_url,
                       citation_number: src.citation_number,
                       bbox: src.bbox,
                     } satisfies SourceChunk,
@@ -482,7 +482,7 @@ export default function ChatPage() {
               filename?: string;
               page?: number;
               url?: string;
-              image_data?: string;
+              image_url?: string;
               caption?: string;
               bbox?: {
                 left?: number;
@@ -501,7 +501,7 @@ export default function ChatPage() {
             filename: img.filename,
             page: img.page,
             url: img.url,
-            image_data: img.image_data,
+            image_url: img.image_url,
             caption: img.caption,
             citation_number: textSources.length + index + 1,
             bbox: img.bbox
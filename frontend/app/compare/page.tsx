@@ -17,9 +17,13 @@ type SectionImage = {
   page?: number;
   picture_number?: number;
   caption?: string;
-  image_b64: string;
+  image_hash: string;
+  image_url: string; // backend path, /library/image/{hash}
 };
 
+const BACKEND_URL =
+  process.env.NEXT_PUBLIC_BACKEND_URL || "http://localhost:8000";
+
 type SectionComparison = {
   section: string;
   paper_a_summary: string;
@@ -123,7 +127,8 @@ export default function ComparePage() {
             aria-label="Expand image"
           >
             <img
-              src={`data:image/png;base64,${image.image_b64}`}
+              src={`${BACKEND_URL}${image.image_url}?size=512`}
+              loading="lazy"
               alt={image.caption || "Section reference"}
               className="h-full w-full object-cover"
             />
@@ -176,7 +181,7 @@ export default function ComparePage() {
           ×
         </button>
         <img
-          src={`data:image/png;base64,${previewImage.image_b64}`}
+          src={`${BACKEND_URL}${previewImage.image_url}`}
           alt={previewImage.caption || "Expanded figure"}
           className="w-full rounded-t-3xl object-contain max-h-[70vh]"
         />
@@ -36,7 +36,7 @@ export type SourceChunk = {
   page?: number;
   filename?: string;
   url?: string;
-  image_data?: string; // base64 encoded image data
+  image_url?: string; // backend path of the stored image, /library/image/{hash}
   citation_number?: number;
   bbox?: {
     left: number;